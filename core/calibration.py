@@ -0,0 +1,249 @@
+"""
+Finds the game viewport from a few HUD anchors instead of assuming fixed offsets.
+
+The anchors (the "Goal" panel label, the "Energy" label and the "Details"
+button) are on screen in the career lobby and on the training screen. Their
+reference positions below were measured on the 1920x1080 reference layout.
+The result is cached per window title in data/calibration.json. On later starts
+it is checked by matching one anchor in a small box around its cached position.
+
+    python -m core.calibration ["BlueStacks App Player"]    # calibrate and print the result
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from utils.log import info, warning, debug
+from utils.screenshot import grab
+from utils.trace import traced
+from utils.layout import Layout
+from core.recognizer import load_template
+from core.persistence import writer
+
+CACHE_PATH = os.path.join("data", "calibration.json")
+
+# name -> (template, top-left of the match on the reference layout)
+ANCHORS = {
+    "goal": ("assets/ui/anchor_goal.png", (375, 72)),
+    "energy": ("assets/ui/anchor_energy.png", (383, 122)),
+    "details": ("assets/ui/anchor_details.png", (765, 68)),
+}
+SCALE_ANCHOR = "goal"
+MIN_SCORE = 0.8
+SCALES = np.round(np.arange(0.40, 1.61, 0.025), 3)
+COARSE_FACTOR = 0.5      # scale search runs on a half-size frame first
+COARSE_MIN_SCORE = 0.6
+VERIFY_MARGIN = 12  # px around the cached anchor position
+SEARCH_MARGIN = 24  # px around where the other anchors are expected
+
+Calibration = namedtuple("Calibration", ["scale", "dx", "dy", "anchors"])
+
+
+def _capture(bbox=None):
+    """BGR frame of `bbox` (left, top, right, bottom) and its top-left corner on screen."""
+    image = cv2.cvtColor(np.array(grab(bbox=bbox)), cv2.COLOR_RGB2BGR)
+    origin = (bbox[0], bbox[1]) if bbox else (0, 0)
+    return image, origin
+
+
+def _match(image, template):
+    if template is None or template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+        return 0.0, None
+    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, loc = cv2.minMaxLoc(result)
+    return score, loc
+
+
+def _gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _find_scale(image):
+    """
+    (scale, top-left) of the best scale anchor match, or None. Coarse grayscale
+    pass over SCALES on a half-size copy, then a fine pass around the hit at full size.
+    """
+    path = ANCHORS[SCALE_ANCHOR][0]
+    small = _gray(cv2.resize(image, None, fx=COARSE_FACTOR, fy=COARSE_FACTOR, interpolation=cv2.INTER_AREA))
+    best_score, best_scale, best_loc = 0.0, None, None
+    for scale in SCALES:
+        template = load_template(path, round(float(scale) * COARSE_FACTOR, 4))
+        score, loc = _match(small, None if template is None else _gray(template))
+        if score > best_score:
+            best_score, best_scale, best_loc = score, float(scale), loc
+    if best_score < COARSE_MIN_SCORE:
+        return None
+
+    x = int(best_loc[0] / COARSE_FACTOR)
+    y = int(best_loc[1] / COARSE_FACTOR)
+    pad = int(4 / COARSE_FACTOR)
+    coarse_scale, best_score, best = best_scale, 0.0, None
+    for scale in np.arange(coarse_scale - 0.075, coarse_scale + 0.076, 0.0125):
+        template = load_template(path, round(float(scale), 4))
+        if template is None:
+            continue
+        h, w = template.shape[:2]
+        left, top = max(0, x - pad), max(0, y - pad)
+        score, loc = _match(image[top:y + h + pad, left:x + w + pad], template)
+        if score > best_score:
+            best_score, best = score, (round(float(scale), 4), (loc[0] + left, loc[1] + top))
+    if best_score < MIN_SCORE:
+        return None
+    return best
+
+
+def _solve(found, scale):
+    """Refine scale from anchor distances (when two or more were found) and solve the offset."""
+    if len(found) >= 2:
+        ratios = []
+        for a, b in itertools.combinations(found, 2):
+            ref = math.dist(ANCHORS[a][1], ANCHORS[b][1])
+            if ref > 0:
+                ratios.append(math.dist(found[a], found[b]) / ref)
+        if ratios:
+            scale = float(np.median(ratios))
+    dx = float(np.mean([pos[0] - ANCHORS[name][1][0] * scale for name, pos in found.items()]))
+    dy = float(np.mean([pos[1] - ANCHORS[name][1][1] * scale for name, pos in found.items()]))
+    return scale, dx, dy
+
+
+@traced(cat="calibration")
+def calibrate(rect=None):
+    """
+    Full search. `rect` (left, top, width, height) limits it to one window.
+    Returns a Calibration, or None if the HUD isn't visible.
+    """
+    bbox = (rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3]) if rect else None
+    image, (ox, oy) = _capture(bbox)
+
+    hit = _find_scale(image)
+    if hit is None:
+        return None
+    scale, (gx, gy) = hit
+
+    # the other anchors are only searched near where the scale anchor says they are
+    found = {SCALE_ANCHOR: (gx + ox, gy + oy)}
+    ref_x, ref_y = ANCHORS[SCALE_ANCHOR][1]
+    for name, (path, (ax, ay)) in ANCHORS.items():
+        if name == SCALE_ANCHOR:
+            continue
+        template = load_template(path, scale)
+        if template is None:
+            continue
+        h, w = template.shape[:2]
+        x = round(gx + (ax - ref_x) * scale)
+        y = round(gy + (ay - ref_y) * scale)
+        left, top = max(0, x - SEARCH_MARGIN), max(0, y - SEARCH_MARGIN)
+        score, loc = _match(image[top:y + h + SEARCH_MARGIN, left:x + w + SEARCH_MARGIN], template)
+        if score >= MIN_SCORE:
+            found[name] = (loc[0] + left + ox, loc[1] + top + oy)
+
+    scale, dx, dy = _solve(found, scale)
+    debug(f"Calibration anchors: {found}")
+    return Calibration(scale, dx, dy, found)
+
+
+@traced(cat="calibration")
+def verify(calibration):
+    """Cheap check: is the scale anchor still exactly where the calibration puts it?"""
+    path, (rx, ry) = ANCHORS[SCALE_ANCHOR]
+    template = load_template(path, round(calibration.scale, 3))
+    if template is None:
+        return False
+    x = round(rx * calibration.scale + calibration.dx)
+    y = round(ry * calibration.scale + calibration.dy)
+    h, w = template.shape[:2]
+    bbox = (max(0, x - VERIFY_MARGIN), max(0, y - VERIFY_MARGIN), x + w + VERIFY_MARGIN, y + h + VERIFY_MARGIN)
+    image, _ = _capture(bbox)
+    score, _ = _match(image, template)
+    return score >= MIN_SCORE
+
+
+def to_layout(calibration, window_region=None):
+    return Layout.reference().transformed(calibration.scale, calibration.dx, calibration.dy).with_window(window_region)
+
+
+# -------------------------------------------------------------
+# Cache (per window title)
+# -------------------------------------------------------------
+def load_cache():
+    cached = writer.read_snapshot(CACHE_PATH)
+    if cached is not None:
+        return cached
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        warning(f"Failed to read calibration cache: {e}")
+        return {}
+
+
+def save_cache(title, calibration, rect):
+    cache = load_cache()
+    cache[title] = {
+        "scale": calibration.scale,
+        "dx": calibration.dx,
+        "dy": calibration.dy,
+        "rect": list(rect) if rect else None,
+        "anchors": {name: list(pos) for name, pos in calibration.anchors.items()},
+    }
+    writer.snapshot(CACHE_PATH, cache)
+
+
+def calibrated_layout(title, rect=None, window_region=None, use_cache=True):
+    """
+    Layout for the window called `title`, from the cache if it still checks
+    out, otherwise from a fresh calibration. None if the HUD couldn't be found
+    (e.g. the game is on an event or race screen).
+    """
+    entry = load_cache().get(title) if use_cache else None
+    if entry:
+        dx, dy = entry["dx"], entry["dy"]
+        if rect and entry.get("rect"):
+            # window moved since last time: same viewport, shifted
+            dx += rect[0] - entry["rect"][0]
+            dy += rect[1] - entry["rect"][1]
+        cached = Calibration(entry["scale"], dx, dy, entry.get("anchors", {}))
+        if verify(cached):
+            debug(f"Using cached calibration for \"{title}\".")
+            if (dx, dy) != (entry["dx"], entry["dy"]):
+                save_cache(title, cached, rect)
+            return to_layout(cached, window_region)
+        info(f"Cached calibration for \"{title}\" no longer matches, recalibrating.")
+
+    calibration = calibrate(rect)
+    if calibration is None:
+        warning("Could not find the career HUD to calibrate. Open the career lobby or training screen and restart.")
+        return None
+    info(f"📐 Calibrated \"{title}\": scale {calibration.scale:.3f}, offset ({calibration.dx:.0f}, {calibration.dy:.0f}), anchors {sorted(calibration.anchors)}.")
+    save_cache(title, calibration, rect)
+    return to_layout(calibration, window_region)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate the game viewport.")
+    parser.add_argument("title", nargs="?", default="Umamusume", help="window title used as the cache key")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    layout = calibrated_layout(args.title, use_cache=not args.no_cache)
+    if layout is None:
+        return
+    writer.flush()
+    print(json.dumps({
+        "scale": round(layout.scale, 4),
+        "offset": layout.offset,
+        "game_screen_region": layout.GAME_SCREEN_REGION,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,128 @@
+import atexit
 import json, os
+import threading
+import numpy as np
 from utils.log import info, warning
-from collections import defaultdict
-from statistics import mean
+from utils.trace import traced
+from core.persistence import writer
 
 MEMORY_PATH = os.path.join("data", "decision_memory.json")
 
+PHASES = ["early", "mid", "late", "unknown"]
+ENERGY_BUCKETS = [0, 20, 40, 60, 80, 100]
+DECISIONS = ["spd", "sta", "pwr", "guts", "wit", "rest"]
+
+PHASE_INDEX = {p: i for i, p in enumerate(PHASES)}
+BUCKET_INDEX = {b: i for i, b in enumerate(ENERGY_BUCKETS)}
+DECISION_INDEX = {d: i for i, d in enumerate(DECISIONS)}
+
+SNAPSHOT_EVERY = 10  # updates between snapshots
+BIAS_SCALE = 0.1     # scale down so it nudges decisions slightly
+
+def energy_bucket(energy):
+    return int(energy // 20) * 20  # e.g. 0, 20, 40, 60, 80
+
+# -----------------------------------------------------------------
+# Dense in-memory table
+# -----------------------------------------------------------------
+class DecisionMemory:
+    """
+    Average reward per (phase, energy bucket, decision), kept as dense NumPy
+    arrays. Contexts outside the table (odd phases/decisions found in old
+    files) are kept as-is in `extra` so nothing is lost on export.
+    """
+
+    def __init__(self):
+        shape = (len(PHASES), len(ENERGY_BUCKETS), len(DECISIONS))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.avg_rewards = np.zeros(shape, dtype=np.float64)
+        self.extra = {}
+        self.updates_since_snapshot = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def cell(phase, energy, decision):
+        p = PHASE_INDEX.get(phase)
+        b = BUCKET_INDEX.get(energy_bucket(energy))
+        d = DECISION_INDEX.get(decision)
+        if p is None or b is None or d is None:
+            return None
+        return p, b, d
+
+    def update(self, phase, energy, decision, reward):
+        with self.lock:
+            cell = self.cell(phase, energy, decision)
+            if cell is None:
+                key = f"{phase}_{energy_bucket(energy)}_{decision}"
+                mem = self.extra.setdefault(key, {"count": 0, "avg_reward": 0})
+                mem["count"] += 1
+                mem["avg_reward"] += (reward - mem["avg_reward"]) / mem["count"]
+            else:
+                self.counts[cell] += 1
+                self.avg_rewards[cell] += (reward - self.avg_rewards[cell]) / self.counts[cell]
+            self.updates_since_snapshot += 1
+
+    def bias(self, phase, energy, decision):
+        cell = self.cell(phase, energy, decision)
+        if cell is None:
+            mem = self.extra.get(f"{phase}_{energy_bucket(energy)}_{decision}")
+            return mem["avg_reward"] * BIAS_SCALE if mem else 0
+        if self.counts[cell]:
+            return float(self.avg_rewards[cell]) * BIAS_SCALE
+        return 0
+
+    def biases(self, phase, energy, decisions):
+        """bias() of several decisions in one context, as an array."""
+        p = PHASE_INDEX.get(phase)
+        b = BUCKET_INDEX.get(energy_bucket(energy))
+        d = [DECISION_INDEX.get(decision) for decision in decisions]
+        if p is None or b is None or None in d:
+            return np.array([self.bias(phase, energy, decision) for decision in decisions], dtype=np.float64)
+        return np.where(self.counts[p, b, d] > 0, self.avg_rewards[p, b, d] * BIAS_SCALE, 0.0)
+
+    def bias_table(self, decisions):
+        """bias() of `decisions` for every phase and energy bucket, shape (phases, buckets, decisions)."""
+        d = [DECISION_INDEX[decision] for decision in decisions]
+        return np.where(self.counts[..., d] > 0, self.avg_rewards[..., d] * BIAS_SCALE, 0.0)
+
+    # JSON format: {"mid_40_spd": {"count": 3, "avg_reward": 1.2}, ...}
+    @classmethod
+    def from_json(cls, data):
+        memory = cls()
+        for key, mem in data.items():
+            phase, _, rest = key.partition("_")
+            bucket, _, decision = rest.partition("_")
+            try:
+                cell = memory.cell(phase, float(bucket), decision)
+            except ValueError:
+                cell = None
+            if cell is None:
+                memory.extra[key] = dict(mem)
+            else:
+                memory.counts[cell] = mem["count"]
+                memory.avg_rewards[cell] = mem["avg_reward"]
+        return memory
+
+    def to_json(self):
+        with self.lock:
+            data = {}
+            for p, b, d in zip(*np.nonzero(self.counts)):
+                key = f"{PHASES[p]}_{ENERGY_BUCKETS[b]}_{DECISIONS[d]}"
+                data[key] = {"count": int(self.counts[p, b, d]), "avg_reward": round(float(self.avg_rewards[p, b, d]), 3)}
+            for key, mem in self.extra.items():
+                data[key] = {"count": mem["count"], "avg_reward": round(mem["avg_reward"], 3)}
+            self.updates_since_snapshot = 0
+            return data
+
+_memory = None
+
+def get_memory():
+    """The process-wide decision memory, imported from MEMORY_PATH on first use."""
+    global _memory
+    if _memory is None:
+        _memory = DecisionMemory.from_json(load_memory())
+    return _memory
+
 # -----------------------------------------------------------------
 # Load and Save
 # -----------------------------------------------------------------
@@ -19,38 +137,37 @@ def load_memory():
             warning(f"Failed to load decision memory: {e}")
     return {}
 
-def save_memory(memory):
+@traced(cat="io")
+def save_memory(memory=None):
+    """Snapshot the in-memory table, or replace it with `memory` (JSON format) first."""
+    global _memory
     try:
-        os.makedirs(os.path.dirname(MEMORY_PATH), exist_ok=True)
-        with open(MEMORY_PATH, "w", encoding="utf-8") as f:
-            json.dump(memory, f, indent=2)
+        if memory is not None:
+            _memory = DecisionMemory.from_json(memory)
+        writer.snapshot(MEMORY_PATH, get_memory().to_json())
         info("💾 Decision memory saved.")
     except Exception as e:
         warning(f"Failed to save decision memory: {e}")
 
+def flush_memory():
+    """Snapshot if anything changed since the last one (used on shutdown)."""
+    if _memory is not None and _memory.updates_since_snapshot:
+        save_memory()
+
+atexit.register(flush_memory)
+
 # -----------------------------------------------------------------
 # Update memory based on training results
 # -----------------------------------------------------------------
 def remember_decision(phase, energy, decision, reward):
     """
     Store the average reward per (phase, energy bucket, decision)
-    Example key: "mid_50_speed"
+    Example key: "mid_40_spd"
     """
-    memory = load_memory()
-
-    # Simplify energy into buckets
-    energy_bucket = int(energy // 20) * 20  # e.g. 0, 20, 40, 60, 80
-    key = f"{phase}_{energy_bucket}_{decision}"
-
-    if key not in memory:
-        memory[key] = {"count": 0, "avg_reward": 0}
-
-    mem = memory[key]
-    mem["count"] += 1
-    mem["avg_reward"] = round((mem["avg_reward"] * (mem["count"] - 1) + reward) / mem["count"], 3)
-    memory[key] = mem
-
-    save_memory(memory)
+    memory = get_memory()
+    memory.update(phase, energy, decision, reward)
+    if memory.updates_since_snapshot >= SNAPSHOT_EVERY:
+        save_memory()
 
 # -----------------------------------------------------------------
 # Retrieve memory-based bias
@@ -59,11 +176,8 @@ def get_memory_bias(phase, energy, decision):
     """
     Return a small bias value based on past rewards in similar contexts.
     """
-    memory = load_memory()
-    energy_bucket = int(energy // 20) * 20
-    key = f"{phase}_{energy_bucket}_{decision}"
-
-    if key in memory:
-        bias = memory[key]["avg_reward"]
-        return bias * 0.1  # scale down so it nudges decisions slightly
-    return 0
+    return get_memory().bias(phase, energy, decision)
+
+def get_memory_biases(phase, energy, decisions):
+    """get_memory_bias for several decisions at once (a NumPy array in the same order)."""
+    return get_memory().biases(phase, energy, decisions)
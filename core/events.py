@@ -1,4 +1,5 @@
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from collections import defaultdict
 import re
 
 import core.state as state
@@ -7,6 +8,58 @@ from core.ocr import extract_text
 from utils.log import debug, info, warning, error
 from utils.screenshot import enhanced_screenshot
 
+def normalize_event_name(event_name: str) -> str:
+  clean_text = re.sub(
+    r"\s*\((?!Year 2\))[^\)]*\)", "", event_name
+  ).strip()  # remove parentheses
+  clean_text = re.sub(r"[^\x00-\x7F]", "", clean_text)  # remove non-ASCII
+  return clean_text.lower()
+
+class EventIndex:
+  """
+  Event choices with names normalised once, split by character so a known
+  trainee's events are searched first.
+  """
+
+  def __init__(self, event_choices: list[dict]):
+    self.source = event_choices
+    self.events = list(event_choices or [])
+    self.names = {i: normalize_event_name(e["event_name"]) for i, e in enumerate(self.events)}
+    self.by_character = defaultdict(dict)
+    for i, e in enumerate(self.events):
+      for character in re.split(r",\s*(?![^()]*\))", e.get("character_name", "") or ""):
+        if character.strip():
+          self.by_character[character.strip().lower()][i] = self.names[i]
+
+  def lookup(self, text: str, character: str = None, threshold: float = 0.0) -> tuple[dict, float]:
+    """Returns (event, similarity 0-1) or (None, 0.0) when nothing reaches the threshold."""
+    if not text or not self.names:
+      return None, 0.0
+
+    query = text.lower()
+    subsets = []
+    if character and character.lower() in self.by_character:
+      subsets.append(self.by_character[character.lower()])
+    subsets.append(self.names)
+
+    for choices in subsets:
+      best = process.extractOne(query, choices, scorer=fuzz.token_sort_ratio, score_cutoff=threshold * 100)
+      if best:
+        _, score, i = best
+        return self.events[i], score / 100
+    return None, 0.0
+
+def build_event_index(event_choices: list[dict]) -> EventIndex:
+  index = EventIndex(event_choices)
+  debug(f"Event index built: {len(index.events)} events, {len(index.by_character)} characters.")
+  return index
+
+def get_event_index() -> EventIndex:
+  index = getattr(state, "EVENT_INDEX", None)
+  if index is None or index.source is not state.EVENT_CHOICES:
+    index = state.EVENT_INDEX = build_event_index(state.EVENT_CHOICES)
+  return index
+
 def event_choice(event_name):
   threshold = 0.8
   choice = 0
@@ -14,24 +67,17 @@ def event_choice(event_name):
   if not event_name:
     return choice
 
-  best_event_name, similarity = find_best_match(event_name, state.EVENT_CHOICES)
-  debug(f"Best event name match: {best_event_name}, similarity: {similarity}")
+  event, similarity = get_event_index().lookup(event_name, state.CURRENT_CHARACTER, threshold)
 
-  if similarity >= threshold:
-    events = next(
-      (e for e in state.EVENT_CHOICES if e["event_name"] == best_event_name),
-      None,  # fallback
-    )
+  if event:
     debug(
-      f"Event found: {event_name} has {similarity * 100:.2f}% similarity with {events['event_name']}"
+      f"Event found: {event_name} has {similarity * 100:.2f}% similarity with {event['event_name']}"
     )
-    debug(f"event name: {events['event_name']}, chosen: {events['chosen']}")
-    choice = events["chosen"]
+    debug(f"event name: {event['event_name']}, chosen: {event['chosen']}")
+    choice = event["chosen"]
     return choice
   else:
-    debug(
-      f"No event found, {event_name} has {similarity * 100:.2f}% similarity with {best_event_name}"
-    )
+    debug(f"No event found for {event_name} above {threshold * 100:.0f}% similarity.")
     return choice
 
 def get_event_name():
@@ -41,22 +87,7 @@ def get_event_name():
   return text
 
 def find_best_match(text: str, event_list: list[dict]) -> tuple[str, float]:
-  """Find the best matching skill and similarity score"""
-  if not text or not event_list:
-    return "", 0.0
-
-  best_match = ""
-  best_similarity = 0.0
-
-  for event in event_list:
-    event_name = event["event_name"]
-    clean_text = re.sub(
-      r"\s*\((?!Year 2\))[^\)]*\)", "", event_name
-    ).strip()  # remove parentheses
-    clean_text = re.sub(r"[^\x00-\x7F]", "", clean_text)  # remove non-ASCII
-    similarity = fuzz.token_sort_ratio(clean_text.lower(), text.lower()) / 100
-    if similarity > best_similarity:
-      best_similarity = similarity
-      best_match = event_name
-
-  return best_match, best_similarity
\ No newline at end of file
+  """Find the best matching event name and similarity score"""
+  index = get_event_index() if event_list is state.EVENT_CHOICES else EventIndex(event_list)
+  event, similarity = index.lookup(text)
+  return (event["event_name"], similarity) if event else ("", 0.0)
@@ -1,32 +1,32 @@
 import pyautogui
-from utils.tools import sleep, get_secs, drag_scroll
-from PIL import ImageGrab
+from utils.tools import sleep, get_secs, drag_scroll, input_lock
+import time
+from core.frame_bus import bus
 
 pyautogui.useImageNotFoundException(False)
 
+import os
 import re
 import core.state as state
 from core.state import check_support_card, check_failure, check_turn, check_mood, check_current_year, check_criteria, check_skill_pts, check_energy_level, get_race_type, check_status_effects, check_aptitudes
-from core.logic import do_something, decide_race_for_goal
+from core.logic import do_something, decide_race_for_goal, is_fan_goal
 
 from utils.log import info, warning, error, debug
 import utils.constants as constants
+from utils.layout import in_window
 
-from core.recognizer import is_btn_active, multi_match_templates
+from core.recognizer import is_btn_active, multi_match_templates, needle
+from core.scanner import SCAN_TEMPLATES, detections
 from utils.scenario import ura
 from core.skill import buy_skill
 from core.events import event_choice, get_event_name
+from core.race_list import find_race
+from core.race_planner import build_race_plan
+from utils.trace import span, traced
+from core.live_feed import feed
+from utils import metrics
 
-templates = {
-  "event": "assets/icons/event_choice_1.png",
-  "inspiration": "assets/buttons/inspiration_btn.png",
-  "next": "assets/buttons/next_btn.png",
-  "next2": "assets/buttons/next2_btn.png",
-  "cancel": "assets/buttons/cancel_btn.png",
-  "tazuna": "assets/ui/tazuna_hint.png",
-  "infirmary": "assets/buttons/infirmary_btn.png",
-  "retry": "assets/buttons/retry_btn.png"
-}
+RACE_SCROLL_DISTANCE = -270
 
 training_types = {
   "spd": "assets/icons/train_spd.png",
@@ -36,6 +36,7 @@ training_types = {
   "wit": "assets/icons/train_wit.png"
 }
 
+@traced(cat="input")
 def click(img: str = None, confidence: float = 0.8, minSearch:float = 2, click: int = 1, text: str = "", boxes = None, region=None):
   if state.stop_event.is_set():
     return False
@@ -54,29 +55,43 @@ def click(img: str = None, confidence: float = 0.8, minSearch:float = 2, click:
       debug(text)
     x, y, w, h = box
     center = (x + w // 2, y + h // 2)
-    pyautogui.moveTo(center[0], center[1], duration=0.225)
-    pyautogui.click(clicks=click, interval=0.15)
+    with input_lock():
+      pyautogui.moveTo(center[0], center[1], duration=0.225)
+      pyautogui.click(clicks=click, interval=0.15)
+    metrics.CLICKS.inc(click)
     return True
 
   if img is None:
     return False
 
+  # other instances' windows are out of bounds
+  region = region or constants.WINDOW_REGION
   if region:
-    btn = pyautogui.locateCenterOnScreen(img, confidence=confidence, minSearchTime=minSearch, region=region)
+    btn = pyautogui.locateCenterOnScreen(needle(img), confidence=confidence, minSearchTime=minSearch, region=region)
   else:
-    btn = pyautogui.locateCenterOnScreen(img, confidence=confidence, minSearchTime=minSearch)
+    btn = pyautogui.locateCenterOnScreen(needle(img), confidence=confidence, minSearchTime=minSearch)
   if btn:
     if text:
       debug(text)
-    pyautogui.moveTo(btn, duration=0.225)
-    pyautogui.click(clicks=click, interval=0.15)
+    with input_lock():
+      pyautogui.moveTo(btn, duration=0.225)
+      pyautogui.click(clicks=click, interval=0.15)
+    metrics.CLICKS.inc(click)
     return True
 
   return False
 
+def tap_screen(clicks=1, interval=0.0):
+  """Click to skip/advance a screen. In multi-instance mode the cursor is moved into our own window first."""
+  with input_lock():
+    if constants.WINDOW_REGION:
+      pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
+    pyautogui.click(clicks=clicks, interval=interval)
+
 def go_to_training():
   return click("assets/buttons/training_btn.png")
 
+@traced(cat="lobby")
 def check_training():
   if state.stop_event.is_set():
     return {}
@@ -86,53 +101,58 @@ def check_training():
   # failcheck enum "train","no_train","check_all"
   failcheck="check_all"
   margin=5
-  for key, icon_path in training_types.items():
-    if state.stop_event.is_set():
-      return {}
-
-    pos = pyautogui.locateCenterOnScreen(icon_path, confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
-    if pos:
-      pyautogui.moveTo(pos, duration=0.1)
-      pyautogui.mouseDown()
-      support_card_results = check_support_card()
-
-      if key != "wit":
-        if failcheck == "check_all":
-          failure_chance = check_failure()
-          if failure_chance > (state.MAX_FAILURE + margin):
-            info("Failure rate too high skip to check wit")
-            failcheck="no_train"
+  # the mouse stays pressed on the training buttons while reading them
+  with input_lock():
+    for key, icon_path in training_types.items():
+      if state.stop_event.is_set():
+        pyautogui.mouseUp()
+        return {}
+
+      pos = pyautogui.locateCenterOnScreen(needle(icon_path), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+      if pos:
+        pyautogui.moveTo(pos, duration=0.1)
+        pyautogui.mouseDown()
+        support_card_results = check_support_card()
+
+        if key != "wit":
+          if failcheck == "check_all":
+            failure_chance = check_failure()
+            if failure_chance > (state.MAX_FAILURE + margin):
+              info("Failure rate too high skip to check wit")
+              failcheck="no_train"
+              failure_chance = state.MAX_FAILURE + margin
+            elif failure_chance < (state.MAX_FAILURE - margin):
+              info("Failure rate is low enough, skipping the rest of failure checks.")
+              failcheck="train"
+              failure_chance = 0
+          elif failcheck == "no_train":
             failure_chance = state.MAX_FAILURE + margin
-          elif failure_chance < (state.MAX_FAILURE - margin):
-            info("Failure rate is low enough, skipping the rest of failure checks.")
-            failcheck="train"
+          elif failcheck == "train":
             failure_chance = 0
-        elif failcheck == "no_train":
-          failure_chance = state.MAX_FAILURE + margin
-        elif failcheck == "train":
-          failure_chance = 0
-      else:
-        if failcheck == "train":
-          failure_chance = 0
         else:
-          failure_chance = check_failure()
+          if failcheck == "train":
+            failure_chance = 0
+          else:
+            failure_chance = check_failure()
 
-      support_card_results["failure"] = failure_chance
-      results[key] = support_card_results
+        support_card_results["failure"] = failure_chance
+        results[key] = support_card_results
 
-      debug(f"[{key.upper()}] → Total Supports {support_card_results['total_supports']}, Levels:{support_card_results['total_friendship_levels']} , Fail: {failure_chance}%")
-      sleep(0.1)
+        debug("[%s] → Total Supports %s, Levels:%s , Fail: %s%%", key.upper(), support_card_results["total_supports"], support_card_results["total_friendship_levels"], failure_chance)
+        sleep(0.1)
 
-  pyautogui.mouseUp()
+    pyautogui.mouseUp()
   click(img="assets/buttons/back_btn.png")
   return results
 
+@traced(cat="input")
 def do_train(train):
   if state.stop_event.is_set():
     return
-  train_btn = pyautogui.locateOnScreen(f"assets/icons/train_{train}.png", confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+  train_btn = pyautogui.locateOnScreen(needle(f"assets/icons/train_{train}.png"), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
   if train_btn:
     click(boxes=train_btn, click=3)
+    metrics.TRAININGS.inc(type=train)
 
 def do_rest(energy_level):
   if state.stop_event.is_set():
@@ -140,31 +160,35 @@ def do_rest(energy_level):
   if state.NEVER_REST_ENERGY > 0 and energy_level > state.NEVER_REST_ENERGY:
     info(f"Wanted to rest when energy was above {state.NEVER_REST_ENERGY}, retrying from beginning.")
     return
-  rest_btn = pyautogui.locateOnScreen("assets/buttons/rest_btn.png", confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
-  rest_summber_btn = pyautogui.locateOnScreen("assets/buttons/rest_summer_btn.png", confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+  rest_btn = pyautogui.locateOnScreen(needle("assets/buttons/rest_btn.png"), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+  rest_summber_btn = pyautogui.locateOnScreen(needle("assets/buttons/rest_summer_btn.png"), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
 
   if rest_btn:
     click(boxes=rest_btn)
   elif rest_summber_btn:
     click(boxes=rest_summber_btn)
+  else:
+    return
+  metrics.RESTS.inc()
 
 def do_recreation():
   if state.stop_event.is_set():
     return
-  recreation_btn = pyautogui.locateOnScreen("assets/buttons/recreation_btn.png", confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
-  recreation_summer_btn = pyautogui.locateOnScreen("assets/buttons/rest_summer_btn.png", confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+  recreation_btn = pyautogui.locateOnScreen(needle("assets/buttons/recreation_btn.png"), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
+  recreation_summer_btn = pyautogui.locateOnScreen(needle("assets/buttons/rest_summer_btn.png"), confidence=0.8, region=constants.SCREEN_BOTTOM_REGION)
 
   if recreation_btn:
     click(boxes=recreation_btn)
   elif recreation_summer_btn:
     click(boxes=recreation_summer_btn)
 
-def do_race(prioritize_g1 = False, img = None):
+@traced(cat="lobby")
+def do_race(prioritize_g1 = False, img = None, year = None):
   if state.stop_event.is_set():
     return False
   click(img="assets/buttons/races_btn.png", minSearch=get_secs(10))
 
-  consecutive_cancel_btn = pyautogui.locateCenterOnScreen("assets/buttons/cancel_btn.png", minSearchTime=get_secs(0.7), confidence=0.8)
+  consecutive_cancel_btn = pyautogui.locateCenterOnScreen(needle("assets/buttons/cancel_btn.png"), minSearchTime=get_secs(0.7), confidence=0.8, region=constants.WINDOW_REGION)
   if state.CANCEL_CONSECUTIVE_RACE and consecutive_cancel_btn:
     click(img="assets/buttons/cancel_btn.png", text="[INFO] Already raced 3+ times consecutively. Cancelling race and doing training.")
     return False
@@ -172,7 +196,7 @@ def do_race(prioritize_g1 = False, img = None):
     click(img="assets/buttons/ok_btn.png", minSearch=get_secs(0.7))
 
   sleep(0.7)
-  found = race_select(prioritize_g1=prioritize_g1, img=img)
+  found = race_select(prioritize_g1=prioritize_g1, img=img, year=year)
   if not found:
     if img is not None:
       info(f"{img} not found.")
@@ -185,9 +209,10 @@ def do_race(prioritize_g1 = False, img = None):
   after_race()
   return True
 
+@traced(cat="lobby")
 def select_event():
-  event_choices_icon = pyautogui.locateOnScreen("assets/icons/event_choice_1.png", confidence=0.9, minSearchTime=0.2, region=constants.GAME_SCREEN_REGION)
-  choice_vertical_gap = 112
+  event_choices_icon = pyautogui.locateOnScreen(needle("assets/icons/event_choice_1.png"), confidence=0.9, minSearchTime=0.2, region=constants.GAME_SCREEN_REGION)
+  choice_vertical_gap = constants.scaled(112)
 
   if not event_choices_icon:
     return False
@@ -210,6 +235,7 @@ def select_event():
   click(boxes=(x, y, 1, 1), text=f"Selecting optimal choice: {event_name}")
   return True
 
+@traced(cat="lobby")
 def race_day():
   if state.stop_event.is_set():
     return
@@ -232,35 +258,39 @@ def race_day():
   sleep(1)
   after_race()
 
-def race_select(prioritize_g1 = False, img = None):
+def race_select(prioritize_g1 = False, img = None, year = None):
   if state.stop_event.is_set():
     return False
-  pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
+  with input_lock():
+    pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
 
   sleep(0.3)
 
   if prioritize_g1:
     info(f"Looking for {img}.")
+    # read each visible row once per scroll position and look the name up in the race index
+    row = find_race(img, year=year, scroll=lambda: drag_scroll(constants.RACE_SCROLL_BOTTOM_MOUSE_POS, constants.scaled(RACE_SCROLL_DISTANCE)), max_scrolls=2)
+    if row:
+      click(boxes=(row.center[0], row.center[1], 1, 1), text=f"{img} found.")
+    else:
+      # OCR couldn't read it, fall back to the banner template if we have one
+      banner = f"assets/races/{img}.png"
+      if not os.path.exists(banner) or not click(img=banner, minSearch=get_secs(0.7), text=f"{img} found.", region=constants.RACE_LIST_BOX_REGION):
+        return False
+
     for i in range(2):
       if state.stop_event.is_set():
         return False
-      if click(img=f"assets/races/{img}.png", minSearch=get_secs(0.7), text=f"{img} found.", region=constants.RACE_LIST_BOX_REGION):
-        for i in range(2):
-          if state.stop_event.is_set():
-            return False
-          if not click(img="assets/buttons/race_btn.png", minSearch=get_secs(2)):
-            click(img="assets/buttons/bluestacks/race_btn.png", minSearch=get_secs(2))
-          sleep(0.5)
-        return True
-      drag_scroll(constants.RACE_SCROLL_BOTTOM_MOUSE_POS, -270)
-
-    return False
+      if not click(img="assets/buttons/race_btn.png", minSearch=get_secs(2)):
+        click(img="assets/buttons/bluestacks/race_btn.png", minSearch=get_secs(2))
+      sleep(0.5)
+    return True
   else:
     info("Looking for race.")
     for i in range(4):
       if state.stop_event.is_set():
         return False
-      match_aptitude = pyautogui.locateOnScreen("assets/ui/match_track.png", confidence=0.8, minSearchTime=get_secs(0.7))
+      match_aptitude = pyautogui.locateOnScreen(needle("assets/ui/match_track.png"), confidence=0.8, minSearchTime=get_secs(0.7), region=constants.WINDOW_REGION)
 
       if match_aptitude:
         # locked avg brightness = 163
@@ -278,7 +308,7 @@ def race_select(prioritize_g1 = False, img = None):
             click(img="assets/buttons/bluestacks/race_btn.png", minSearch=get_secs(2))
           sleep(0.5)
         return True
-      drag_scroll(constants.RACE_SCROLL_BOTTOM_MOUSE_POS, -270)
+      drag_scroll(constants.RACE_SCROLL_BOTTOM_MOUSE_POS, constants.scaled(RACE_SCROLL_DISTANCE))
 
     return False
 
@@ -287,6 +317,7 @@ def race_prep():
 
   if state.stop_event.is_set():
     return
+  metrics.RACES.inc()
 
   if state.POSITION_SELECTION_ENABLED:
     # these two are mutually exclusive, so we only use preferred position if positions by race is not enabled.
@@ -311,19 +342,20 @@ def race_prep():
       click(img="assets/buttons/confirm_btn.png", minSearch=get_secs(2), region=constants.SCREEN_MIDDLE_REGION)
       PREFERRED_POSITION_SET = True
 
-  view_result_btn = pyautogui.locateCenterOnScreen("assets/buttons/view_results.png", confidence=0.8, minSearchTime=get_secs(10), region=constants.SCREEN_BOTTOM_REGION)
+  view_result_btn = pyautogui.locateCenterOnScreen(needle("assets/buttons/view_results.png"), confidence=0.8, minSearchTime=get_secs(10), region=constants.SCREEN_BOTTOM_REGION)
   click("assets/buttons/view_results.png", click=3)
   sleep(0.5)
-  pyautogui.click()
+  tap_screen()
   sleep(0.1)
-  pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
+  with input_lock():
+    pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
   for i in range(2):
     if state.stop_event.is_set():
       return
-    pyautogui.tripleClick(interval=0.2)
+    tap_screen(clicks=3, interval=0.2)
     sleep(0.5)
-  pyautogui.click()
-  next_button = pyautogui.locateCenterOnScreen("assets/buttons/next_btn.png", confidence=0.9, minSearchTime=get_secs(4), region=constants.SCREEN_BOTTOM_REGION)
+  tap_screen()
+  next_button = pyautogui.locateCenterOnScreen(needle("assets/buttons/next_btn.png"), confidence=0.9, minSearchTime=get_secs(4), region=constants.SCREEN_BOTTOM_REGION)
   if not next_button:
     info(f"Wouldn't be able to move onto the after race since there's no next button.")
     if click("assets/buttons/race_btn.png", confidence=0.8, minSearch=get_secs(10), region=constants.SCREEN_BOTTOM_REGION):
@@ -333,12 +365,12 @@ def race_prep():
         info("Couldn't find \"Race!\" button, looking for alternative version.")
         click("assets/buttons/race_exclamation_btn_portrait.png", confidence=0.8, minSearch=get_secs(10))
       sleep(0.5)
-      skip_btn = pyautogui.locateOnScreen("assets/buttons/skip_btn.png", confidence=0.8, minSearchTime=get_secs(2), region=constants.SCREEN_BOTTOM_REGION)
-      skip_btn_big = pyautogui.locateOnScreen("assets/buttons/skip_btn_big.png", confidence=0.8, minSearchTime=get_secs(2), region=constants.SKIP_BTN_BIG_REGION_LANDSCAPE)
+      skip_btn = pyautogui.locateOnScreen(needle("assets/buttons/skip_btn.png"), confidence=0.8, minSearchTime=get_secs(2), region=constants.SCREEN_BOTTOM_REGION)
+      skip_btn_big = pyautogui.locateOnScreen(needle("assets/buttons/skip_btn_big.png"), confidence=0.8, minSearchTime=get_secs(2), region=constants.SKIP_BTN_BIG_REGION_LANDSCAPE)
       if not skip_btn_big and not skip_btn:
         warning("Coulnd't find skip buttons at first search.")
-        skip_btn = pyautogui.locateOnScreen("assets/buttons/skip_btn.png", confidence=0.8, minSearchTime=get_secs(10), region=constants.SCREEN_BOTTOM_REGION)
-        skip_btn_big = pyautogui.locateOnScreen("assets/buttons/skip_btn_big.png", confidence=0.8, minSearchTime=get_secs(10), region=constants.SKIP_BTN_BIG_REGION_LANDSCAPE)
+        skip_btn = pyautogui.locateOnScreen(needle("assets/buttons/skip_btn.png"), confidence=0.8, minSearchTime=get_secs(10), region=constants.SCREEN_BOTTOM_REGION)
+        skip_btn_big = pyautogui.locateOnScreen(needle("assets/buttons/skip_btn_big.png"), confidence=0.8, minSearchTime=get_secs(10), region=constants.SKIP_BTN_BIG_REGION_LANDSCAPE)
       if skip_btn:
         click(boxes=skip_btn, click=3)
       if skip_btn_big:
@@ -354,10 +386,10 @@ def race_prep():
       if skip_btn_big:
         click(boxes=skip_btn_big, click=3)
       sleep(3)
-      skip_btn = pyautogui.locateOnScreen("assets/buttons/skip_btn.png", confidence=0.8, minSearchTime=get_secs(5), region=constants.SCREEN_BOTTOM_REGION)
+      skip_btn = pyautogui.locateOnScreen(needle("assets/buttons/skip_btn.png"), confidence=0.8, minSearchTime=get_secs(5), region=constants.SCREEN_BOTTOM_REGION)
       click(boxes=skip_btn, click=3)
       #since we didn't get the trophy before, if we get it we close the trophy
-      close_btn = pyautogui.locateOnScreen("assets/buttons/close_btn.png", confidence=0.8, minSearchTime=get_secs(5))
+      close_btn = pyautogui.locateOnScreen(needle("assets/buttons/close_btn.png"), confidence=0.8, minSearchTime=get_secs(5), region=constants.WINDOW_REGION)
       click(boxes=close_btn, click=3)
       info("Finished race skipping job.")
 
@@ -366,9 +398,10 @@ def after_race():
     return
   click(img="assets/buttons/next_btn.png", minSearch=get_secs(5))
   sleep(0.3)
-  pyautogui.click()
+  tap_screen()
   click(img="assets/buttons/next2_btn.png", minSearch=get_secs(5))
 
+@traced(cat="lobby")
 def auto_buy_skill():
   if state.stop_event.is_set():
     return
@@ -380,7 +413,7 @@ def auto_buy_skill():
   sleep(0.5)
 
   if buy_skill():
-    pyautogui.locateCenterOnScreen("assets/buttons/confirm_btn.png")
+    pyautogui.locateCenterOnScreen(needle("assets/buttons/confirm_btn.png"))
     click(img="assets/buttons/confirm_btn.png", minSearch=get_secs(1), region=constants.SCREEN_BOTTOM_REGION)
     sleep(0.5)
     click(img="assets/buttons/learn_btn.png", minSearch=get_secs(1), region=constants.SCREEN_BOTTOM_REGION)
@@ -397,9 +430,19 @@ def career_lobby():
   # Program start
   global PREFERRED_POSITION_SET
   PREFERRED_POSITION_SET = False
+  build_race_plan()
+  metrics.reset_turn_timer()
   while state.is_bot_running and not state.stop_event.is_set():
-    screen = ImageGrab.grab()
-    matches = multi_match_templates(templates, screen=screen)
+    # shared with the scanner; waits for a frame taken after the previous iteration's clicks
+    with span("lobby.capture", cat="capture"):
+      frame = bus.get_frame(newer_than=time.time())
+      screen = frame.image
+    with span("lobby.match", cat="lobby"):
+      # the scanner's result when it already matched this frame
+      scan = detections(frame)
+      boxes = scan.data["boxes"] if scan else multi_match_templates(SCAN_TEMPLATES, screen=screen)
+      matches = {name: in_window(found) for name, found in boxes.items()}
+    bus.publish_event("lobby_matches", frame, {"boxes": {k: v for k, v in matches.items() if v}})
 
     if select_event():
       continue
@@ -415,11 +458,13 @@ def career_lobby():
       continue
 
     if not matches["tazuna"]:
-      #info("Should be in career lobby.")
-      print(".", end="")
+      debug("Not in the career lobby yet.")
       continue
 
     energy_level, max_energy = check_energy_level()
+    feed.publish("energy", {"energy": energy_level, "max_energy": max_energy})
+    metrics.ENERGY.set(energy_level)
+    metrics.MAX_ENERGY.set(max_energy)
 
     skipped_infirmary=False
     if matches["infirmary"] and is_btn_active(matches["infirmary"][0]):
@@ -431,13 +476,14 @@ def career_lobby():
         info("Skipping infirmary because of high energy.")
         skipped_infirmary=True
 
-    mood = check_mood()
+    with span("lobby.read_hud", cat="lobby"):
+      mood = check_mood()
+      turn = check_turn()
+      year = check_current_year()
+      criteria = check_criteria()
     mood_index = constants.MOOD_LIST.index(mood)
     minimum_mood = constants.MOOD_LIST.index(state.MINIMUM_MOOD)
     minimum_mood_junior_year = constants.MOOD_LIST.index(state.MINIMUM_MOOD_JUNIOR_YEAR)
-    turn = check_turn()
-    year = check_current_year()
-    criteria = check_criteria()
     year_parts = year.split(" ")
 
     print("\n=======================================================================================\n")
@@ -461,6 +507,7 @@ def career_lobby():
       race_prep()
       sleep(1)
       after_race()
+      metrics.turn_done()
       continue
 
     # If calendar is race day, do race
@@ -469,6 +516,7 @@ def career_lobby():
       if state.IS_AUTO_BUY_SKILL and year_parts[0] != "Junior":
         auto_buy_skill()
       race_day()
+      metrics.turn_done()
       continue
 
     # Mood check
@@ -497,18 +545,18 @@ def career_lobby():
     # If Prioritize G1 Race is true, check G1 race every turn
     if state.PRIORITIZE_G1_RACE and "Pre-Debut" not in year and len(year_parts) > 3 and year_parts[3] not in ["Jul", "Aug"]:
       race_done = False
-      for race_list in state.RACE_SCHEDULE:
+      for race_name in state.RACE_PLAN.scheduled_races(year):
         if state.stop_event.is_set():
           break
-        if len(race_list):
-          if race_list['year'] in year and race_list['date'] in year:
-            debug(f"Race now, {race_list['name']}, {race_list['year']} {race_list['date']}")
-            if do_race(state.PRIORITIZE_G1_RACE, img=race_list['name']):
-              race_done = True
-              break
-            else:
-              click(img="assets/buttons/back_btn.png", minSearch=get_secs(1), text=f"{race_list['name']} race not found. Proceeding to training.")
-              sleep(0.5)
+        debug(f"Race now, {race_name}, {year}")
+        if do_race(state.PRIORITIZE_G1_RACE, img=race_name, year=year):
+          feed.publish("decision", {"year": year, "turn": turn, "decision": "race", "race": race_name})
+          metrics.turn_done()
+          race_done = True
+          break
+        else:
+          click(img="assets/buttons/back_btn.png", minSearch=get_secs(1), text=f"{race_name} race not found. Proceeding to training.")
+          sleep(0.5)
       if race_done:
         continue
 
@@ -520,6 +568,7 @@ def career_lobby():
           sleep(0.5)
           check_aptitudes()
           click(img="assets/buttons/close_btn.png", minSearch=get_secs(1))
+          build_race_plan()
       keywords = ("fan", "Maiden", "Progress")
 
       prioritize_g1, race_name = decide_race_for_goal(year, turn, criteria, keywords)
@@ -528,8 +577,15 @@ def career_lobby():
         if race_name == "any":
           race_found = do_race(prioritize_g1, img=None)
         else:
-          race_found = do_race(prioritize_g1, img=race_name)
+          race_found = do_race(prioritize_g1, img=race_name, year=year)
+          if not race_found and is_fan_goal(criteria):
+            # the planned race couldn't be found in the list, but any race earns fans
+            click(img="assets/buttons/back_btn.png", minSearch=get_secs(1), text=f"{race_name} not found, looking for any race.")
+            sleep(0.5)
+            race_found = do_race(False, img=None)
         if race_found:
+          feed.publish("decision", {"year": year, "turn": turn, "decision": "race", "race": race_name})
+          metrics.turn_done()
           continue
         else:
           # If there is no race matching to aptitude, go back and do training instead
@@ -545,7 +601,10 @@ def career_lobby():
     sleep(0.5)
     results_training = check_training()
 
-    best_training = do_something(results_training)
+    with span("lobby.decide", cat="lobby"):
+      best_training = do_something(results_training)
+    feed.publish("decision", {"year": year, "turn": turn, "decision": best_training or "rest"})
+    metrics.turn_done()
     if best_training:
       go_to_training()
       sleep(0.5)
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import namedtuple
+
+from utils.log import info, warning
+from utils.screenshot import grab
+from utils.trace import span
+
+Frame = namedtuple("Frame", ["seq", "timestamp", "image"])
+Event = namedtuple("Event", ["name", "seq", "timestamp", "data"])
+
+CAPTURE_INTERVAL = 1.0  # seconds between idle captures
+
+
+class FrameBus:
+    """
+    Single full-screen capture stream shared by everything in the process.
+
+    One producer thread captures every `interval` seconds, or right away when a
+    consumer asks for a frame newer than the latest one. Consumers only ever see
+    the latest frame; nothing is queued, so slow subscribers drop frames instead
+    of falling behind. Subscribers can also publish small events (e.g. scanner
+    detections) tagged with the frame they were computed from.
+    """
+
+    def __init__(self, interval=CAPTURE_INTERVAL):
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._latest = None
+        self._seq = 0
+        self._events = {}
+        self._thread = None
+
+    # ---------------------------------------------------------
+    # Producer
+    # ---------------------------------------------------------
+    def start(self):
+        if self.is_running():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-bus", daemon=True)
+        self._thread.start()
+        info("🎞️ Frame bus started.")
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.capture()
+            except Exception as e:
+                warning(f"Frame capture failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def capture(self):
+        # stamp before grabbing so a frame never looks newer than what it shows
+        timestamp = time.time()
+        with span("frame_bus.capture", cat="capture"):
+            image = grab()
+        return self.publish(image, timestamp)
+
+    def publish(self, image, timestamp=None):
+        with self._cond:
+            self._seq += 1
+            self._latest = Frame(self._seq, timestamp or time.time(), image)
+            self._cond.notify_all()
+            return self._latest
+
+    # ---------------------------------------------------------
+    # Consumers
+    # ---------------------------------------------------------
+    def latest(self):
+        return self._latest
+
+    def get_frame(self, newer_than=None, timeout=2.0):
+        """
+        Latest frame captured at or after `newer_than` (a time.time() value).
+        Without a running producer this captures inline, so callers never need
+        to know whether the bus is up.
+        """
+        if not self.is_running():
+            return self.capture()
+
+        frame = self._latest
+        if frame and (newer_than is None or frame.timestamp >= newer_than):
+            return frame
+
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._stop.is_set():
+                frame = self._latest
+                if frame and (newer_than is None or frame.timestamp >= newer_than):
+                    return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        warning("Frame bus timed out waiting for a fresh frame, capturing inline.")
+        return self.capture()
+
+    def wait_next(self, after_seq, timeout=None):
+        """Block until a frame with seq > after_seq is published. Returns None on stop/timeout."""
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._stop.is_set() or (self._latest and self._latest.seq > after_seq),
+                timeout,
+            ):
+                return None
+            if self._stop.is_set():
+                return None
+            return self._latest
+
+    # ---------------------------------------------------------
+    # Events
+    # ---------------------------------------------------------
+    def publish_event(self, name, frame, data):
+        event = Event(name, frame.seq if frame else 0, frame.timestamp if frame else time.time(), data)
+        with self._cond:
+            self._events[name] = event
+        return event
+
+    def latest_event(self, name, max_age=None):
+        """Most recent event called `name`, or None if missing or older than `max_age` seconds."""
+        event = self._events.get(name)
+        if event is None:
+            return None
+        if max_age is not None and time.time() - event.timestamp > max_age:
+            return None
+        return event
+
+
+bus = FrameBus()
@@ -0,0 +1,185 @@
+"""
+Optional SQLite store for training history.
+
+Enable it with "storage": {"backend": "sqlite"} in config.json. Existing logs
+are imported with:
+    python -m core.history_db migrate
+and queried with e.g.:
+    python -m core.history_db query --decision sta --phase late --energy 40 60
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from utils.log import info, warning
+
+DB_PATH = os.path.join("data", "training_history.db")
+STATS = ["spd", "sta", "pwr", "guts", "wit"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id          INTEGER PRIMARY KEY,
+    timestamp   TEXT NOT NULL,
+    session_id  TEXT NOT NULL DEFAULT 'default',
+    character   TEXT NOT NULL DEFAULT 'Unknown',
+    year        TEXT,
+    phase       TEXT,
+    energy      REAL,
+    spd         INTEGER,
+    sta         INTEGER,
+    pwr         INTEGER,
+    guts        INTEGER,
+    wit         INTEGER,
+    decision    TEXT,
+    reward      REAL,
+    metadata    TEXT,
+    UNIQUE (timestamp, session_id, decision)
+);
+CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_id);
+CREATE INDEX IF NOT EXISTS idx_turns_character_decision ON turns (character, decision);
+CREATE INDEX IF NOT EXISTS idx_turns_phase_decision_energy ON turns (phase, decision, energy);
+CREATE INDEX IF NOT EXISTS idx_turns_timestamp ON turns (timestamp);
+"""
+
+COLUMNS = ["timestamp", "session_id", "character", "year", "phase", "energy", *STATS, "decision", "reward", "metadata"]
+INSERT = f"INSERT OR IGNORE INTO turns ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def to_row(record):
+    stats = record.get("current_stats") or {}
+    metadata = record.get("metadata") or {}
+    return (
+        record.get("timestamp"),
+        metadata.get("session_id", "default"),
+        record.get("character", "Unknown"),
+        record.get("year"),
+        record.get("phase"),
+        record.get("energy"),
+        *(stats.get(s) for s in STATS),
+        record.get("decision"),
+        record.get("reward"),
+        json.dumps(metadata),
+    )
+
+
+class HistoryDB:
+    """One connection per thread; WAL lets the writer and readers run concurrently."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def insert_many(self, records):
+        conn = self.connection()
+        with conn:
+            cursor = conn.executemany(INSERT, [to_row(r) for r in records if r.get("timestamp")])
+        return cursor.rowcount
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+    def average_reward(self, decision=None, phase=None, energy=None, character=None, session_id=None):
+        """Average reward and sample count. `energy` is an inclusive (low, high) range."""
+        where, params = [], []
+        for column, value in (("decision", decision), ("phase", phase), ("character", character), ("session_id", session_id)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if energy is not None:
+            where.append("energy BETWEEN ? AND ?")
+            params.extend(energy)
+        sql = "SELECT AVG(reward), COUNT(*) FROM turns"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        avg, count = self.connection().execute(sql, params).fetchone()
+        return avg, count
+
+    def decision_stats(self, day=None):
+        """(character, decision, count, mean reward) rows, optionally for one YYYY-MM-DD day."""
+        sql = "SELECT character, decision, COUNT(*), AVG(reward) FROM turns WHERE decision IS NOT NULL"
+        params = []
+        if day:
+            next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+            sql += " AND timestamp >= ? AND timestamp < ?"
+            params = [day, next_day]
+        sql += " GROUP BY character, decision"
+        return self.connection().execute(sql, params).fetchall()
+
+    def latest_day(self):
+        row = self.connection().execute("SELECT MAX(timestamp) FROM turns").fetchone()
+        return row[0][:10] if row and row[0] else None
+
+    # ---------------------------------------------------------
+    # Migration
+    # ---------------------------------------------------------
+    def import_logs(self, paths):
+        from core.recorder import iter_records  # Avoid circular import
+
+        total = 0
+        for path in paths:
+            batch = []
+            for record in iter_records(path):
+                batch.append(record)
+                if len(batch) >= 500:
+                    total += self.insert_many(batch)
+                    batch = []
+            if batch:
+                total += self.insert_many(batch)
+        info(f"🗄️ Imported {total} new record(s) from {len(paths)} log file(s) into {self.path}.")
+        return total
+
+
+_db = None
+
+def get_db(path=None):
+    """Shared HistoryDB. Without a path, reuses whichever database was opened last."""
+    global _db
+    if path is None:
+        path = _db.path if _db else DB_PATH
+    if _db is None or _db.path != path:
+        _db = HistoryDB(path)
+    return _db
+
+
+def main(argv=None):
+    from core.recorder import list_log_files  # Avoid circular import
+
+    parser = argparse.ArgumentParser(description="Training history database.")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="import every file in data/training_logs")
+    query = sub.add_parser("query", help="average reward for a slice of history")
+    query.add_argument("--decision")
+    query.add_argument("--phase")
+    query.add_argument("--character")
+    query.add_argument("--session")
+    query.add_argument("--energy", nargs=2, type=float, metavar=("LOW", "HIGH"))
+    args = parser.parse_args(argv)
+
+    db = get_db(args.db)
+    if args.command == "migrate":
+        db.import_logs(list_log_files())
+    else:
+        avg, count = db.average_reward(args.decision, args.phase, args.energy, args.character, args.session)
+        if not count:
+            warning("No matching records.")
+        else:
+            print(json.dumps({"average_reward": round(avg, 4), "count": count}))
+
+
+if __name__ == "__main__":
+    main()
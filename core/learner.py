@@ -1,7 +1,10 @@
 import json, os
-from statistics import mean
-from utils.log import info, warning
-from collections import defaultdict
+from utils.log import info, warning, debug
+from utils.trace import traced
+import core.recorder as recorder
+from core.recorder import latest_log_file, list_log_files, iter_records
+from core.history_db import get_db
+from core.persistence import writer
 
 # File paths
 DATA_DIR = "data"
@@ -13,6 +16,9 @@ SUMMARY_PATH = os.path.join(DATA_DIR, "summary.json")
 # Load brain.json (persistent learning)
 # -------------------------------------------------------------
 def load_brain():
+    pending = writer.read_snapshot(BRAIN_PATH)
+    if pending is not None:
+        return pending
     if os.path.exists(BRAIN_PATH):
         try:
             with open(BRAIN_PATH, "r", encoding="utf-8") as f:
@@ -26,11 +32,10 @@ def load_brain():
 # -------------------------------------------------------------
 # Save brain.json
 # -------------------------------------------------------------
+@traced(cat="io")
 def save_brain(data):
     try:
-        os.makedirs(os.path.dirname(BRAIN_PATH), exist_ok=True)
-        with open(BRAIN_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        writer.snapshot(BRAIN_PATH, data)
         info("💾 Brain updated and saved.")
     except Exception as e:
         warning(f"Failed to save brain: {e}")
@@ -38,74 +43,106 @@ def save_brain(data):
 # -------------------------------------------------------------
 # Save summary.json
 # -------------------------------------------------------------
+@traced(cat="io")
 def save_summary(averages, character="Unknown"):
     try:
         summary = {
             "character": character,
             "averages": averages,
         }
-        os.makedirs(os.path.dirname(SUMMARY_PATH), exist_ok=True)
-        with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2)
+        writer.snapshot(SUMMARY_PATH, summary)
         info("📊 Summary report saved.")
     except Exception as e:
         warning(f"Failed to save summary report: {e}")
 
 # -------------------------------------------------------------
-# Main learning routine
+# Running statistics
 # -------------------------------------------------------------
-def calculate_average_outcomes():
-    """
-    Loads the latest daily log (e.g., 2025-10-20.json) and calculates
-    average rewards per training type for the CURRENT character.
-    Saves learning results persistently to brain.json and summary.json.
-    """
-    from core import state  # Avoid circular import
+PERSIST_EVERY = 10  # observed records between brain/summary saves
 
-    if not os.path.exists(LOG_DIR):
-        warning("⚠️ No training log directory found.")
-        return {}
+class Learner:
+    """Running reward mean per (character, decision), updated one record at a time."""
 
-    # --- Auto-detect latest log ---
-    json_files = [f for f in os.listdir(LOG_DIR) if f.endswith(".json")]
-    if not json_files:
-        warning("⚠️ No training log found yet — nothing to learn.")
-        return {}
+    def __init__(self):
+        self.stats = {}  # (character, decision) -> [count, mean]
+        self.unsaved = 0
 
-    latest_file = max(json_files, key=lambda f: os.path.getmtime(os.path.join(LOG_DIR, f)))
-    path = os.path.join(LOG_DIR, latest_file)
-    info(f"📖 Loading latest log file: {latest_file}")
+    def observe(self, record):
+        decision = record.get("decision")
+        if not decision:
+            return
+        key = (record.get("character", "Unknown"), decision)
+        entry = self.stats.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += (record.get("reward", 0) - entry[1]) / entry[0]
+        self.unsaved += 1
 
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            records = json.load(f)
-    except json.JSONDecodeError:
-        warning(f"⚠️ Could not read log file: {latest_file}")
-        return {}
+    def averages(self, character):
+        return {d: round(m, 3) for (c, d), (_, m) in self.stats.items() if c == character}
 
-    # --- Filter by current character ---
-    current_char = getattr(state, "CURRENT_CHARACTER", "Unknown")
-    records = [r for r in records if r.get("character") == current_char]
-    if not records:
-        warning(f"⚠️ No past data found for {current_char}. Starting fresh.")
-        return {}
+    @classmethod
+    def from_logs(cls, paths):
+        learner = cls()
+        for path in paths:
+            for record in iter_records(path):
+                learner.observe(record)
+        learner.unsaved = 0
+        return learner
 
-    # --- Compute averages ---
-    stat_rewards = defaultdict(list)
-    for r in records:
-        decision = r.get("decision")
-        reward = r.get("reward", 0)
-        if decision:
-            stat_rewards[decision].append(reward)
+    @classmethod
+    def from_rows(cls, rows):
+        """Seed from (character, decision, count, mean) rows, e.g. HistoryDB.decision_stats()."""
+        learner = cls()
+        for character, decision, count, avg in rows:
+            learner.stats[(character, decision)] = [count, avg or 0.0]
+        return learner
 
-    if not stat_rewards:
-        warning("⚠️ No valid decision data found.")
-        return {}
+_learner = None
+
+def get_learner():
+    """Process-wide learner, seeded from the latest daily log on first use."""
+    global _learner
+    if _learner is None and recorder.BACKEND == "sqlite":
+        db = get_db()
+        _learner = Learner.from_rows(db.decision_stats(db.latest_day()))
+    if _learner is None:
+        path = latest_log_file(LOG_DIR)
+        if path:
+            info(f"📖 Loading latest log file: {os.path.basename(path)}")
+        _learner = Learner.from_logs([path] if path else [])
+    return _learner
+
+def rebuild_from_logs(all_days=False):
+    """Recompute statistics from disk: the latest day, or every log with all_days=True."""
+    global _learner
+    if recorder.BACKEND == "sqlite":
+        db = get_db()
+        _learner = Learner.from_rows(db.decision_stats(None if all_days else db.latest_day()))
+        info("🔁 Learner rebuilt from the history database.")
+        return _learner
+    paths = list_log_files(LOG_DIR) if all_days else [p for p in [latest_log_file(LOG_DIR)] if p]
+    _learner = Learner.from_logs(paths)
+    info(f"🔁 Learner rebuilt from {len(paths)} log file(s).")
+    return _learner
+
+def observe_record(record):
+    """Feed one new turn record to the learner. Call before the record is saved."""
+    learner = get_learner()
+    learner.observe(record)
+    if learner.unsaved >= PERSIST_EVERY:
+        persist()
 
-    averaged = {k: round(mean(v), 3) for k, v in stat_rewards.items()}
-    info(f"📈 Calculated average outcomes for {current_char}: {averaged}")
+def persist():
+    """Blend the current averages into brain.json and write summary.json."""
+    from core import state  # Avoid circular import
+
+    learner = get_learner()
+    current_char = getattr(state, "CURRENT_CHARACTER", "Unknown")
+    averaged = learner.averages(current_char)
+    learner.unsaved = 0
+    if not averaged:
+        return
 
-    # --- Update persistent brain ---
     brain = load_brain()
     for stat, value in averaged.items():
         old = brain.get(stat, 0)
@@ -113,4 +150,28 @@ def calculate_average_outcomes():
     save_brain(brain)
     save_summary(averaged, current_char)
 
+def flush_learner():
+    if _learner is not None and _learner.unsaved:
+        persist()
+
+# -------------------------------------------------------------
+# Main learning routine
+# -------------------------------------------------------------
+@traced(cat="learn")
+def calculate_average_outcomes():
+    """
+    Average rewards per training type for the CURRENT character, from the
+    running statistics (seeded from the latest daily log, then updated as
+    records are observed). brain.json and summary.json are saved every
+    PERSIST_EVERY records by observe_record.
+    """
+    from core import state  # Avoid circular import
+
+    current_char = getattr(state, "CURRENT_CHARACTER", "Unknown")
+    averaged = get_learner().averages(current_char)
+    if not averaged:
+        warning(f"⚠️ No past data found for {current_char}. Starting fresh.")
+        return {}
+
+    debug(f"📈 Average outcomes for {current_char}: {averaged}")
     return averaged
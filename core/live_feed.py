@@ -0,0 +1,88 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+
+LiveEvent = namedtuple("LiveEvent", ["seq", "kind", "timestamp", "data"])
+
+HISTORY_SIZE = 500      # events kept for clients that (re)connect
+SUBSCRIBER_QUEUE = 256  # per client; the oldest events are dropped when a client falls behind
+
+
+class Subscription:
+    """One streaming client. Created on the server's event loop, fed from any thread."""
+
+    def __init__(self, loop, maxsize=SUBSCRIBER_QUEUE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LiveFeed:
+    """
+    In-memory publish/subscribe channel from the bot to the web server.
+
+    The bot thread calls publish(kind, data) with plain dicts (turn records,
+    energy readings, decisions). Publishing never blocks and never touches
+    disk; serialisation happens on the server side, per client.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._seq = itertools.count(1)
+
+    def publish(self, kind, data):
+        event = LiveEvent(next(self._seq), kind, time.time(), dict(data))
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.push(event)
+        return event
+
+    def subscribe(self, after_seq=None):
+        """
+        Must be called from a running event loop. Events newer than `after_seq`
+        (e.g. from a Last-Event-ID header) are replayed from history first.
+        """
+        sub = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+            backlog = [e for e in self._history if after_seq is not None and e.seq > after_seq]
+        for event in backlog[-sub.queue.maxsize:]:
+            sub._put(event)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def recent(self, kind=None, limit=100):
+        with self._lock:
+            events = [e for e in self._history if kind is None or e.kind == kind]
+        return events[-limit:]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+feed = LiveFeed()
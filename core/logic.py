@@ -3,116 +3,39 @@ from core.state import check_current_year, stat_state, check_energy_level, check
 from utils.log import info, warning, debug
 import utils.constants as constants
 from core.recorder import save_turn_data
-from core.learner import calculate_average_outcomes
-from core.decision_memory import remember_decision, get_memory_bias
+from core.learner import calculate_average_outcomes, observe_record
+from core.decision_memory import remember_decision
+from core.scoring import score_trainings, scoring_context, breakdown
+from core.live_feed import feed
+from utils.metrics import STATS
 import datetime, os
 
 
-# -------------------------------------------------------------
-# Stat priority config
-# -------------------------------------------------------------
-def get_stat_priority(stat_key: str) -> int:
-    return state.PRIORITY_STAT.index(stat_key) if stat_key in state.PRIORITY_STAT else 999
-
-
-# -------------------------------------------------------------
-# Recommended stat weights by race distance
-# -------------------------------------------------------------
-RECOMMENDED_STATS_BY_DISTANCE = {
-    "sprint": {"speed": 0.45, "power": 0.30, "stamina": 0.10, "wit": 0.10, "guts": 0.05},
-    "mile":   {"speed": 0.40, "power": 0.25, "stamina": 0.20, "wit": 0.10, "guts": 0.05},
-    "medium": {"speed": 0.35, "stamina": 0.30, "power": 0.20, "wit": 0.10, "guts": 0.05},
-    "long":   {"speed": 0.30, "stamina": 0.40, "power": 0.15, "wit": 0.10, "guts": 0.05},
-}
+# Energy tiers of do_something: always rest below REST_ENERGY, below the
+# other two only when the supports on offer aren't worth the energy.
+REST_ENERGY = 30
+HIGH_SUPPORT_ENERGY = 50
+GOOD_SUPPORT_ENERGY = 70
 
 
 # -------------------------------------------------------------
-# Priority weight multiplier
+# Choose the best safe training (fallback logic)
 # -------------------------------------------------------------
-PRIORITY_WEIGHTS_LIST = {
-    "HEAVY": 0.75,
-    "MEDIUM": 0.5,
-    "LIGHT": 0.25,
-    "NONE": 0,
-}
-
-
-# -------------------------------------------------------------
-# Choose the training with most supports (fallback logic)
-# -------------------------------------------------------------
-def most_support_card(results):
-    wit_data = results.get("wit")
-    non_wit_results = {k: v for k, v in results.items() if k != "wit" and int(v["failure"]) <= state.MAX_FAILURE}
-    energy_level, _ = check_energy_level()
-
+def most_support_card(scores, energy_level):
+    """`scores` come ranked from core.scoring.score_trainings."""
     if energy_level < state.SKIP_TRAINING_ENERGY:
         info("⚡ Energy too low for safe training. Resting instead.")
         return None
 
-    if len(non_wit_results) == 0 and wit_data and int(wit_data["failure"]) <= state.MAX_FAILURE and wit_data["total_supports"] >= 2:
-        info("All other trainings unsafe — WIT has enough support cards.")
-        return "wit"
-
-    filtered_results = {k: v for k, v in results.items() if int(v["failure"]) <= state.MAX_FAILURE}
-    if not filtered_results:
+    safe = scores[scores["failure"] <= state.MAX_FAILURE]
+    if not len(safe):
         info("No safe training found — resting.")
         return None
 
-    best_key, _ = max(filtered_results.items(), key=training_score)
-    return best_key
-
-
-# -------------------------------------------------------------
-# Training score: guide logic + memory + learned data + distance bias
-# -------------------------------------------------------------
-def training_score(x):
-    global learned
-    stat_name, data = x
-    priority_weight = PRIORITY_WEIGHTS_LIST.get(state.PRIORITY_WEIGHT, 0.5)
-
-    # --- Base calculation ---
-    base = data["total_supports"] + 0.5 * data.get("total_hints", 0)
-
-    # Friendship impact
-    friendship_value = (
-        data["total_friendship_levels"]["green"]
-        + data["total_friendship_levels"]["blue"] * 1.1
-        + data["total_friendship_levels"]["gray"] * 1.2
-    )
-    base += friendship_value * 0.1
-
-    # Rainbow bonuses
-    total_rainbows = (
-        data.get("friendship_levels", {}).get("max", 0)
-        + data.get("friendship_levels", {}).get("yellow", 0)
-    )
-    base += total_rainbows * 2
-
-    # Priority and learning effects
-    multiplier = 1 + state.PRIORITY_EFFECTS_LIST[get_stat_priority(stat_name)] * priority_weight
-    learn_bonus = learned.get(stat_name, 0) / 100.0 if "learned" in globals() and learned else 0
-    total = base * multiplier * (1 + learn_bonus)
-
-    # --- NEW: Race distance–based stat bias ---
-    aptitude = getattr(state, "APTITUDES", {})
-    distance_type = "medium"  # fallback
-    for key in aptitude.keys():
-        if "distance_" in key and aptitude[key].lower() in ["a", "b"]:
-            distance_type = key.replace("distance_", "")
-            break
-
-    distance_weights = RECOMMENDED_STATS_BY_DISTANCE.get(distance_type, {})
-    distance_bias = distance_weights.get(stat_name, 0)
-    total *= (1 + distance_bias * 0.25)  # 25% bias weight
-
-    # --- Memory-based bias ---
-    phase = getattr(state, "current_phase", "unknown")
-    energy_level, _ = check_energy_level()
-    memory_bias = get_memory_bias(phase, energy_level, stat_name)
-    total *= (1 + memory_bias)
+    if (safe["training"] == "wit").all() and safe[0]["supports"] >= 2:
+        info("All other trainings unsafe — WIT has enough support cards.")
 
-    debug(f"{stat_name} -> total={total:.2f}, bias={memory_bias:.2f}, learn_bonus={learn_bonus:.2f}, dist={distance_type}")
-    return (total, -get_stat_priority(stat_name))
+    return str(safe[0]["training"])
 
 
 # -------------------------------------------------------------
@@ -126,7 +49,6 @@ def filter_by_stat_caps(results, current_stats):
 # SMART ENERGY + SUMMER LOGIC + MAIN DECISION
 # -------------------------------------------------------------
 def do_something(results):
-    global learned
     year = check_current_year()
     current_stats = stat_state()
     energy_level, _ = check_energy_level()
@@ -152,14 +74,14 @@ def do_something(results):
         return auto_rest(year, phase, energy_level, current_stats)
 
     # Save energy tiers
-    if energy_level < 30:
+    if energy_level < REST_ENERGY:
         info(f"💤 Energy critically low ({energy_level:.1f}%) — resting.")
         return auto_rest(year, phase, energy_level, current_stats)
-    elif energy_level < 50:
+    elif energy_level < HIGH_SUPPORT_ENERGY:
         if not has_high_support(results):
             info(f"⚡ Energy moderate ({energy_level:.1f}%) — not enough supports, resting.")
             return auto_rest(year, phase, energy_level, current_stats)
-    elif energy_level < 70:
+    elif energy_level < GOOD_SUPPORT_ENERGY:
         if not has_good_support(results):
             info(f"⚡ Energy medium ({energy_level:.1f}%) — saving energy for stronger turns.")
             return auto_rest(year, phase, energy_level, current_stats)
@@ -178,7 +100,10 @@ def do_something(results):
     if phase == "early":
         result, _ = max([(k, v["total_supports"]) for k, v in filtered.items()], key=lambda x: x[1], default=(None, 0))
     else:
-        result = rainbow_training(filtered) or most_support_card(filtered)
+        scores = score_trainings(filtered, scoring_context(energy_level, phase, learned))
+        for line in breakdown(scores):
+            debug(line)
+        result = rainbow_training(scores) or most_support_card(scores, energy_level)
 
     if not result:
         return auto_rest(year, phase, energy_level, current_stats)
@@ -207,6 +132,13 @@ def compute_reward(current_stats, energy, chosen_data):
     return round(reward, 3)
 
 
+def publish_turn(record):
+    """Hands a turn record to live listeners (SSE stream, /metrics gauges)."""
+    feed.publish("turn", record)
+    for stat, value in record["current_stats"].items():
+        STATS.set(value, stat=stat)
+
+
 def record_training(year, phase, energy, current_stats, result, reward):
     record = {
         "timestamp": datetime.datetime.now().isoformat(),
@@ -225,7 +157,9 @@ def record_training(year, phase, energy, current_stats, result, reward):
             "session_id": os.getenv("SESSION_ID", "default"),
         },
     }
+    observe_record(record)
     save_turn_data(record)
+    publish_turn(record)
     info(f"📘 Training record saved for {result.upper()} (reward={reward}).")
 
 
@@ -241,7 +175,9 @@ def auto_rest(year, phase, energy, current_stats):
         "reward": 0,
         "metadata": {"script_version": "v1.7", "ai_mode": "auto-rest"},
     }
+    observe_record(record)
     save_turn_data(record)
+    publish_turn(record)
     info("💤 Auto-rest recorded.")
     try:
         remember_decision(phase, energy, "rest", 0)
@@ -269,25 +205,24 @@ def has_good_support(results):
 # -------------------------------------------------------------
 # Rainbow training logic
 # -------------------------------------------------------------
-def rainbow_training(results):
-    candidates = {}
-    for stat_name, data in results.items():
-        fail = int(data["failure"])
-        if fail > state.MAX_FAILURE:
-            continue
-        total_rainbow = data.get("friendship_levels", {}).get("max", 0) + data.get("friendship_levels", {}).get("yellow", 0)
-        score = total_rainbow * 3.0 + data["total_supports"] * 1.2 + data["total_hints"] * 0.5
-        candidates[stat_name] = score
-    if not candidates:
+def rainbow_training(scores):
+    """Best-scoring safe training with at least one rainbow support, if any."""
+    candidates = scores[(scores["failure"] <= state.MAX_FAILURE) & (scores["rainbows"] > 0)]
+    if not len(candidates):
         return None
-    best_key = max(candidates, key=candidates.get)
-    info(f"🌈 Rainbow training: {best_key.upper()} ({candidates[best_key]:.2f})")
-    return best_key
+    best = candidates[0]
+    info(f"🌈 Rainbow training: {best['training'].upper()} ({best['total']:.2f})")
+    return str(best["training"])
 
 
 # -------------------------------------------------------------
 # Race logic & aptitude matching
 # -------------------------------------------------------------
+def is_fan_goal(criteria):
+    """A fan count goal, which any race counts toward."""
+    return "fan" in (criteria or "") and "Progress" not in (criteria or "")
+
+
 def decide_race_for_goal(year, turn, criteria, keywords):
     no_race = (False, None)
     if year == "Junior Year Pre-Debut" or turn >= 10:
@@ -296,14 +231,23 @@ def decide_race_for_goal(year, turn, criteria, keywords):
     criteria_text = criteria or ""
     if any(word in criteria_text for word in keywords):
         info("🎯 Criteria word found — evaluating race options.")
+        plan = getattr(state, "RACE_PLAN", None)
         if "Progress" in criteria_text:
             if "G1" in criteria_text or "GI" in criteria_text:
+                if plan:
+                    race_name = plan.goal_race(year)
+                    return (True, race_name) if race_name else (False, None)
                 race_list = constants.RACE_LOOKUP.get(year, [])
                 if not race_list:
                     return False, None
                 best_race = filter_races_by_aptitude(race_list, state.APTITUDES)
                 return True, best_race["name"] if best_race else None
             return False, "any"
+        if is_fan_goal(criteria_text) and plan:
+            # fan goal: prefer the race the career plan picked for this date
+            race_name = plan.fan_race(year)
+            if race_name:
+                return True, race_name
         return False, "any"
     return no_race
 
@@ -1,19 +1,76 @@
-import easyocr
 from PIL import Image
 import numpy as np
+import hashlib
 import re
+import threading
+import time
+from collections import OrderedDict
 
-reader = easyocr.Reader(["en"], gpu=False)
+from utils.trace import traced
+from utils.metrics import OCR_CALLS, OCR_CACHE_HITS, OCR_SECONDS
 
+# Importing easyocr pulls in torch and creating the reader loads the model,
+# which takes seconds, so both wait until the first OCR call.
+_reader = None
+_reader_lock = threading.Lock()
+
+def get_reader():
+  global _reader
+  if _reader is None:
+    with _reader_lock:
+      if _reader is None:
+        import easyocr
+        _reader = easyocr.Reader(["en"], gpu=False)
+  return _reader
+
+def set_reader(reader=None):
+  """Use `reader` (anything with EasyOCR's readtext) instead of EasyOCR. Pass None to go back to it."""
+  global _reader
+  _reader = reader
+  clear_cache()
+
+# HUD regions are often read again before they change (same stats, same turn),
+# so results are cached by the exact pixels of the crop.
+OCR_CACHE_SIZE = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cached(kind, img_np, compute):
+  key = (kind, img_np.shape, hashlib.blake2b(img_np.tobytes(), digest_size=16).digest())
+  OCR_CALLS.inc(kind=kind)
+  with _cache_lock:
+    if key in _cache:
+      _cache.move_to_end(key)
+      OCR_CACHE_HITS.inc(kind=kind)
+      return _cache[key]
+  start = time.perf_counter()
+  value = compute(img_np)
+  OCR_SECONDS.observe(time.perf_counter() - start, kind=kind)
+  with _cache_lock:
+    _cache[key] = value
+    if len(_cache) > OCR_CACHE_SIZE:
+      _cache.popitem(last=False)
+  return value
+
+def clear_cache():
+  with _cache_lock:
+    _cache.clear()
+
+@traced(cat="ocr")
 def extract_text(pil_img: Image.Image) -> str:
-  img_np = np.array(pil_img)
-  result = reader.readtext(img_np)
+  return _cached("text", np.array(pil_img), _read_text)
+
+def _read_text(img_np):
+  result = get_reader().readtext(img_np)
   texts = [text[1] for text in result]
   return " ".join(texts)
 
+@traced(cat="ocr")
 def extract_number(pil_img: Image.Image) -> int:
-  img_np = np.array(pil_img)
-  result = reader.readtext(img_np, allowlist="0123456789")
+  return _cached("number", np.array(pil_img), _read_number)
+
+def _read_number(img_np):
+  result = get_reader().readtext(img_np, allowlist="0123456789")
   texts = [text[1] for text in result]
   joined_text = "".join(texts)
 
@@ -23,3 +80,17 @@ def extract_number(pil_img: Image.Image) -> int:
     return int(digits)
   
   return -1
+
+@traced(cat="ocr")
+def extract_text_boxes(pil_img: Image.Image) -> list[tuple[tuple[int, int, int, int], str]]:
+  """Like extract_text, but keeps each detected line's (x, y, w, h) box in image coordinates."""
+  return list(_cached("boxes", np.array(pil_img), _read_text_boxes))
+
+def _read_text_boxes(img_np):
+  result = get_reader().readtext(img_np)
+  boxes = []
+  for points, text, _ in result:
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    boxes.append(((int(min(xs)), int(min(ys)), int(max(xs) - min(xs)), int(max(ys) - min(ys))), text))
+  return boxes
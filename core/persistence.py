@@ -0,0 +1,233 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from utils.log import warning
+from utils.trace import span
+
+FLUSH_EVERY = 20        # records
+FLUSH_INTERVAL = 5.0    # seconds
+QUEUE_SIZE = 1000
+
+
+class WriteBehind:
+    """
+    Background writer for everything the bot persists.
+
+    - append(path, text): batched, one write per file per flush
+    - snapshot(path, data): whole-file JSON dumps, only the latest one per path is written
+    - submit(sink, item): items for a registered sink, handed over as one list per flush
+
+    The bot thread only serialises and enqueues. Pending snapshots stay readable
+    through read_snapshot() so load-modify-save callers see their own writes.
+    When the worker isn't running every call writes inline, so tools and
+    scripts keep working without starting it.
+    """
+
+    def __init__(self, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL, queue_size=QUEUE_SIZE):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._pending_snapshots = {}
+        self._sinks = {}
+        self._thread = None
+        # True from start() until the worker has taken its last item; guarded by _state_lock
+        self._accepting = False
+        self._state_lock = threading.Lock()
+
+    def configure(self, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = max(0.1, flush_interval)
+
+    # ---------------------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------------------
+    def start(self):
+        if self.is_running():
+            return
+        self._accepting = True
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Flush everything and stop the worker."""
+        if not self.is_running():
+            self._thread = None
+            return
+        done = threading.Event()
+        if self._enqueue(("stop", done)) and not done.wait(timeout):
+            # still running: calls keep queueing to it until it exits, never writing alongside it
+            warning("⚠️ Persistence worker did not finish flushing in time.")
+            return
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._thread = None
+
+    def flush(self, timeout=10):
+        """Block until everything submitted so far is on disk."""
+        done = threading.Event()
+        if not self._enqueue(("flush", done)):
+            return True
+        return done.wait(timeout)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------------------------------------------------
+    # Producers (bot thread)
+    # ---------------------------------------------------------
+    def _enqueue(self, item):
+        """Queues `item` for the worker; False once it has stopped taking items."""
+        with self._state_lock:
+            if not self._accepting:
+                return False
+            # blocks only if the disk is so slow that QUEUE_SIZE records are waiting
+            self._queue.put(item)
+            return True
+
+    def append(self, path, text):
+        if not self._enqueue(("append", path, text)):
+            _append_files({path: [text]})
+
+    def snapshot(self, path, data):
+        text = json.dumps(data, indent=2)
+        with self._lock:
+            self._pending_snapshots[path] = text
+        if not self._enqueue(("snapshot", path, text)):
+            with self._lock:
+                if self._pending_snapshots.get(path) is text:
+                    del self._pending_snapshots[path]
+            _write_snapshot(path, text)
+
+    def register_sink(self, name, handler):
+        """handler(items) is called on the worker thread with every item submitted since the last flush."""
+        self._sinks[name] = handler
+
+    def submit(self, sink, item):
+        if not self._enqueue(("sink", sink, item)):
+            self._sinks[sink]([item])
+
+    def read_snapshot(self, path):
+        """Latest snapshot submitted for `path` that isn't on disk yet, or None."""
+        with self._lock:
+            text = self._pending_snapshots.get(path)
+        return json.loads(text) if text is not None else None
+
+    # ---------------------------------------------------------
+    # Worker
+    # ---------------------------------------------------------
+    def _run(self):
+        appends = {}
+        snapshots = {}
+        batches = {}
+        pending = 0
+        first_pending_at = None
+
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0, first_pending_at + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            waiter = None
+            stopping = False
+            if item is not None:
+                kind = item[0]
+                if kind == "append":
+                    appends.setdefault(item[1], []).append(item[2])
+                elif kind == "snapshot":
+                    snapshots[item[1]] = item[2]
+                elif kind == "sink":
+                    batches.setdefault(item[1], []).append(item[2])
+                elif kind in ("flush", "stop"):
+                    waiter = item[1]
+                    stopping = kind == "stop"
+                if kind in ("append", "snapshot", "sink"):
+                    pending += 1
+                    if first_pending_at is None:
+                        first_pending_at = time.monotonic()
+
+            due = pending and (pending >= self.flush_every or time.monotonic() - first_pending_at >= self.flush_interval)
+            if due or waiter:
+                self._flush(appends, snapshots, batches)
+                appends, snapshots, batches = {}, {}, {}
+                pending = 0
+                first_pending_at = None
+
+            if waiter:
+                waiter.set()
+            if stopping:
+                self._close()
+                return
+
+    def _close(self):
+        """Stops taking items, then writes whatever was queued after the stop request."""
+        with self._state_lock:
+            self._accepting = False
+        appends, snapshots, batches, waiters = {}, {}, {}, []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = item[0]
+            if kind == "append":
+                appends.setdefault(item[1], []).append(item[2])
+            elif kind == "snapshot":
+                snapshots[item[1]] = item[2]
+            elif kind == "sink":
+                batches.setdefault(item[1], []).append(item[2])
+            else:
+                waiters.append(item[1])
+        self._flush(appends, snapshots, batches)
+        for waiter in waiters:
+            waiter.set()
+
+    def _flush(self, appends, snapshots, batches):
+        if not appends and not snapshots and not batches:
+            return
+        with span("persistence.flush", cat="io", appends=sum(map(len, appends.values())), snapshots=len(snapshots)):
+            try:
+                _append_files(appends)
+            except Exception as e:
+                warning(f"Failed to append records: {e}")
+            for sink, items in batches.items():
+                try:
+                    self._sinks[sink](items)
+                except Exception as e:
+                    warning(f"Failed to flush {len(items)} item(s) to {sink}: {e}")
+            for path, text in snapshots.items():
+                try:
+                    _write_snapshot(path, text)
+                except Exception as e:
+                    warning(f"Failed to write {path}: {e}")
+                with self._lock:
+                    if self._pending_snapshots.get(path) is text:
+                        del self._pending_snapshots[path]
+
+
+def _append_files(appends):
+    for path, texts in appends.items():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(texts))
+
+
+def _write_snapshot(path, text):
+    # write-then-rename so a crash never leaves a half written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+writer = WriteBehind()
+atexit.register(writer.stop)
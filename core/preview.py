@@ -0,0 +1,149 @@
+import threading
+import time
+
+import numpy as np
+
+from utils.log import info, warning
+from utils.screenshot import recent_regions
+from utils.trace import span
+from core.frame_bus import bus
+
+MAX_FPS = 2.0
+MAX_WIDTH = 960
+FORMAT = "jpeg"     # "jpeg" or "webp"
+QUALITY = 70
+IDLE_TIMEOUT = 5.0  # seconds without viewers before the encoder thread exits
+
+OVERLAY_MAX_AGE = 3.0
+TEMPLATE_COLOR = (0, 200, 0)   # BGR
+SCAN_COLOR = (255, 160, 0)
+OCR_COLOR = (0, 180, 255)
+
+
+class Preview:
+    """
+    Downscaled, annotated copies of the frame bus stream for the web preview.
+
+    Runs on its own thread and only while someone is watching: the first
+    viewer starts it, and it exits once nobody has watched for IDLE_TIMEOUT.
+    Frames arriving faster than max_fps are skipped, so the bot thread never
+    waits on encoding.
+    """
+
+    def __init__(self, max_fps=MAX_FPS, max_width=MAX_WIDTH, fmt=FORMAT, quality=QUALITY):
+        self.configure(max_fps, max_width, fmt, quality)
+        self._cond = threading.Condition()
+        self._viewers = 0
+        self._last_viewer_at = 0.0
+        self._latest = None  # (seq, bytes)
+        self._thread = None
+
+    def configure(self, max_fps=MAX_FPS, max_width=MAX_WIDTH, fmt=FORMAT, quality=QUALITY):
+        self.max_fps = max(0.1, max_fps)
+        self.max_width = max_width
+        self.format = "webp" if fmt == "webp" else "jpeg"
+        self.quality = int(quality)
+
+    @property
+    def media_type(self):
+        return f"image/{self.format}"
+
+    # ---------------------------------------------------------
+    # Viewers (server side)
+    # ---------------------------------------------------------
+    def add_viewer(self):
+        with self._cond:
+            self._viewers += 1
+            self._last_viewer_at = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="preview", daemon=True)
+                self._thread.start()
+
+    def remove_viewer(self):
+        with self._cond:
+            self._viewers = max(0, self._viewers - 1)
+            self._last_viewer_at = time.monotonic()
+
+    def latest(self):
+        """(seq, encoded bytes) of the newest preview frame, or None."""
+        return self._latest
+
+    def wait_next(self, after_seq, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._latest is not None and self._latest[0] > after_seq, timeout)
+            return self._latest
+
+    # ---------------------------------------------------------
+    # Encoder thread
+    # ---------------------------------------------------------
+    def _keep_running(self):
+        # checked and cleared under the lock so add_viewer never sees a thread that is about to exit
+        with self._cond:
+            if self._viewers > 0 or time.monotonic() - self._last_viewer_at < IDLE_TIMEOUT:
+                return True
+            self._thread = None
+            return False
+
+    def _run(self):
+        info("🖼️ Preview encoder started.")
+        last_seq = 0
+        while self._keep_running():
+            frame = bus.wait_next(last_seq, timeout=1.0)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+            started = time.monotonic()
+            try:
+                with span("preview.encode", cat="preview"):
+                    data = self.encode(frame)
+            except Exception as e:
+                warning(f"Preview encode failed: {e}")
+                data = None
+            if data is not None:
+                with self._cond:
+                    self._latest = (frame.seq, data)
+                    self._cond.notify_all()
+            # frames published while we sleep are simply never looked at
+            time.sleep(max(0, 1 / self.max_fps - (time.monotonic() - started)))
+        info("🖼️ Preview encoder stopped (no viewers).")
+
+    def encode(self, frame):
+        import cv2  # only needed once someone watches; keeps it off the server's startup path
+
+        image = cv2.cvtColor(np.asarray(frame.image), cv2.COLOR_RGB2BGR)
+        scale = min(1.0, self.max_width / image.shape[1]) if self.max_width else 1.0
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        draw_overlays(image, scale, frame.timestamp)
+
+        if self.format == "webp":
+            ok, buf = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, self.quality])
+        else:
+            ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else None
+
+
+def _rect(image, box, scale, color, label=None):
+    import cv2
+
+    x, y, w, h = (int(v * scale) for v in box)
+    cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
+    if label:
+        cv2.putText(image, label, (x, max(12, y - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1, cv2.LINE_AA)
+
+
+def draw_overlays(image, scale, timestamp):
+    """Template matches from the lobby and scanner, plus regions recently read with OCR."""
+    for event_name, color in (("lobby_matches", TEMPLATE_COLOR), ("scan", SCAN_COLOR)):
+        event = bus.latest_event(event_name, max_age=OVERLAY_MAX_AGE)
+        if event is None:
+            continue
+        for name, boxes in event.data.get("boxes", {}).items():
+            for box in boxes:
+                _rect(image, box, scale, color, name)
+
+    for region in recent_regions(since=timestamp - OVERLAY_MAX_AGE):
+        _rect(image, region, scale, OCR_COLOR)
+
+
+preview = Preview()
@@ -0,0 +1,118 @@
+import re
+from collections import namedtuple
+
+from rapidfuzz import fuzz, process
+
+import utils.constants as constants
+from utils.log import info, debug
+from utils.screenshot import enhanced_screenshot
+from utils.trace import traced
+from core.ocr import extract_text_boxes
+
+# enhanced_screenshot enlarges to 2x the reference resolution (2 / constants.SCALE) before OCR
+OCR_SCALE = 2
+# vertical gap (reference px) between text lines that starts a new race row
+ROW_GAP = 28
+NAME_SCORE_CUTOFF = 80
+# data/races.json (and so the index) only lists G1 races
+INDEXED_GRADE = "G1"
+
+RaceRow = namedtuple("RaceRow", ["name", "race", "grade", "meters", "terrain", "text", "center", "score"])
+
+def normalize(text):
+  return re.sub(r"[^a-z0-9 ]", "", text.lower()).strip()
+
+# Precompiled once from RACE_LOOKUP: "<year> <date>" -> {normalised name: race}, plus every race for unknown dates
+NAME_INDEX = {
+  key: {normalize(race["name"]): race for race in races}
+  for key, races in constants.RACE_LOOKUP.items()
+}
+ALL_RACES = {name: race for races in NAME_INDEX.values() for name, race in races.items()}
+
+def candidates_for(year=None):
+  if year:
+    for key, races in NAME_INDEX.items():
+      if key in year:
+        return races
+  return ALL_RACES
+
+def _group_rows(boxes):
+  """Cluster OCR line boxes into rows by their vertical position."""
+  rows = []
+  for box, text in sorted(boxes, key=lambda b: b[0][1]):
+    if rows and box[1] - rows[-1][-1][0][1] <= ROW_GAP * OCR_SCALE:
+      rows[-1].append((box, text))
+    else:
+      rows.append([(box, text)])
+  return rows
+
+def _resolve_row(lines, choices):
+  text = " ".join(t for _, t in lines)
+  norm = normalize(text)
+
+  # "G2" or "G 2", or roman numerals ("GII") read by length
+  grade = re.search(r"\bG\s?([123]|I{1,3})\b", text)
+  grade = f"G{grade.group(1) if grade.group(1).isdigit() else len(grade.group(1))}" if grade else None
+  meters = re.search(r"(\d{4})\s?m", text)
+  meters = int(meters.group(1)) if meters else None
+  terrain = "Dirt" if "dirt" in norm else "Turf" if "turf" in norm else None
+
+  best = process.extractOne(norm, list(choices), scorer=fuzz.partial_ratio, score_cutoff=NAME_SCORE_CUTOFF) if choices else None
+  race = None
+  score = 0
+  if best:
+    race = choices[best[0]]
+    score = best[1]
+    # a readable grade/distance/terrain that disagrees means the name match is a false positive,
+    # e.g. a G2 trial named after the G1 it leads to
+    if grade and grade != INDEXED_GRADE:
+      race, score = None, 0
+    elif meters and meters != race["distance"]["meters"]:
+      race, score = None, 0
+    elif terrain and terrain != race["terrain"]:
+      race, score = None, 0
+
+  x0 = min(b[0] for b, _ in lines)
+  y0 = min(b[1] for b, _ in lines)
+  x1 = max(b[0] + b[2] for b, _ in lines)
+  y1 = max(b[1] + b[3] for b, _ in lines)
+  region = constants.RACE_LIST_BOX_REGION
+  # OCR px -> screen px: divide by the factor enhanced_screenshot enlarged by
+  factor = OCR_SCALE / constants.SCALE
+  center = (region[0] + round((x0 + x1) / (2 * factor)), region[1] + round((y0 + y1) / (2 * factor)))
+
+  return RaceRow(race["name"] if race else None, race, grade, meters, terrain, text, center, score)
+
+@traced(cat="ocr")
+def scan_visible_rows(year=None):
+  """OCR the race list box once and resolve every visible row against the race index."""
+  screenshot = enhanced_screenshot(constants.RACE_LIST_BOX_REGION)
+  boxes = extract_text_boxes(screenshot)
+  choices = candidates_for(year)
+  rows = [_resolve_row(lines, choices) for lines in _group_rows(boxes)]
+  debug(f"Race rows: {[(r.name, r.grade, r.meters, r.terrain) for r in rows]}")
+  return rows
+
+def find_race(name, year=None, scroll=None, max_scrolls=4):
+  """
+  Scan the list one scroll position at a time until `name` shows up.
+  Stops early when a scroll doesn't reveal any new row (end of list). When the
+  race isn't found the list is left at the last position scanned.
+  """
+  target = normalize(name)
+  seen = set()
+  for i in range(max_scrolls):
+    rows = scan_visible_rows(year)
+    for row in rows:
+      if row.name and normalize(row.name) == target:
+        info(f"{row.name} found in race list ({row.score:.0f}% match).")
+        return row
+
+    new_rows = {row.text for row in rows} - seen
+    if i > 0 and not new_rows:
+      debug("Race list end reached.")
+      break
+    seen |= new_rows
+    if scroll and i < max_scrolls - 1:
+      scroll()
+  return None
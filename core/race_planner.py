@@ -0,0 +1,118 @@
+import re
+
+import core.state as state
+import utils.constants as constants
+from core.logic import filter_races_by_aptitude
+from utils.log import info, debug
+
+YEARS = ["Junior Year", "Classic Year", "Senior Year"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Every turn of a career in order, as (year, date)
+CALENDAR = [(year, f"{half} {month}") for year in YEARS for month in MONTHS for half in ("Early", "Late")]
+CALENDAR_INDEX = {slot: i for i, slot in enumerate(CALENDAR)}
+
+# The game asks for confirmation after 3 consecutive races
+MAX_CONSECUTIVE_RACES = 3
+
+YEAR_PATTERN = re.compile(r"(Junior|Classic|Senior) Year\s+(Early|Late)\s+(" + "|".join(MONTHS) + r")")
+
+def parse_year(text):
+  """Canonical (year, date) from OCR'd year text like "Classic Year Early Apr", or None (Pre-Debut, Finale)."""
+  if not text:
+    return None
+  match = YEAR_PATTERN.search(text)
+  if not match:
+    return None
+  return (f"{match.group(1)} Year", f"{match.group(2)} {match.group(3)}")
+
+RACES_BY_NAME = {race["name"]: race for races in constants.RACE_LOOKUP.values() for race in races}
+
+
+class RacePlan:
+  """
+  Race decisions for a whole career, computed once per (schedule, aptitudes):
+
+  - scheduled: races from the configured race_schedule
+  - best: highest aptitude-matched race on each date, for G1 goals
+  - planned: fan-maximising races that respect MAX_CONSECUTIVE_RACES, always
+    including the scheduled ones when the limit allows
+  """
+
+  def __init__(self, schedule, aptitudes, max_consecutive=MAX_CONSECUTIVE_RACES):
+    self.scheduled = {}
+    for race in schedule or []:
+      if race:
+        self.scheduled.setdefault((race["year"], race["date"]), []).append(race["name"])
+
+    self.best = {}
+    if aptitudes:
+      for key, races in constants.RACE_LOOKUP.items():
+        slot = parse_year(key)
+        race = filter_races_by_aptitude(races, aptitudes)
+        if slot and race:
+          self.best[slot] = race
+
+    self.planned = self._optimise(max_consecutive)
+
+  def _candidate(self, slot):
+    """(name, fans) raced on this slot if we race at all, and whether it is mandatory."""
+    if slot in self.scheduled:
+      name = self.scheduled[slot][0]
+      race = RACES_BY_NAME.get(name)
+      return name, race["fans"]["gained"] if race else 0, True
+    if slot in self.best:
+      race = self.best[slot]
+      return race["name"], race["fans"]["gained"], False
+    return None, 0, False
+
+  def _optimise(self, max_consecutive):
+    """
+    DP over the calendar. value[i][c] is the most fans obtainable from turn i
+    onward after c consecutive races. Scheduled races must be run unless the
+    consecutive limit makes that impossible.
+    """
+    n = len(CALENDAR)
+    candidates = [self._candidate(slot) for slot in CALENDAR]
+    value = [[0] * (max_consecutive + 1) for _ in range(n + 1)]
+    choice = [[False] * (max_consecutive + 1) for _ in range(n)]
+
+    for i in range(n - 1, -1, -1):
+      name, fans, forced = candidates[i]
+      for c in range(max_consecutive + 1):
+        skip = value[i + 1][0]
+        can_race = name is not None and c < max_consecutive
+        race = fans + value[i + 1][c + 1] if can_race else -1
+        if can_race and (forced or race > skip):
+          value[i][c] = race
+          choice[i][c] = True
+        else:
+          value[i][c] = skip
+
+    planned = {}
+    c = 0
+    for i, slot in enumerate(CALENDAR):
+      if choice[i][c]:
+        planned[slot] = candidates[i][0]
+        c += 1
+      else:
+        c = 0
+    info(f"🗓️ Race plan: {len(planned)} races, {value[0][0]} fans.")
+    return planned
+
+  # Per-turn lookups, all O(1)
+  def scheduled_races(self, year_text):
+    return self.scheduled.get(parse_year(year_text), [])
+
+  def goal_race(self, year_text):
+    race = self.best.get(parse_year(year_text))
+    return race["name"] if race else None
+
+  def fan_race(self, year_text):
+    return self.planned.get(parse_year(year_text))
+
+
+def build_race_plan():
+  state.RACE_PLAN = RacePlan(state.RACE_SCHEDULE, state.APTITUDES)
+  debug(f"Planned races: {state.RACE_PLAN.planned}")
+  return state.RACE_PLAN
@@ -1,16 +1,42 @@
 import cv2
 import numpy as np
-from PIL import ImageGrab, ImageStat
+from functools import lru_cache
+from PIL import ImageStat
+
+import utils.constants as constants
 
 from utils.log import info, warning, error, debug
-from utils.screenshot import capture_region
+from utils.screenshot import capture_region, grab
+from utils.trace import traced
+from utils.metrics import MATCH_SECONDS
+
+@lru_cache(maxsize=512)
+def _load_template(path, scale):
+  template = cv2.imread(path, cv2.IMREAD_COLOR)
+  if template is None or scale == 1.0:
+    return template
+  interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+  h, w = template.shape[:2]
+  return cv2.resize(template, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=interpolation)
+
+def load_template(path, scale=None):
+  """BGR template resized for the current layout scale. Loaded and resized once per (path, scale)."""
+  return _load_template(path, constants.SCALE if scale is None else scale)
 
+def needle(path):
+  """What to hand to pyautogui.locate*: the path itself at scale 1, the cached resized template otherwise."""
+  if constants.SCALE == 1.0:
+    return path
+  return load_template(path)
+
+@traced(cat="match")
+@MATCH_SECONDS.time(fn="match_template")
 def match_template(template_path, region=None, threshold=0.85):
   # Get screenshot
   if region:
-    screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
+    screen = np.array(grab(bbox=region))  # (left, top, right, bottom)
   else:
-    screen = np.array(ImageGrab.grab())
+    screen = np.array(grab())
   screen = cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
 
 #  cv2.namedWindow("image")
@@ -18,10 +44,7 @@ def match_template(template_path, region=None, threshold=0.85):
 #  cv2.imshow("image", screen)
 #  cv2.waitKey(5)
 
-  # Load template
-  template = cv2.imread(template_path, cv2.IMREAD_COLOR)  # safe default
-  if template.shape[2] == 4:
-    template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
+  template = load_template(template_path)
   result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
   loc = np.where(result >= threshold)
 
@@ -30,19 +53,19 @@ def match_template(template_path, region=None, threshold=0.85):
 
   return deduplicate_boxes(boxes)
 
+@traced(cat="match")
+@MATCH_SECONDS.time(fn="multi_match_templates")
 def multi_match_templates(templates, screen=None, threshold=0.85):
   if screen is None:
-    screen = ImageGrab.grab()
+    screen = grab()
   screen_bgr = cv2.cvtColor(np.array(screen), cv2.COLOR_RGB2BGR)
 
   results = {}
   for name, path in templates.items():
-    template = cv2.imread(path, cv2.IMREAD_COLOR)
+    template = load_template(path)
     if template is None:
       results[name] = []
       continue
-    if template.shape[2] == 4:
-      template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
 
     result = cv2.matchTemplate(screen_bgr, template, cv2.TM_CCOEFF_NORMED)
     loc = np.where(result >= threshold)
@@ -69,12 +92,15 @@ def is_btn_active(region, treshold = 150):
   # Treshold btn
   return avg_brightness > treshold
 
-def count_pixels_of_color(color_rgb=[117,117,117], region=None, tolerance=2):
+def count_pixels_of_color(color_rgb=[117,117,117], region=None, tolerance=2, screen=None):
     # [117,117,117] is gray for missing energy, we go 2 below and 2 above so that it's more stable in recognition
-    if region:
-        screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
-    else:
+    # pass `screen` (a full-screen PIL image) to count on an already captured frame
+    if not region:
         return -1
+    if screen is not None:
+        screen = np.array(screen.crop(region))
+    else:
+        screen = np.array(grab(bbox=region))  # (left, top, right, bottom)
 
     color = np.array(color_rgb, np.uint8)
 
@@ -90,7 +116,7 @@ def find_color_of_pixel(region=None):
   if region:
     #we can only return one pixel's color here, so we take the x, y and add 1 to them
     region = (region[0], region[1], region[0]+1, region[1]+1)
-    screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
+    screen = np.array(grab(bbox=region))  # (left, top, right, bottom)
     return screen[0]
   else:
     return -1
@@ -1,27 +1,103 @@
 import json
 import os
+import re
 from datetime import datetime
 
+from utils.log import warning
+from utils.trace import traced
+from core.persistence import writer
+from core.history_db import DB_PATH, get_db
+
 LOG_DIR = "data/training_logs"
+LOG_EXTENSIONS = (".jsonl", ".json")
+DAILY_STEM = re.compile(r"\d{4}-\d{2}-\d{2}$")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# "jsonl" (daily files) or "sqlite" (core/history_db)
+BACKEND = "jsonl"
+
+def configure_storage(backend="jsonl", sqlite_path=DB_PATH):
+    global BACKEND
+    if backend == "sqlite":
+        writer.register_sink("history_db", get_db(sqlite_path).insert_many)
+    BACKEND = backend
+
+def log_path(day=None):
+    """Daily JSON-lines log, one file per day."""
+    day = day or datetime.now()
+    return os.path.join(LOG_DIR, day.strftime("%Y-%m-%d") + ".jsonl")
+
+_checked_paths = set()
+
+def _needs_newline(path):
+    """True if a previous run crashed mid-line, so the next record must start on a fresh line."""
+    if path in _checked_paths:
+        return False
+    _checked_paths.add(path)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+@traced(cat="io")
 def save_turn_data(data):
-    """Appends one training turn record to a daily JSON log file."""
-    filename = datetime.now().strftime("%Y-%m-%d") + ".json"
-    path = os.path.join(LOG_DIR, filename)
+    """Queues one training turn record as a single line of today's log (or a row in the history DB)."""
+    if BACKEND == "sqlite":
+        writer.submit("history_db", data)
+        return
+    path = log_path()
+    line = json.dumps(data, ensure_ascii=False, default=str) + "\n"
+    if _needs_newline(path):
+        line = "\n" + line
+    writer.append(path, line)
 
-    # Read existing data
-    existing = []
-    if os.path.exists(path):
+# -------------------------------------------------------------
+# Readers (understand both .jsonl and the older .json arrays)
+# -------------------------------------------------------------
+def _log_order(path):
+    # undated logs (the legacy training_logs.json) predate every daily file;
+    # a day's older .json array sorts before its .jsonl
+    name = os.path.basename(path)
+    stem = os.path.splitext(name)[0]
+    return (1, stem, name) if DAILY_STEM.match(stem) else (0, stem, name)
+
+def list_log_files(log_dir=LOG_DIR):
+    """Log files oldest first."""
+    if not os.path.exists(log_dir):
+        return []
+    return sorted(
+        (os.path.join(log_dir, f) for f in os.listdir(log_dir) if f.endswith(LOG_EXTENSIONS)),
+        key=_log_order,
+    )
+
+def latest_log_file(log_dir=LOG_DIR):
+    files = list_log_files(log_dir)
+    if not files:
+        return None
+    return max(files, key=os.path.getmtime)
+
+def iter_records(path):
+    """Yields records from a log file. A torn last line (crash mid-write) is skipped."""
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    warning(f"Skipping unreadable line {line_no} in {path}")
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                existing = json.load(f)
+            records = json.load(f)
         except json.JSONDecodeError:
-            existing = []
-
-    # Append new record
-    existing.append(data)
+            warning(f"Could not read log file: {path}")
+            return
+    yield from records
 
-    # Write updated log
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=2)
+def load_records(path):
+    return list(iter_records(path))
@@ -1,22 +1,44 @@
 import threading
 import time
+import utils.constants as constants
 from utils.log import info, warning, debug
 from core import recognizer
+from core.frame_bus import bus
 
-SCAN_INTERVAL = 1.0  # seconds between scans
+SCAN_INTERVAL = 1.0  # minimum seconds between scans
 
+# The templates career_lobby acts on, so one scan per frame serves both
+SCAN_TEMPLATES = {
+    "event": "assets/icons/event_choice_1.png",
+    "inspiration": "assets/buttons/inspiration_btn.png",
+    "next": "assets/buttons/next_btn.png",
+    "next2": "assets/buttons/next2_btn.png",
+    "cancel": "assets/buttons/cancel_btn.png",
+    "tazuna": "assets/ui/tazuna_hint.png",
+    "infirmary": "assets/buttons/infirmary_btn.png",
+    "retry": "assets/buttons/retry_btn.png",
+}
 
-def analyze_screen():
-    """Analyzes current screen to detect training/race/menu states."""
+# held while a frame is analysed, so the lobby and the scanner never match the same frame twice
+_scan_lock = threading.Lock()
+
+# low energy: at least this share of the energy bar is missing-energy grey
+LOW_ENERGY_SHARE = 0.5
+ENERGY_STRIP_HALF_HEIGHT = 5  # reference px above and below the bar's middle
+
+
+def energy_strip():
+    """(left, top, right, bottom) strip through the middle of the energy bar, in the current layout."""
+    left, top, right, bottom = constants.ENERGY_BBOX
+    middle = (top + bottom) // 2
+    half = constants.scaled(ENERGY_STRIP_HALF_HEIGHT)
+    return (left, middle - half, right, middle + half)
+
+
+def analyze_screen(frame):
+    """Analyzes a bus frame to detect training/race/menu states and publishes the result."""
     try:
-        templates = {
-            "train_btn": "assets/buttons/train.png",
-            "race_btn": "assets/buttons/race.png",
-            "rest_btn": "assets/buttons/rest.png",
-            "next_btn": "assets/buttons/next.png",
-        }
-
-        results = recognizer.multi_match_templates(templates, threshold=0.85)
+        results = recognizer.multi_match_templates(SCAN_TEMPLATES, screen=frame.image)
         found = [k for k, v in results.items() if v]
 
         if found:
@@ -24,26 +46,68 @@ def analyze_screen():
         else:
             debug("No known buttons detected — possibly loading or transition screen.")
 
-        # Optional: detect low-energy region (adjust coords if needed)
-        energy_region = (1500, 920, 1650, 940)
-        energy_gray_pixels = recognizer.count_pixels_of_color([117,117,117], energy_region)
-        if energy_gray_pixels > 500:
+        strip = energy_strip()
+        energy_gray_pixels = recognizer.count_pixels_of_color([117,117,117], strip, screen=frame.image)
+        # a full bar is 236 reference px long
+        low_energy = energy_gray_pixels > LOW_ENERGY_SHARE * constants.scaled(236) * (strip[3] - strip[1])
+        if low_energy:
             debug(f"⚡ Low energy detected ({energy_gray_pixels} gray pixels).")
 
+        return bus.publish_event("scan", frame, {
+            "found": found,
+            "boxes": results,
+            "low_energy": low_energy,
+        })
+
     except Exception as e:
         warning(f"Scanner error: {e}")
+        return None
 
 
-def scanner_loop():
-    """Main scanning loop — runs every few seconds."""
+def scanner_loop(stop_event):
+    """Scans each new frame on the bus, at most once every SCAN_INTERVAL."""
     info("🧠 Scanner thread started.")
-    while True:
-        analyze_screen()
-        time.sleep(SCAN_INTERVAL)
+    last_seq = 0
+    while not stop_event.is_set():
+        frame = bus.wait_next(last_seq, timeout=SCAN_INTERVAL * 2)
+        if frame is None:
+            if not bus.is_running():
+                break
+            continue
+        last_seq = frame.seq
+        started = time.monotonic()
+        # the lobby is analysing a frame of its own; its result is published the same way
+        if _scan_lock.acquire(blocking=False):
+            try:
+                if _scanned(frame) is None:
+                    analyze_screen(frame)
+            finally:
+                _scan_lock.release()
+        time.sleep(max(0, SCAN_INTERVAL - (time.monotonic() - started)))
+    info("🧠 Scanner thread stopped.")
+
+
+def _scanned(frame):
+    event = bus.latest_event("scan")
+    return event if event is not None and event.seq == frame.seq else None
+
+
+def detections(frame):
+    """
+    Scan result for `frame`: reused when the scanner already analysed it (waiting
+    if it is analysing it right now), otherwise computed here and published.
+    data["boxes"] has every SCAN_TEMPLATES name, [] when not found.
+    """
+    with _scan_lock:
+        event = _scanned(frame)
+        if event is None:
+            event = analyze_screen(frame)
+    return event
 
 
-def start_scanner():
-    """Starts the scanner in a background thread."""
-    t = threading.Thread(target=scanner_loop, daemon=True)
+def start_scanner(stop_event=None):
+    """Starts the scanner in a background thread, consuming frames from the shared bus."""
+    bus.start()
+    t = threading.Thread(target=scanner_loop, args=(stop_event or threading.Event(),), daemon=True)
     t.start()
     return t
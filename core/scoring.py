@@ -0,0 +1,173 @@
+"""
+Scores every training option of a turn at once.
+
+check_training's five observations become one feature matrix, and each weighting
+(priority, friendship, rainbows, learned bonus, distance bias, decision memory)
+is a vector over it. Config, aptitudes, learned averages and memory are read once
+per turn into a ScoringContext. score_trainings returns a ranked structured array
+that keeps every factor, so the log can say why a training won.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+import core.state as state
+from core.decision_memory import get_memory_biases
+
+TRAININGS = ("spd", "sta", "pwr", "guts", "wit")
+FRIENDSHIP_LEVELS = ("gray", "blue", "green", "yellow", "max")
+
+# base score = supports + hints + friendship + rainbows
+HINT_WEIGHT = 0.5
+# lower bonds weigh more: those supports still need training together.
+# yellow/max supports of the training's own type are counted as rainbows instead.
+FRIENDSHIP_WEIGHTS = np.array([1.2, 1.1, 1.0, 0.0, 0.0])
+FRIENDSHIP_SCALE = 0.1
+RAINBOW_WEIGHT = 2.0
+DISTANCE_BIAS_WEIGHT = 0.25
+
+# -------------------------------------------------------------
+# Priority weight multiplier
+# -------------------------------------------------------------
+PRIORITY_WEIGHTS_LIST = {
+    "HEAVY": 0.75,
+    "MEDIUM": 0.5,
+    "LIGHT": 0.25,
+    "NONE": 0,
+}
+
+# -------------------------------------------------------------
+# Recommended stat weights by race distance
+# -------------------------------------------------------------
+RECOMMENDED_STATS_BY_DISTANCE = {
+    "sprint": {"speed": 0.45, "power": 0.30, "stamina": 0.10, "wit": 0.10, "guts": 0.05},
+    "mile":   {"speed": 0.40, "power": 0.25, "stamina": 0.20, "wit": 0.10, "guts": 0.05},
+    "medium": {"speed": 0.35, "stamina": 0.30, "power": 0.20, "wit": 0.10, "guts": 0.05},
+    "long":   {"speed": 0.30, "stamina": 0.40, "power": 0.15, "wit": 0.10, "guts": 0.05},
+}
+STAT_NAMES = {"spd": "speed", "sta": "stamina", "pwr": "power", "guts": "guts", "wit": "wit"}
+
+SCORE_DTYPE = np.dtype([
+    ("training", "U4"),
+    ("supports", "f8"),
+    ("hints", "f8"),
+    ("friendship", "f8"),
+    ("rainbows", "f8"),
+    ("failure", "f8"),
+    ("base", "f8"),
+    ("priority", "f8"),
+    ("learned", "f8"),
+    ("distance", "f8"),
+    ("memory", "f8"),
+    ("total", "f8"),
+    ("priority_rank", "i8"),
+])
+
+# Per-training weights for one turn, each an array in TRAININGS order
+ScoringContext = namedtuple("ScoringContext", ["priority", "priority_rank", "learned", "distance", "memory", "distance_type"])
+
+
+def get_stat_priority(stat_key: str) -> int:
+    return state.PRIORITY_STAT.index(stat_key) if stat_key in state.PRIORITY_STAT else 999
+
+
+def preferred_distance(aptitudes):
+    """First distance with an A or B aptitude, "medium" when there is none."""
+    for key, grade in aptitudes.items():
+        if key.startswith("distance_") and grade.lower() in ["a", "b"]:
+            return key.replace("distance_", "")
+    return "medium"
+
+
+def scoring_context(energy_level, phase, learned=None):
+    """Everything the score depends on besides the observations, read once per turn."""
+    priority_weight = PRIORITY_WEIGHTS_LIST.get(state.PRIORITY_WEIGHT, 0.5)
+    priority_rank = np.array([get_stat_priority(t) for t in TRAININGS])
+    effects = np.array([state.PRIORITY_EFFECTS_LIST.get(rank, 0) for rank in priority_rank], dtype=float)
+
+    learned = learned or {}
+    distance_type = preferred_distance(getattr(state, "APTITUDES", {}))
+    distance_weights = RECOMMENDED_STATS_BY_DISTANCE.get(distance_type, {})
+
+    return ScoringContext(
+        priority=1 + effects * priority_weight,
+        priority_rank=priority_rank,
+        learned=np.array([learned.get(t, 0) / 100.0 for t in TRAININGS]),
+        distance=np.array([distance_weights.get(STAT_NAMES[t], 0) for t in TRAININGS]),
+        memory=get_memory_biases(phase, energy_level, TRAININGS),
+        distance_type=distance_type,
+    )
+
+
+def feature_matrix(results):
+    """
+    (trainings, counts, levels): counts has columns supports, hints, rainbows,
+    failure; levels the supports per friendship level. One row per training.
+    """
+    trainings = [t for t in TRAININGS if t in results]
+    counts = np.zeros((len(trainings), 4))
+    levels = np.zeros((len(trainings), len(FRIENDSHIP_LEVELS)))
+    for i, training in enumerate(trainings):
+        data = results[training]
+        # a rainbow is a support of the training's own type at yellow/max friendship
+        own = data.get(training, {}).get("friendship_levels", {})
+        counts[i] = (
+            data["total_supports"],
+            data.get("total_hints", 0),
+            own.get("yellow", 0) + own.get("max", 0),
+            int(data["failure"]),
+        )
+        levels[i] = [data["total_friendship_levels"].get(level, 0) for level in FRIENDSHIP_LEVELS]
+    return trainings, counts, levels
+
+
+def weighted_totals(supports, hints, levels, rainbows, priority, learned, distance, memory):
+    """
+    (friendship, base, total) of the score formula. Works on arrays of any
+    shape with trainings on the last axis (levels has the friendship levels
+    after it), so a batch of careers is scored in one call.
+    """
+    friendship = levels @ FRIENDSHIP_WEIGHTS * FRIENDSHIP_SCALE
+    base = supports + HINT_WEIGHT * hints + friendship + RAINBOW_WEIGHT * rainbows
+    total = base * priority * (1 + learned) * (1 + distance * DISTANCE_BIAS_WEIGHT) * (1 + memory)
+    return friendship, base, total
+
+
+def score_trainings(results, context):
+    """Scores for every training in `results`, best first (ties go to the higher priority stat)."""
+    trainings, counts, levels = feature_matrix(results)
+    rows = np.array([TRAININGS.index(t) for t in trainings], dtype=int)
+    supports, hints, rainbows, failure = counts.T
+
+    priority = context.priority[rows]
+    learned = context.learned[rows]
+    distance = context.distance[rows]
+    memory = context.memory[rows]
+    friendship, base, total = weighted_totals(supports, hints, levels, rainbows, priority, learned, distance, memory)
+
+    scores = np.empty(len(trainings), dtype=SCORE_DTYPE)
+    scores["training"] = trainings
+    scores["supports"] = supports
+    scores["hints"] = hints
+    scores["friendship"] = friendship
+    scores["rainbows"] = rainbows
+    scores["failure"] = failure
+    scores["base"] = base
+    scores["priority"] = priority
+    scores["learned"] = learned
+    scores["distance"] = distance
+    scores["memory"] = memory
+    scores["total"] = total
+    scores["priority_rank"] = context.priority_rank[rows]
+    return scores[np.lexsort((scores["priority_rank"], -total))]
+
+
+def breakdown(scores):
+    """One line per training with every factor, for debug logs."""
+    return [
+        f"{s['training']} -> total={s['total']:.2f} base={s['base']:.2f} (supports={s['supports']:.0f}, "
+        f"hints={s['hints']:.0f}, friendship={s['friendship']:.2f}, rainbows={s['rainbows']:.0f}) "
+        f"priority=x{s['priority']:.2f} learned={s['learned']:.2f} dist={s['distance']:.2f} "
+        f"memory={s['memory']:.2f} fail={s['failure']:.0f}%"
+        for s in scores
+    ]
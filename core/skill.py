@@ -1,47 +1,119 @@
-from utils.tools import sleep, drag_scroll
+from utils.tools import sleep, drag_scroll, input_lock
 import pyautogui
-import Levenshtein
+import re
+import cv2
+import numpy as np
+from rapidfuzz import fuzz, process
 
 import utils.constants as constants
+from utils.layout import in_window
+from utils.game_data import get_game_data
 
 from utils.log import info, warning, error, debug
-from utils.screenshot import enhanced_screenshot
+from utils.screenshot import enhanced_screenshot, capture_region
 from core.ocr import extract_text
 from core.recognizer import match_template, is_btn_active
 import core.state as state
 
+MAX_SCROLLS = 12
+# reference px, scaled with the layout like the regions in utils.constants;
+# less than the list height minus SCROLL_STRIP_HEIGHT, so measure_scroll can find the old bottom rows
+SCROLL_DISTANCE = -400
+SCROLL_STRIP_HEIGHT = 40
+# rows whose list position is within this many px of an already read row are skipped
+ROW_TOLERANCE = 10
+
+def normalize(text):
+  # ○/◎/× tell the variants of one skill apart, so they stay in the key
+  return re.sub(r"[^a-z0-9 ○◎×]", "", text.lower()).strip()
+
+class SkillIndex:
+  """Fuzzy lookup from OCR text to a canonical skill name, built once per skill list."""
+
+  def __init__(self, wanted):
+    known = get_game_data().skill_names()
+    self.choices = {normalize(name): name for name in known + list(wanted)}
+    self.wanted = {normalize(name) for name in wanted}
+
+  def resolve(self, text, threshold=0.8):
+    """Returns (canonical name, is wanted) or (None, False) when nothing is close enough."""
+    best = process.extractOne(normalize(text), self.choices.keys(), scorer=fuzz.ratio, score_cutoff=threshold * 100)
+    if not best:
+      return None, False
+    return self.choices[best[0]], best[0] in self.wanted
+
+_index_cache = {}
+
+def get_skill_index(skill_list):
+  key = tuple(skill_list)
+  if key not in _index_cache:
+    _index_cache.clear()
+    _index_cache[key] = SkillIndex(skill_list)
+  return _index_cache[key]
+
+def _list_snapshot():
+  return cv2.cvtColor(np.array(capture_region(constants.SKILL_LIST_REGION)), cv2.COLOR_RGB2GRAY)
+
+def measure_scroll(before, after):
+  """
+  How many px the list content moved up between two snapshots, found by locating
+  the bottom strip of the old snapshot (what stays visible after scrolling down)
+  in the new one. None if it can't be located.
+  """
+  strip_top = before.shape[0] - constants.scaled(SCROLL_STRIP_HEIGHT)
+  strip = before[strip_top:]
+  result = cv2.matchTemplate(after, strip, cv2.TM_CCOEFF_NORMED)
+  _, max_val, _, max_loc = cv2.minMaxLoc(result)
+  if max_val < 0.9:
+    return None
+  return strip_top - max_loc[1]
+
 def buy_skill():
-  pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
+  with input_lock():
+    pyautogui.moveTo(constants.SCROLLING_SELECTION_MOUSE_POS)
   found = False
+  index = get_skill_index(state.SKILL_LIST)
 
-  for i in range(10):
+  offset = 0  # total px scrolled, None once we lose track
+  read_positions = []
+  read_names = set()
+
+  for i in range(MAX_SCROLLS):
     if state.stop_event.is_set():
       return
-    if i > 8:
-      sleep(0.5)
-    buy_skill_icon = match_template("assets/icons/buy_skill.png", threshold=0.9)
-
-    if buy_skill_icon:
-      for x, y, w, h in buy_skill_icon:
-        region = (x - 420, y - 40, w + 275, h + 5)
-        screenshot = enhanced_screenshot(region)
-        text = extract_text(screenshot)
-        if is_skill_match(text, state.SKILL_LIST):
-          button_region = (x, y, w, h)
-          if is_btn_active(button_region):
-            info(f"Buy {text}")
+    buy_skill_icon = in_window(match_template("assets/icons/buy_skill.png", threshold=0.9))
+
+    for x, y, w, h in buy_skill_icon:
+      if offset is not None:
+        if any(abs(y + offset - seen) <= constants.scaled(ROW_TOLERANCE) for seen in read_positions):
+          continue
+        read_positions.append(y + offset)
+
+      region = (x - constants.scaled(420), y - constants.scaled(40), w + constants.scaled(275), h + constants.scaled(5))
+      screenshot = enhanced_screenshot(region)
+      text = extract_text(screenshot)
+      name, wanted = index.resolve(text)
+      if (name or text) in read_names:
+        continue
+      read_names.add(name or text)
+
+      if wanted:
+        button_region = (x, y, w, h)
+        if is_btn_active(button_region):
+          info(f"Buy {name}")
+          with input_lock():
             pyautogui.click(x=x + 5, y=y + 5, duration=0.15)
-            found = True
-          else:
-            info(f"{text} found but not enough skill points.")
+          found = True
+        else:
+          info(f"{name} found but not enough skill points.")
 
-    drag_scroll(constants.SKILL_SCROLL_BOTTOM_MOUSE_POS, -450)
+    before = _list_snapshot()
+    drag_scroll(constants.SKILL_SCROLL_BOTTOM_MOUSE_POS, constants.scaled(SCROLL_DISTANCE))
+    sleep(0.2)
+    shift = measure_scroll(before, _list_snapshot())
+    if shift is not None and shift <= 2:
+      debug(f"Skill list end reached after {i + 1} passes.")
+      break
+    offset = offset + shift if offset is not None and shift is not None else None
 
   return found
-
-def is_skill_match(text: str, skill_list: list[str], threshold: float = 0.8) -> bool:
-  for skill in skill_list:
-    similarity = Levenshtein.ratio(text.lower(), skill.lower())
-    if similarity >= threshold:
-      return True
-  return False
\ No newline at end of file
@@ -12,6 +12,11 @@ from core.ocr import extract_text, extract_number
 from core.recognizer import match_template, count_pixels_of_color, find_color_of_pixel, closest_color, multi_match_templates
 
 import utils.constants as constants
+from utils import trace, log
+from utils.trace import traced
+from core.persistence import writer
+from core.recorder import configure_storage
+from core.preview import preview
 
 stop_event = threading.Event()
 is_bot_running = False
@@ -27,6 +32,8 @@ MAX_FAILURE = None
 STAT_CAPS = None
 SKILL_LIST = None
 CANCEL_CONSECUTIVE_RACE = None
+EVENT_INDEX = None
+RACE_PLAN = None
 SLEEP_TIME_MULTIPLIER = 1
 
 def load_config():
@@ -36,14 +43,17 @@ def load_config():
 # Current trainee name (set manually or later auto-detected)
 CURRENT_CHARACTER = "Unknown"
 
-def reload_config():
+def reload_config(config=None):
   global PRIORITY_STAT, PRIORITY_WEIGHT, MINIMUM_MOOD, MINIMUM_MOOD_JUNIOR_YEAR, MAX_FAILURE
   global PRIORITIZE_G1_RACE, CANCEL_CONSECUTIVE_RACE, STAT_CAPS, IS_AUTO_BUY_SKILL, SKILL_PTS_CHECK, SKILL_LIST
   global PRIORITY_EFFECTS_LIST, SKIP_TRAINING_ENERGY, NEVER_REST_ENERGY, SKIP_INFIRMARY_UNLESS_MISSING_ENERGY, PREFERRED_POSITION
   global ENABLE_POSITIONS_BY_RACE, POSITIONS_BY_RACE, POSITION_SELECTION_ENABLED, SLEEP_TIME_MULTIPLIER
-  global WINDOW_NAME, RACE_SCHEDULE, CONFIG_NAME, USE_OPTIMAL_EVENT_CHOICE, EVENT_CHOICES
+  global WINDOW_NAME, RACE_SCHEDULE, CONFIG_NAME, USE_OPTIMAL_EVENT_CHOICE, EVENT_CHOICES, EVENT_INDEX
+  from core.events import build_event_index  # Avoid circular import
 
-  config = load_config()
+  # tools pass a config loaded in memory (update_config.merged_config) instead of config.json
+  if config is None:
+    config = load_config()
 
   PRIORITY_STAT = config["priority_stat"]
   PRIORITY_WEIGHT = config["priority_weight"]
@@ -70,8 +80,25 @@ def reload_config():
   CONFIG_NAME = config["config_name"]
   USE_OPTIMAL_EVENT_CHOICE = config["event"]["use_optimal_event_choice"]
   EVENT_CHOICES = config["event"]["event_choices"]
+  EVENT_INDEX = build_event_index(EVENT_CHOICES)
+
+  trace_config = config["trace"]
+  trace.configure(trace_config["enabled"], trace_config["buffer_size"], trace_config["export_path"])
+
+  persistence_config = config["persistence"]
+  writer.configure(persistence_config["flush_every"], persistence_config["flush_interval"])
+
+  storage_config = config["storage"]
+  configure_storage(storage_config["backend"], storage_config["sqlite_path"])
+
+  preview_config = config["preview"]
+  preview.configure(preview_config["max_fps"], preview_config["max_width"], preview_config["format"], preview_config["quality"])
+
+  log_config = config["logging"]
+  log.configure(log_config["level"], log_config["console_level"], log_config["json_format"], log_config["module_levels"], log_config["repeat_interval"])
 
 # Get Stat
+@traced(cat="ocr")
 def stat_state():
   stat_regions = {
     "spd": constants.SPD_STAT_REGION,
@@ -89,6 +116,7 @@ def stat_state():
   return result
 
 # Check support card in each training
+@traced(cat="match")
 def check_support_card(threshold=0.8, target="none"):
   SUPPORT_ICONS = {
     "spd": "assets/icons/support_card_type_spd.png",
@@ -139,7 +167,7 @@ def check_support_card(threshold=0.8, target="none"):
       x, y, w, h = match
       match_horizontal_middle = floor((2*x+w)/2)
       match_vertical_middle = floor((2*y+h)/2)
-      icon_to_friend_bar_distance = 66
+      icon_to_friend_bar_distance = constants.scaled(66)
       bbox_left = match_horizontal_middle + constants.SUPPORT_CARD_ICON_BBOX[0]
       bbox_top = match_vertical_middle + constants.SUPPORT_CARD_ICON_BBOX[1] + icon_to_friend_bar_distance
       wanted_pixel = (bbox_left, bbox_top, bbox_left+1, bbox_top+1)
@@ -151,7 +179,7 @@ def check_support_card(threshold=0.8, target="none"):
       if hint_matches:
         for hint_match in hint_matches:
           distance = abs(hint_match[1] - match[1])
-          if distance < 45:
+          if distance < constants.scaled(45):
             count_result["total_hints"] += 1
             count_result[key]["hints"] += 1
             count_result["hints_per_friend_level"][friend_level] +=1
@@ -159,6 +187,7 @@ def check_support_card(threshold=0.8, target="none"):
   return count_result
 
 # Get failure chance (idk how to get energy value)
+@traced(cat="ocr")
 def check_failure():
   failure = enhanced_screenshot(constants.FAILURE_REGION)
   failure_text = extract_text(failure).lower()
@@ -186,6 +215,7 @@ def check_failure():
   return -1
 
 # Check mood
+@traced(cat="ocr")
 def check_mood():
   mood = capture_region(constants.MOOD_REGION)
   mood_text = extract_text(mood).upper()
@@ -198,6 +228,7 @@ def check_mood():
   return "UNKNOWN"
 
 # Check turn
+@traced(cat="ocr")
 def check_turn():
     turn = enhanced_screenshot(constants.TURN_REGION)
     turn_text = extract_text(turn)
@@ -222,22 +253,26 @@ def check_turn():
     return -1
 
 # Check year
+@traced(cat="ocr")
 def check_current_year():
   year = enhanced_screenshot(constants.YEAR_REGION)
   text = extract_text(year)
   return text
 
 # Check criteria
+@traced(cat="ocr")
 def check_criteria():
   img = enhanced_screenshot(constants.CRITERIA_REGION)
   text = extract_text(img)
   return text
 
+@traced(cat="ocr")
 def check_criteria_detail():
   img = enhanced_screenshot(constants.CRITERIA_DETAIL_REGION)
   text = extract_text(img)
   return text
 
+@traced(cat="ocr")
 def check_skill_pts():
   img = enhanced_screenshot(constants.SKILL_PTS_REGION)
   text = extract_number(img)
@@ -245,6 +280,7 @@ def check_skill_pts():
 
 previous_right_bar_match=""
 
+@traced(cat="match")
 def check_energy_level(threshold=0.85):
     """
     Detects the current energy level using template matching and pixel color analysis.
@@ -271,14 +307,14 @@ def check_energy_level(threshold=0.85):
         empty_energy_pixel_count = count_pixels_of_color([117, 117, 117], MAX_ENERGY_BBOX)
 
         total_energy_length = energy_bar_length - 1
-        hundred_energy_pixel_constant = 236  # fixed for 1080p
+        hundred_energy_pixel_constant = constants.scaled(236)  # bar length at 100 energy
         previous_right_bar_match = right_bar_match
 
         # Calculate current and max energy values
         energy_level = ((total_energy_length - empty_energy_pixel_count) / hundred_energy_pixel_constant) * 100
         energy_level = max(0, min(energy_level, 100))  # clamp to [0, 100]
 
-        info(f"⚡ Energy detected: {energy_level:.2f}% (empty={empty_energy_pixel_count}, total={total_energy_length})")
+        info("⚡ Energy detected: %.2f%% (empty=%s, total=%s)", energy_level, empty_energy_pixel_count, total_energy_length)
         return energy_level, 100
 
     # --- fallback if detection failed ---
@@ -0,0 +1,202 @@
+"""
+Runs one bot worker process per emulator window.
+
+    python -m core.supervisor                       # instances from config.json
+    python -m core.supervisor --window "BlueStacks App Player 1" --window "BlueStacks App Player 2"
+
+config.json:
+    "instances": [
+        {"name": "bot1", "window": "BlueStacks App Player 1", "kind": "bluestacks", "port": 8001},
+        ...
+    ]
+
+Each worker has its own bot state, layout (calibrated from the HUD in its
+window, or derived from the window's position), log directory (logs/<name>/)
+and session id in the training records. Mouse input is serialised between
+workers with a shared lock, so the windows only need to be visible, not
+focused. Ctrl + C stops every worker.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+from utils.log import info, warning, error
+
+CONFIG_FILE = "config.json"
+MAX_RESTARTS = 3
+RESTART_DELAY = 10  # seconds
+
+
+def window_kind(title):
+    return "steam" if title.strip() == "Umamusume" else "bluestacks"
+
+
+def find_window_rect(title):
+    import pygetwindow as gw
+
+    window = next((w for w in gw.getWindowsWithTitle(title) if w.title.strip() == title), None)
+    if window is None:
+        return None
+    if window.isMinimized:
+        window.restore()
+    return (window.left, window.top, window.width, window.height)
+
+
+def load_instances(windows=None, config_file=CONFIG_FILE):
+    if windows:
+        instances = [{"window": title} for title in windows]
+    else:
+        with open(config_file, "r", encoding="utf-8") as f:
+            instances = json.load(f).get("instances", [])
+    for i, instance in enumerate(instances, 1):
+        instance.setdefault("name", f"bot{i}")
+        instance.setdefault("kind", window_kind(instance["window"]))
+        instance.setdefault("port", None)
+    return instances
+
+
+# -------------------------------------------------------------
+# Worker process
+# -------------------------------------------------------------
+def run_worker(instance, rect, stop, input_lock):
+    """Entry point of a worker process. Everything bot related is imported here, after logging is set up."""
+    from utils.log import set_log_dir
+
+    name = instance["name"]
+    set_log_dir(os.path.join("logs", name), name)
+    os.environ["SESSION_ID"] = name
+
+    import core.state as state
+    from utils.tools import set_input_lock
+    from utils.layout import Layout, use_layout
+    from core.calibration import calibrated_layout
+
+    set_input_lock(input_lock)
+    layout = calibrated_layout(instance["window"], rect, window_region=rect) or Layout.for_window(instance["kind"], *rect)
+    use_layout(layout)
+    info(f"Window \"{instance['window']}\" at {rect}, layout offset {layout.offset}.")
+
+    if instance.get("port"):
+        import uvicorn
+        from server.main import app
+
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=instance["port"], log_level="warning"))
+        threading.Thread(target=server.run, name="server", daemon=True).start()
+        info(f"Metrics and preview on http://127.0.0.1:{instance['port']}")
+
+    def watch_stop():
+        stop.wait()
+        state.stop_event.set()
+        state.is_bot_running = False
+
+    threading.Thread(target=watch_stop, name="stop-watcher", daemon=True).start()
+
+    import main as bot
+
+    state.is_bot_running = True
+    bot.main(focus=False)
+    # main() logs and swallows errors, so a career that ended without a stop request crashed
+    if not stop.is_set() and state.is_bot_running:
+        sys.exit(1)
+
+
+# -------------------------------------------------------------
+# Supervisor
+# -------------------------------------------------------------
+class Supervisor:
+    def __init__(self, instances):
+        self.instances = instances
+        self.ctx = mp.get_context("spawn")
+        self.stop = self.ctx.Event()
+        # re-entrant: click() is called while a caller already holds the lock (e.g. check_training)
+        self.input_lock = self.ctx.RLock()
+        self.workers = {}
+        self.restarts = {}
+        self.restart_at = {}  # name -> time.monotonic() when a crashed worker is respawned
+
+    def spawn(self, instance):
+        rect = find_window_rect(instance["window"])
+        if rect is None:
+            error(f"[{instance['name']}] Window \"{instance['window']}\" not found.")
+            return None
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(instance, rect, self.stop, self.input_lock),
+            name=f"bot-{instance['name']}",
+        )
+        process.start()
+        info(f"[{instance['name']}] Worker started (pid {process.pid}).")
+        return process
+
+    def run(self):
+        for instance in self.instances:
+            self.workers[instance["name"]] = self.spawn(instance)
+            self.restarts[instance["name"]] = 0
+
+        try:
+            while not self.stop.is_set() and any(self.workers.values()):
+                time.sleep(1)
+                for instance in self.instances:
+                    self.check(instance)
+        except KeyboardInterrupt:
+            info("Stopping all workers...")
+        finally:
+            self.shutdown()
+
+    def check(self, instance):
+        name = instance["name"]
+        restart_at = self.restart_at.get(name)
+        if restart_at is not None:
+            # respawned on a later tick, so other workers stay monitored during the delay
+            if time.monotonic() >= restart_at:
+                del self.restart_at[name]
+                self.workers[name] = self.spawn(instance)
+            return
+
+        process = self.workers.get(name)
+        if process is None or process.is_alive():
+            return
+        if process.exitcode == 0:
+            info(f"[{name}] Worker finished.")
+            self.workers[name] = None
+            return
+        if self.restarts[name] >= MAX_RESTARTS:
+            error(f"[{name}] Worker exited (code {process.exitcode}) too many times, giving up.")
+            self.workers[name] = None
+            return
+        self.restarts[name] += 1
+        warning(f"[{name}] Worker exited (code {process.exitcode}), restarting in {RESTART_DELAY}s ({self.restarts[name]}/{MAX_RESTARTS}).")
+        self.restart_at[name] = time.monotonic() + RESTART_DELAY
+
+    def shutdown(self, timeout=15):
+        self.stop.set()
+        for name, process in self.workers.items():
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                warning(f"[{name}] Worker did not stop in time, terminating.")
+                process.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one bot per emulator window.")
+    parser.add_argument("--window", action="append", help="window title (repeatable); defaults to config.json \"instances\"")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    args = parser.parse_args(argv)
+
+    from update_config import update_config
+    update_config()
+    instances = load_instances(args.window, args.config)
+    if not instances:
+        error("No instances configured. Add \"instances\" to config.json or pass --window.")
+        return
+    Supervisor(instances).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,58 @@
-from utils.tools import sleep
-import pygetwindow as gw
 import threading
 import uvicorn
-import keyboard
-import pyautogui
 import time
 import traceback
-import subprocess, sys, os
+import sys
 
-import utils.constants as constants
+from utils.layout import Layout, use_layout
 from utils.log import info, warning, error, debug
 
-from core.execute import career_lobby
-import core.state as state
+from utils import trace
 from server.main import app
 from update_config import update_config
-from core.scanner import start_scanner
+from core.frame_bus import bus
+from core.persistence import writer
+
+# pyautogui, pygetwindow, keyboard and the bot itself (core.state pulls in OCR
+# and torch) are imported where they're used, so the config server is up
+# before they have loaded. warm_up() loads them in the background.
 
 hotkey = "f1"
 
 
+# -------------------------------------------------------------
+# Scale regions to the screen the game runs on
+# -------------------------------------------------------------
+def use_screen_layout(kind):
+    import pyautogui
+
+    width, height = pyautogui.size()
+    layout = use_layout(Layout.for_screen(kind, width, height))
+    if layout.scale != 1.0:
+        info(f"Screen is {width} x {height}, scaling layout by {layout.scale:.3f}.")
+    return layout
+
+
+def use_calibrated_layout(title, window=None):
+    """Layout from the HUD anchors (cached per window title); None if the HUD isn't on screen."""
+    from core.calibration import calibrated_layout
+
+    rect = (window.left, window.top, window.width, window.height) if window else None
+    layout = calibrated_layout(title, rect)
+    if layout is None:
+        return None
+    return use_layout(layout)
+
+
 # -------------------------------------------------------------
 # Focus the Umamusume window
 # -------------------------------------------------------------
 def focus_umamusume():
+    import pygetwindow as gw
+    import pyautogui
+    import core.state as state
+    from utils.tools import sleep
+
     try:
         win = gw.getWindowsWithTitle("Umamusume")
         target_window = next((w for w in win if w.title.strip() == "Umamusume"), None)
@@ -40,7 +69,6 @@ def focus_umamusume():
                 error(f"Couldn't find target window named \"{state.WINDOW_NAME}\". Please double check your window name config.")
                 return False
 
-            constants.adjust_constants_x_coords()
             if target_window.isMinimized:
                 target_window.restore()
             else:
@@ -48,12 +76,17 @@ def focus_umamusume():
                 sleep(0.2)
                 target_window.restore()
                 sleep(0.5)
+            # already calibrated (or the HUD is visible as is): no need to go fullscreen
+            if use_calibrated_layout(state.WINDOW_NAME, target_window):
+                return True
             pyautogui.press("esc")
             pyautogui.press("f11")
             time.sleep(5)
             close_btn = pyautogui.locateCenterOnScreen("assets/buttons/bluestacks/close_btn.png", confidence=0.8, minSearchTime=2)
             if close_btn:
                 pyautogui.click(close_btn)
+            if not use_calibrated_layout(state.WINDOW_NAME):
+                use_screen_layout("bluestacks")
             return True
 
         if target_window.isMinimized:
@@ -63,6 +96,8 @@ def focus_umamusume():
             sleep(0.2)
             target_window.restore()
             sleep(0.5)
+        if not use_calibrated_layout("Umamusume", target_window):
+            use_screen_layout("steam")
     except Exception as e:
         error(f"Error focusing window: {e}")
         return False
@@ -72,20 +107,28 @@ def focus_umamusume():
 # -------------------------------------------------------------
 # Main bot entrypoint
 # -------------------------------------------------------------
-def main():
+def main(focus=True):
+    """Runs one career. focus=False skips window focusing (supervised workers, see core/supervisor)."""
+    import core.state as state
+    from core.execute import career_lobby
+    from core.scanner import start_scanner
+    from core.decision_memory import flush_memory
+    from core.learner import flush_learner
+
     print("Uma Auto!")
     try:
         state.reload_config()
         state.stop_event.clear()
+        writer.start()
 
-        if focus_umamusume():
+        if not focus or focus_umamusume():
             info(f"Config: {state.CONFIG_NAME}")
 
             # Visualization disabled
             info("📊 Visualization disabled (no training graph will open).")
 
-            # --- Start real-time scanning thread ---
-            start_scanner()
+            # --- Start real-time scanning thread (shares the frame bus capture) ---
+            start_scanner(state.stop_event)
             info("🔎 Real-time scanner initialized.")
 
             # --- Start the main training loop ---
@@ -96,13 +139,23 @@ def main():
         error_message = traceback.format_exc()
         error(f"Error in main thread: {error_message}")
     finally:
-        debug("[BOT] Stopped.")
+        bus.stop()
+        flush_memory()
+        flush_learner()
+        writer.stop()
+        if trace.ENABLED:
+            trace.export_chrome_trace()
+    debug("[BOT] Stopped.")
 
 
 # -------------------------------------------------------------
 # Hotkey listener (start/stop bot)
 # -------------------------------------------------------------
 def hotkey_listener():
+    import keyboard
+    import core.state as state
+    from utils.tools import sleep
+
     while True:
         keyboard.wait(hotkey)
         with state.bot_lock:
@@ -119,6 +172,9 @@ def hotkey_listener():
                     else:
                         debug("[BOT] Bot stopped completely")
 
+                # make sure queued records hit the disk even if the bot thread is still winding down
+                writer.flush()
+
                 state.bot_thread = None
             else:
                 debug("[BOT] Starting...")
@@ -128,14 +184,31 @@ def hotkey_listener():
         sleep(0.5)
 
 
+# -------------------------------------------------------------
+# Load the bot in the background while the server starts
+# -------------------------------------------------------------
+def warm_up():
+    """Imports the bot and loads the OCR model, so the first F1 press doesn't wait on them."""
+    started = time.perf_counter()
+    try:
+        import pyautogui
+        import core.execute
+        from core.ocr import get_reader
+
+        res = pyautogui.resolution()
+        if res.width * 9 != res.height * 16:
+            warning(f"Your resolution is {res.width} x {res.height}. Layouts assume a 16:9 screen, detection may be off.")
+        get_reader()
+    except Exception as e:
+        warning(f"Failed to preload the bot: {e}")
+        return
+    debug(f"Bot and OCR model loaded in {time.perf_counter() - started:.1f}s.")
+
+
 # -------------------------------------------------------------
 # Start server for web config
 # -------------------------------------------------------------
 def start_server():
-    res = pyautogui.resolution()
-    if res.width != 1920 or res.height != 1080:
-        error(f"Your resolution is {res.width} x {res.height}. Please set your screen to 1920 x 1080.")
-        return
     host = "127.0.0.1"
     port = 8000
     info(f"Press '{hotkey}' to start/stop the bot.")
@@ -149,6 +222,11 @@ def start_server():
 # Entry point
 # -------------------------------------------------------------
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from tools.startup_profile import main as profile_startup
+        sys.exit(profile_startup(sys.argv[sys.argv.index("--profile-startup") + 1:]))
+
     update_config()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
     threading.Thread(target=hotkey_listener, daemon=True).start()
     start_server()
@@ -1,9 +1,14 @@
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import json
 import os
 
 from server.utils import load_config, save_config
+from core.live_feed import feed
+from utils import metrics
+from core.preview import preview
 
 app = FastAPI()
 
@@ -24,6 +29,107 @@ def update_config(new_config: dict):
   save_config(new_config)
   return {"status": "success", "data": new_config}
 
+# -------------------------------------------------------------
+# Live training stream (Server-Sent Events)
+# -------------------------------------------------------------
+HEARTBEAT_SECONDS = 15
+
+def event_to_json(event):
+  return {"id": event.seq, "kind": event.kind, "timestamp": event.timestamp, "data": event.data}
+
+def format_sse(event):
+  payload = json.dumps(event_to_json(event), ensure_ascii=False, default=str)
+  return f"id: {event.seq}\nevent: {event.kind}\ndata: {payload}\n\n"
+
+@app.get("/stream/recent")
+def stream_recent(kind: str = None, limit: int = 100):
+  return [event_to_json(e) for e in feed.recent(kind, limit)]
+
+@app.get("/stream")
+async def stream(request: Request, kinds: str = None, history: int = 0):
+  """
+  Pushes turn records, energy readings and decisions as the bot produces them.
+  `kinds` filters by event type (comma separated), `history` replays the last
+  N events on connect; reconnecting clients resume from Last-Event-ID.
+  """
+  wanted = set(kinds.split(",")) if kinds else None
+  after_seq = None
+  last_id = request.headers.get("last-event-id")
+  if last_id and last_id.isdigit():
+    after_seq = int(last_id)
+  elif history > 0:
+    recent = feed.recent(limit=history)
+    after_seq = recent[0].seq - 1 if recent else None
+  sub = feed.subscribe(after_seq)
+
+  async def events():
+    try:
+      yield "retry: 2000\n\n"
+      while not await request.is_disconnected():
+        try:
+          event = await sub.get(timeout=HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+          yield ": keep-alive\n\n"
+          continue
+        if wanted is None or event.kind in wanted:
+          yield format_sse(event)
+    finally:
+      feed.unsubscribe(sub)
+
+  return StreamingResponse(events(), media_type="text/event-stream", headers={
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+  })
+
+# -------------------------------------------------------------
+# Prometheus metrics
+# -------------------------------------------------------------
+@app.get("/metrics")
+def get_metrics():
+  return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# -------------------------------------------------------------
+# Live frame preview (MJPEG / WebP)
+# -------------------------------------------------------------
+@app.get("/preview")
+async def preview_stream(request: Request):
+  """multipart/x-mixed-replace stream; works directly in an <img> tag."""
+  boundary = "frame"
+
+  async def frames():
+    preview.add_viewer()
+    last_seq = 0
+    try:
+      while not await request.is_disconnected():
+        latest = preview.latest()
+        if latest is None or latest[0] <= last_seq:
+          await asyncio.sleep(1 / preview.max_fps / 2)
+          continue
+        last_seq, data = latest
+        yield (
+          f"--{boundary}\r\nContent-Type: {preview.media_type}\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+          + data + b"\r\n"
+        )
+    finally:
+      preview.remove_viewer()
+
+  return StreamingResponse(frames(), media_type=f"multipart/x-mixed-replace; boundary={boundary}", headers={
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+  })
+
+@app.get("/preview/frame")
+async def preview_frame():
+  preview.add_viewer()
+  try:
+    latest = preview.latest()
+    if latest is None:
+      latest = await asyncio.to_thread(preview.wait_next, 0, 3.0)
+  finally:
+    preview.remove_viewer()
+  if latest is None:
+    return Response(status_code=204)
+  return Response(latest[1], media_type=preview.media_type, headers={"Cache-Control": "no-store"})
+
 PATH = "web/dist"
 
 @app.get("/")
@@ -0,0 +1,49 @@
+from core import race_list
+
+YEAR = "Junior Year Early Dec"
+
+
+def resolve(text, box=(0, 0, 200, 20)):
+    return race_list._resolve_row([(box, text)], race_list.candidates_for(YEAR))
+
+
+def test_g1_row_resolves_to_race():
+    row = resolve("Asahi Hai Futurity Stakes G1 Turf 1600m")
+    assert row.name == "Asahi Hai Futurity Stakes"
+    assert row.grade == "G1"
+
+
+def test_roman_grade_is_read_by_length():
+    assert resolve("Asahi Hai Futurity Stakes GI Turf 1600m").grade == "G1"
+    assert resolve("Asahi Hai Futurity Stakes GIII Turf 1600m").grade == "G3"
+
+
+def test_g2_row_is_rejected():
+    row = resolve("Asahi Hai Futurity Stakes G2 Turf 1600m")
+    assert row.grade == "G2"
+    assert row.name is None
+
+
+def test_g3_row_with_space_is_rejected():
+    row = resolve("Asahi Hai Futurity Stakes G 3 Turf 1600m")
+    assert row.grade == "G3"
+    assert row.name is None
+
+
+def test_click_point_at_half_scale(monkeypatch):
+    # a 960x540 window: regions are halved and OCR images are enlarged 4x
+    monkeypatch.setattr(race_list.constants, "SCALE", 0.5)
+    monkeypatch.setattr(race_list.constants, "RACE_LIST_BOX_REGION", (130, 290, 292, 145))
+    left, top, width, height = race_list.constants.RACE_LIST_BOX_REGION
+
+    # bottom-right row of the 1168x580 OCR image
+    row = resolve("Asahi Hai Futurity Stakes G1 Turf 1600m", box=(900, 520, 260, 56))
+    assert row.center == (130 + round(2060 / 8), 290 + round(1096 / 8))
+    assert left <= row.center[0] < left + width
+    assert top <= row.center[1] < top + height
+
+
+def test_click_point_at_reference_scale():
+    row = resolve("Asahi Hai Futurity Stakes G1 Turf 1600m", box=(100, 40, 400, 40))
+    left, top = race_list.constants.RACE_LIST_BOX_REGION[:2]
+    assert row.center == (left + 150, top + 30)
@@ -0,0 +1,186 @@
+"""
+Recognition benchmark over the labelled frame corpus in data/bench.
+
+Run from the repository root:
+    python -m tools.bench [--corpus data/bench/labels.json] [--repeat 5] [--output bench.json] [--baseline old.json]
+
+Every frame is served to the recognisers through utils.screenshot.set_frame_source,
+so nothing is captured from the real screen. The sim_*.png frames are drawn
+and labelled by tools/bench_corpus.py.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+import core.state as state
+from core.ocr import clear_cache
+from core.recognizer import multi_match_templates
+from core.scanner import SCAN_TEMPLATES
+from utils.screenshot import set_frame_source
+
+DEFAULT_CORPUS = os.path.join("data", "bench", "labels.json")
+ENERGY_TOLERANCE = 5
+
+# Same template set career_lobby matches every iteration
+LOBBY_TEMPLATES = SCAN_TEMPLATES
+
+
+# -------------------------------------------------------------
+# Recognisers under test: name -> (call, is_correct(result, label))
+# -------------------------------------------------------------
+def _run_aptitudes():
+    state.APTITUDES.clear()
+    state.check_aptitudes()
+    return dict(state.APTITUDES)
+
+
+def _support_matches(result, label):
+    for key, expected in label.items():
+        actual = result.get(key)
+        if isinstance(actual, dict) and "supports" in actual:
+            actual = actual["supports"]
+        if actual != expected:
+            return False
+    return True
+
+
+def _equals(result, label):
+    return result == label
+
+
+BENCHMARKS = {
+    "check_energy_level": (state.check_energy_level, lambda result, label: abs(result[0] - label) <= ENERGY_TOLERANCE),
+    "check_support_card": (state.check_support_card, _support_matches),
+    "check_failure": (state.check_failure, _equals),
+    "check_turn": (state.check_turn, _equals),
+    "check_mood": (state.check_mood, _equals),
+    "stat_state": (state.stat_state, _equals),
+    "check_aptitudes": (_run_aptitudes, _equals),
+    "multi_match_templates": (
+        lambda: multi_match_templates(LOBBY_TEMPLATES),
+        lambda result, label: sorted(k for k, v in result.items() if v) == sorted(label),
+    ),
+}
+
+
+# -------------------------------------------------------------
+# Corpus loading
+# -------------------------------------------------------------
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    frames = []
+    for entry in manifest.get("frames", []):
+        image = Image.open(entry["path"]).convert("RGB")
+        if image.size != (1920, 1080):
+            print(f"⚠️ Skipping {entry['path']}: expected 1920x1080, got {image.size[0]}x{image.size[1]}")
+            continue
+        frames.append((entry["path"], image, entry.get("labels", {})))
+    return frames
+
+
+# -------------------------------------------------------------
+# Benchmark runner
+# -------------------------------------------------------------
+def run_benchmark(frames, names=None, repeat=5):
+    report = {}
+    for name, (fn, is_correct) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+
+        timings = []
+        labelled = 0
+        correct = 0
+        failures = []
+        for path, image, labels in frames:
+            set_frame_source(lambda image=image: image)
+            result = None
+            for _ in range(repeat):
+                clear_cache()  # time real OCR work, not result cache hits
+                start = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - start)
+
+            if name in labels:
+                labelled += 1
+                if is_correct(result, labels[name]):
+                    correct += 1
+                else:
+                    failures.append({"frame": path, "expected": labels[name], "actual": result})
+        set_frame_source(None)
+
+        timings_ms = np.array(timings) * 1000
+        report[name] = {
+            "samples": len(timings),
+            "p50_ms": round(float(np.percentile(timings_ms, 50)), 3) if len(timings) else None,
+            "p95_ms": round(float(np.percentile(timings_ms, 95)), 3) if len(timings) else None,
+            "mean_ms": round(float(timings_ms.mean()), 3) if len(timings) else None,
+            "throughput_per_s": round(1000 / float(timings_ms.mean()), 2) if len(timings) and timings_ms.mean() > 0 else None,
+            "labelled": labelled,
+            "accuracy": round(correct / labelled, 4) if labelled else None,
+            "failures": failures,
+        }
+    return report
+
+
+def compare(report, baseline):
+    """Print p50 and accuracy deltas against a previous run."""
+    print(f"{'function':<24}{'p50 ms':>12}{'base':>12}{'ratio':>8}{'acc':>8}{'base':>8}")
+    for name, current in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("p50_ms") or not current.get("p50_ms"):
+            continue
+        ratio = current["p50_ms"] / old["p50_ms"]
+        print(f"{name:<24}{current['p50_ms']:>12.2f}{old['p50_ms']:>12.2f}{ratio:>8.2f}{str(current['accuracy']):>8}{str(old['accuracy']):>8}")
+
+
+# -------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark recognisers over the golden frame corpus.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=5, help="calls per frame per function")
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="subset of functions to run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    frames = load_corpus(args.corpus)
+    if not frames:
+        print("⚠️ No frames in corpus.")
+        return 1
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "corpus": args.corpus,
+        "frames": len(frames),
+        "repeat": args.repeat,
+        "results": run_benchmark(frames, args.only, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"✅ Benchmark report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2, default=str))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
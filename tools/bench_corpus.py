@@ -0,0 +1,141 @@
+"""
+Draws the synthetic frames of the benchmark corpus with tools/sim_game.py and
+appends them, labelled from the sim's own state, to data/bench/labels.json.
+
+Run from the repository root:
+    python -m tools.bench_corpus [--out data/bench] [--seed 0]
+
+Together the frames label every recogniser in tools/bench.py BENCHMARKS: a lobby,
+a training screen with supports and a hint, an event and the aptitude panel.
+Entries already in the manifest (such as the captured screenshot.png) are kept;
+generated entries with the same path are replaced.
+"""
+import argparse
+import json
+import os
+import sys
+
+import utils.constants as constants
+from tools import sim_game
+from tools.sim_game import CareerSim, Support
+
+OUT_DIR = os.path.join("data", "bench")
+APTITUDE_KEYS = (
+    ("surface_turf", "surface_dirt"),
+    ("distance_sprint", "distance_mile", "distance_medium", "distance_long"),
+    ("style_front", "style_pace", "style_late", "style_end"),
+)
+APTITUDES = {
+    "surface_turf": "a", "surface_dirt": "g",
+    "distance_sprint": "c", "distance_mile": "b", "distance_medium": "a", "distance_long": "e",
+    "style_front": "d", "style_pace": "a", "style_late": "b", "style_end": "f",
+}
+
+
+def _hud_labels(sim):
+    return {
+        "check_energy_level": sim.energy,
+        "check_mood": sim_game.MOODS[sim.mood],
+        "check_turn": sim.turns_left(),
+        "stat_state": dict(sim.stats),
+    }
+
+
+def _sim(seed, turn, energy, mood, stats):
+    sim = CareerSim(seed=seed)
+    sim.turn = turn
+    sim.energy = energy
+    sim.mood = mood
+    sim.stats = dict(zip(sim_game.STATS, stats))
+    return sim
+
+
+def lobby_frame(seed):
+    sim = _sim(seed, turn=20, energy=74, mood=3, stats=(312, 248, 270, 166, 205))
+    sim.condition = True
+    labels = _hud_labels(sim)
+    labels["multi_match_templates"] = ["infirmary", "tazuna"]
+    return sim.frame(), f"{sim.year_text()} lobby, infirmary lit", labels
+
+
+def training_frame(seed):
+    sim = _sim(seed, turn=33, energy=41, mood=2, stats=(540, 388, 421, 240, 301))
+    # bonds give gray, blue, yellow and max friendship bars
+    sim.bonds = [5, 85, 25, 62, 0, 30]
+    sim.screen = "training"
+    sim.selected = "spd"
+    sim.placement = {training: [] for training in sim_game.STATS}
+    sim.placement["spd"] = [Support("spd", 0, False), Support("spd", 1, True), Support("pwr", 3, False), Support("friend", 5, False)]
+    labels = _hud_labels(sim)
+    labels.update({
+        "check_failure": sim.failure_rate("spd"),
+        "check_support_card": {"total_supports": 4, "total_hints": 1, "spd": 2, "pwr": 1, "friend": 1, "sta": 0, "guts": 0, "wit": 0},
+        "multi_match_templates": [],
+    })
+    return sim.frame(), f"{sim.year_text()} speed training, four supports, one hint", labels
+
+
+def event_frame(seed):
+    sim = _sim(seed, turn=50, energy=58, mood=1, stats=(701, 512, 566, 302, 388))
+    sim.screen = "event"
+    sim.event = "Study Session"
+    labels = _hud_labels(sim)
+    labels["multi_match_templates"] = ["event"]
+    return sim.frame(), f"{sim.year_text()} event '{sim.event}'", labels
+
+
+def aptitude_frame(seed):
+    """The lobby with the full stats aptitude grid drawn where check_aptitudes crops it."""
+    sim = _sim(seed, turn=14, energy=100, mood=2, stats=(180, 150, 160, 120, 140))
+    image = sim.frame().copy()
+    left, top, width, height = constants.FULL_STATS_APTITUDE_REGION
+    image.paste((250, 250, 252), (left, top, left + width, top + height))
+    cell_w, cell_h = width // 4, height // 3
+    for row, keys in enumerate(APTITUDE_KEYS):
+        for column, key in enumerate(keys):
+            grade = sim_game._asset(f"assets/ui/aptitude_{APTITUDES[key]}.png")
+            x = left + column * cell_w + (cell_w - grade.width) // 2
+            y = top + row * cell_h + (cell_h - grade.height) // 2
+            image.paste(grade, (x, y))
+    labels = {"check_aptitudes": dict(APTITUDES), "check_energy_level": sim.energy}
+    return image, f"Full stats aptitude grid over the {sim.year_text()} lobby", labels
+
+
+FRAMES = {
+    "lobby": lobby_frame,
+    "training": training_frame,
+    "event": event_frame,
+    "aptitudes": aptitude_frame,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draw and label the synthetic benchmark frames.")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.join(args.out, "labels.json")
+    manifest = {"frames": []}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    generated = []
+    for name, draw in FRAMES.items():
+        image, description, labels = draw(args.seed)
+        path = os.path.join(args.out, f"sim_{name}.png").replace(os.sep, "/")
+        image.save(path)
+        generated.append({"path": path, "description": description, "labels": labels})
+        print(f"✅ {path}: {', '.join(labels)}")
+
+    paths = {entry["path"] for entry in generated}
+    manifest["frames"] = [entry for entry in manifest.get("frames", []) if entry["path"] not in paths] + generated
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
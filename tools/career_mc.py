@@ -0,0 +1,465 @@
+"""
+Monte-Carlo evaluation of the training policy over thousands of simulated careers,
+for tuning core/logic's thresholds without emulator time.
+
+Careers follow the rules of tools/sim_game.py (gains, energy costs, failure,
+mood, friendship, hints, events) without drawing any screen. A batch of careers
+is a set of NumPy arrays stepped one turn at a time. Two policies decide the turns:
+
+    vector  do_something's rules on the whole batch at once, with the same
+            weights (core.scoring) and energy tiers (core.logic)
+    logic   the real core.logic.do_something, one career at a time, reading
+            the simulated career through StubObservations
+
+Run from the repository root:
+    python -m tools.career_mc [--careers 10000] [--policy vector|logic] [--workers 4] [--seed 0]
+                              [--set core.logic.REST_ENERGY=25 ...] [--memory] [--json]
+
+--set overrides a module constant or config setting in every worker, e.g.
+core.scoring.RAINBOW_WEIGHT=3, core.decision_memory.BIAS_SCALE=0.2 or
+core.state.MAX_FAILURE=20. --memory scores with data/decision_memory.json
+(read only); by default the memory bias is zero so runs are reproducible.
+Races, race days and conditions are not simulated, as in tools/sim_game.py.
+"""
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+from tools import sim_game as rules
+
+CAREERS = 10_000
+TRAININGS = rules.STATS
+KINDS = TRAININGS + ("friend",)
+ACTIONS = TRAININGS + ("rest", "recreation")
+REST = ACTIONS.index("rest")
+RECREATION = ACTIONS.index("recreation")
+FRIENDSHIP_LEVELS = ("gray", "blue", "green", "yellow", "max")
+RAINBOW_LEVEL = FRIENDSHIP_LEVELS.index("yellow")
+FAILURE_MARGIN = 5  # check_training's margin around MAX_FAILURE
+
+# the rules of tools/sim_game.py as arrays: rows are trainings, columns stats
+LEVEL_THRESHOLDS = np.array(sorted(threshold for threshold, _ in rules.FRIENDSHIP_COLORS)[1:])
+GAINS = np.array([[rules.TRAINING_GAINS[t].get(s, 0) for s in rules.STATS] for t in TRAININGS], dtype=float)
+ENERGY_COST = np.array([rules.ENERGY_COST[t] for t in TRAININGS], dtype=float)
+SKILL_PTS_GAIN = np.array([rules.SKILL_PTS_GAIN[t] for t in TRAININGS])
+FAILURE_FREE_ENERGY = np.array([rules.FAILURE_FREE_ENERGY[t] for t in TRAININGS], dtype=float)
+FAILURE_PER_ENERGY = np.array([rules.FAILURE_PER_ENERGY[t] for t in TRAININGS])
+MOOD_MULTIPLIER = np.array(rules.MOOD_MULTIPLIER)
+SUMMER = np.array([rules.is_summer(turn) for turn in range(rules.CAREER_TURNS)])
+# index into core.decision_memory.PHASES (early, mid, late) per turn
+PHASE = np.array([rules.YEARS.index(year) for year, _ in rules.CALENDAR])
+
+# the first choice of each event, which the bot picks for events it doesn't know:
+# columns energy, mood, skill points, then the stats
+EVENT_EFFECTS = np.array([
+    [first.get("energy", 0), first.get("mood", 0), first.get("skill_pts", 0)] + [first.get(s, 0) for s in rules.STATS]
+    for first, _ in (rules.EVENTS[name] for name in sorted(rules.EVENTS))
+], dtype=float)
+
+
+def reported_failure(failure, max_failure, margin=FAILURE_MARGIN):
+    """
+    The failure rates check_training reports: once one training is clearly
+    above or below MAX_FAILURE it stops reading them for the others (wit last).
+    """
+    reported = failure.copy()
+    mode = np.zeros(len(failure), dtype=int)  # 0 check all, 1 no train, 2 train
+    for t in range(len(TRAININGS) - 1):
+        f = failure[:, t]
+        high = (mode == 0) & (f > max_failure + margin)
+        low = (mode == 0) & (f < max_failure - margin)
+        reported[:, t] = np.select([mode == 1, mode == 2, high, low], [max_failure + margin, 0, max_failure + margin, 0], f)
+        mode = np.select([mode != 0, high, low], [mode, 1, 2], 0)
+    reported[:, -1] = np.where(mode == 2, 0, failure[:, -1])
+    return reported
+
+
+class Careers:
+    """`n` careers stepped together, one turn per step()."""
+
+    def __init__(self, n, rng, deck=rules.DEFAULT_DECK, max_failure=None):
+        self.n = n
+        self.rng = rng
+        self.max_failure = max_failure
+        self.kinds = np.array([KINDS.index(kind) for kind in deck])
+        self.turn = 0
+        self.energy = np.full(n, 100.0)
+        self.mood = np.full(n, 2)
+        self.stats = np.full((n, len(rules.STATS)), float(rules.START_STAT))
+        self.skill_pts = np.full(n, 120)
+        self.bonds = np.zeros((n, len(deck)))
+        self.actions = np.zeros((n, len(ACTIONS)), dtype=int)
+        self.failures = np.zeros(n, dtype=int)
+        self.deal()
+
+    def deal(self):
+        """Supports turn up at random trainings; computes what check_training would read."""
+        n, d = self.bonds.shape
+        present = self.rng.random((n, d)) >= rules.ABSENT_CHANCE
+        self.placement = np.where(present, self.rng.integers(0, len(TRAININGS), (n, d)), -1)
+        self.hints = self.rng.random((n, d)) < rules.HINT_CHANCE
+        self.level = np.searchsorted(LEVEL_THRESHOLDS, self.bonds, side="right")
+
+        at = (self.placement[..., None] == np.arange(len(TRAININGS))).astype(np.int16)  # (careers, deck, trainings)
+        own = (self.kinds[:, None] == np.arange(len(TRAININGS)))[None]
+        self.supports = at.sum(1)
+        self.hint_counts = (at * self.hints[..., None]).sum(1)
+        self.levels = np.einsum("ndt,ndl->ntl", at, (self.level[..., None] == np.arange(len(FRIENDSHIP_LEVELS))).astype(np.int16))
+        self.rainbows = (at * own * (self.level >= RAINBOW_LEVEL)[..., None]).sum(1)
+
+        missing = np.maximum(0, FAILURE_FREE_ENERGY - self.energy[:, None])
+        self.failure = np.minimum(99, np.floor(missing * FAILURE_PER_ENERGY))
+        self.reported = self.failure if self.max_failure is None else reported_failure(self.failure, self.max_failure)
+
+    def step(self, actions):
+        rows = np.arange(self.n)
+        train = actions < REST
+        t = np.where(train, actions, 0)
+        failed = train & (self.rng.random(self.n) * 100 < self.failure[rows, t])
+        done = train & ~failed
+
+        multiplier = MOOD_MULTIPLIER[self.mood] * (1 + rules.SUPPORT_BONUS * self.supports[rows, t] + rules.RAINBOW_BONUS * self.rainbows[rows, t])
+        self.stats = np.minimum(rules.STAT_CAP, self.stats + np.rint(GAINS[t] * multiplier[:, None]) * done[:, None])
+        self.energy -= np.where(done, ENERGY_COST[t], 0)
+        self.skill_pts += np.where(done, SKILL_PTS_GAIN[t] + rules.HINT_SKILL_PTS * self.hint_counts[rows, t], 0)
+        self.bonds = np.minimum(100, self.bonds + rules.BOND_GAIN * (done[:, None] & (self.placement == t[:, None])))
+        self.energy += np.where(failed, rules.FAILED_TRAINING["energy"], 0)
+        self.mood += np.where(failed, rules.FAILED_TRAINING["mood"], 0)
+
+        rest = actions == REST
+        recreation = actions == RECREATION
+        if SUMMER[self.turn]:
+            # one "rest & recreation" button in summer camp
+            self.energy += np.where(rest | recreation, rules.SUMMER_REST_ENERGY, 0)
+            self.mood += rest | recreation
+        else:
+            self.energy += np.where(rest, rules.REST_ENERGY, 0) + np.where(recreation, rules.RECREATION_ENERGY, 0)
+            self.mood += recreation
+
+        self.actions[rows, actions] += 1
+        self.failures += failed
+        self._end_turn()
+
+    def _end_turn(self):
+        self.turn += 1
+        self.mood -= self.rng.random(self.n) < rules.MOOD_DROP_CHANCE
+        events = self.rng.random(self.n) < rules.EVENT_CHANCE
+        effects = EVENT_EFFECTS[self.rng.integers(0, len(EVENT_EFFECTS), self.n)] * events[:, None]
+        self.energy += effects[:, 0]
+        self.mood += effects[:, 1].astype(int)
+        self.skill_pts += effects[:, 2].astype(int)
+        self.stats = np.minimum(rules.STAT_CAP, self.stats + effects[:, 3:])
+
+        np.clip(self.energy, 0, 100, out=self.energy)
+        np.clip(self.mood, 0, len(rules.MOODS) - 1, out=self.mood)
+        if self.turn < rules.CAREER_TURNS:
+            self.deal()
+
+    def results(self, i):
+        """What check_training returns for career `i` this turn."""
+        results = {}
+        for t, training in enumerate(TRAININGS):
+            at = self.placement[i] == t
+            data = {
+                "total_supports": int(self.supports[i, t]),
+                "total_hints": int(self.hint_counts[i, t]),
+                "total_friendship_levels": dict(zip(FRIENDSHIP_LEVELS, self.levels[i, t].tolist())),
+                "failure": int(self.reported[i, t]),
+            }
+            for k, kind in enumerate(KINDS):
+                mine = at & (self.kinds == k)
+                data[kind] = {
+                    "supports": int(mine.sum()),
+                    "hints": int((mine & self.hints[i]).sum()),
+                    "friendship_levels": dict(zip(FRIENDSHIP_LEVELS, np.bincount(self.level[i][mine], minlength=len(FRIENDSHIP_LEVELS)).tolist())),
+                }
+            results[training] = data
+        return results
+
+
+# -------------------------------------------------------------
+# Policies
+# -------------------------------------------------------------
+def _memory_table(use_memory):
+    from core.decision_memory import get_memory, PHASES, ENERGY_BUCKETS
+
+    if use_memory:
+        return get_memory().bias_table(TRAININGS)
+    return np.zeros((len(PHASES), len(ENERGY_BUCKETS), len(TRAININGS)))
+
+
+def _best(total, allowed, priority_rank):
+    """Column of the highest allowed total per row, ties going to the higher priority stat."""
+    order = np.argsort(priority_rank, kind="stable")
+    masked = np.where(allowed, total, -np.inf)[:, order]
+    return order[np.argmax(masked, axis=1)]
+
+
+def vector_policy(careers, context, memory_table):
+    """do_something for every career at once (training index, or REST)."""
+    import core.state as state
+    import core.logic as logic
+    from core.scoring import weighted_totals
+
+    energy = careers.energy
+    caps = np.array([state.STAT_CAPS.get(s, 1200) for s in rules.STATS])
+    uncapped = careers.stats < caps
+    phase = PHASE[careers.turn]
+
+    rest = (
+        (energy < logic.REST_ENERGY)
+        | ((energy >= logic.REST_ENERGY) & (energy < logic.HIGH_SUPPORT_ENERGY) & ~(careers.supports >= 3).any(1))
+        | ((energy >= logic.HIGH_SUPPORT_ENERGY) & (energy < logic.GOOD_SUPPORT_ENERGY) & ~(careers.supports >= 2).any(1))
+        | ~uncapped.any(1)
+    )
+
+    if phase == 0:
+        choice = np.argmax(np.where(uncapped, careers.supports, -1), axis=1)
+    else:
+        buckets = np.minimum(energy // 20, memory_table.shape[1] - 1).astype(int)
+        _, _, total = weighted_totals(careers.supports, careers.hint_counts, careers.levels, careers.rainbows,
+                                      context.priority, context.learned, context.distance, memory_table[phase, buckets])
+        safe = (careers.reported <= state.MAX_FAILURE) & uncapped
+        rainbow = safe & (careers.rainbows > 0)
+        choice = np.where(
+            rainbow.any(1), _best(total, rainbow, context.priority_rank),
+            np.where(safe.any(1) & (energy >= state.SKIP_TRAINING_ENERGY), _best(total, safe, context.priority_rank), REST),
+        )
+    return np.where(rest, REST, choice)
+
+
+class StubObservations:
+    """
+    Stands in for the screen readers core.logic calls (check_current_year,
+    stat_state, check_energy_level) and for what it records (training logs,
+    learner, decision memory, live feed), so do_something runs on a simulated career.
+    """
+
+    def __init__(self, memory_table, learned=None):
+        self.memory_table = memory_table
+        self.learned = learned or {}
+        self.year = ""
+        self.stats = {}
+        self.energy = 100.0
+
+    def show(self, careers, i):
+        self.year = rules.year_text(careers.turn)
+        self.stats = {s: int(v) for s, v in zip(rules.STATS, careers.stats[i])}
+        self.energy = float(careers.energy[i])
+
+    def memory_biases(self, phase, energy, decisions):
+        from core.decision_memory import PHASE_INDEX
+
+        p = PHASE_INDEX.get(phase)
+        if p is None:
+            return np.zeros(len(decisions))
+        return self.memory_table[p, min(int(energy // 20), self.memory_table.shape[1] - 1)]
+
+    @contextmanager
+    def installed(self):
+        import core.logic as logic
+        import core.scoring as scoring
+
+        def ignore(*args, **kwargs):
+            pass
+
+        replacements = {
+            (logic, "check_current_year"): lambda: self.year,
+            (logic, "stat_state"): lambda: dict(self.stats),
+            (logic, "check_energy_level"): lambda *args, **kwargs: (self.energy, 100),
+            (logic, "calculate_average_outcomes"): lambda: dict(self.learned),
+            (logic, "save_turn_data"): ignore,
+            (logic, "observe_record"): ignore,
+            (logic, "publish_turn"): ignore,
+            (logic, "remember_decision"): ignore,
+            (scoring, "get_memory_biases"): self.memory_biases,
+        }
+        saved = {key: getattr(*key) for key in replacements}
+        for (module, name), value in replacements.items():
+            setattr(module, name, value)
+        try:
+            yield self
+        finally:
+            for (module, name), value in saved.items():
+                setattr(module, name, value)
+
+
+def logic_policy(careers, observations):
+    """The real do_something, once per career."""
+    from core.logic import do_something
+
+    actions = np.empty(careers.n, dtype=int)
+    for i in range(careers.n):
+        observations.show(careers, i)
+        result = do_something(careers.results(i))
+        actions[i] = TRAININGS.index(result) if result else REST
+    return actions
+
+
+def low_mood(careers):
+    """career_lobby goes out instead of training when mood is below the configured minimum."""
+    import core.state as state
+    import utils.constants as constants
+
+    setting = state.MINIMUM_MOOD_JUNIOR_YEAR if PHASE[careers.turn] == 0 else state.MINIMUM_MOOD
+    return careers.mood < constants.MOOD_LIST.index(setting)
+
+
+# -------------------------------------------------------------
+# Runs
+# -------------------------------------------------------------
+def parse_override(text):
+    """"core.logic.REST_ENERGY=25" -> ("core.logic", "REST_ENERGY", 25). Values are JSON, else strings."""
+    target, sep, raw = text.partition("=")
+    module, _, name = target.rpartition(".")
+    if not sep or not module or not name:
+        raise ValueError(f"expected module.NAME=value, got {text!r}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return module, name, value
+
+
+def apply_overrides(overrides):
+    for module_name, name, value in overrides:
+        module = importlib.import_module(module_name)
+        if not hasattr(module, name):
+            raise ValueError(f"{module_name} has no {name}")
+        setattr(module, name, value)
+
+
+def _init_worker(config, overrides):
+    import core.state as state
+
+    state.reload_config(config)
+    # do_something logs every decision
+    logging.getLogger("core").setLevel(logging.WARNING)
+    apply_overrides(overrides)
+
+
+def simulate(n, seed, policy="vector", use_memory=False):
+    """Plays `n` careers and returns their final stats, skill points, actions and failures."""
+    import core.state as state
+
+    careers = Careers(n, np.random.default_rng(seed), max_failure=state.MAX_FAILURE)
+    from core.scoring import scoring_context
+
+    memory_table = _memory_table(use_memory)
+    observations = StubObservations(memory_table) if policy == "logic" else None
+    # priority, distance and learned weights don't change during a run
+    context = scoring_context(100, "unknown")
+
+    with observations.installed() if observations else nullcontext():
+        while careers.turn < rules.CAREER_TURNS:
+            if policy == "logic":
+                actions = logic_policy(careers, observations)
+            else:
+                actions = vector_policy(careers, context, memory_table)
+            careers.step(np.where(low_mood(careers), RECREATION, actions))
+
+    return {"stats": careers.stats, "skill_pts": careers.skill_pts, "actions": careers.actions, "failures": careers.failures}
+
+
+def _simulate_chunk(args):
+    return simulate(*args)
+
+
+def run(careers=CAREERS, policy="vector", workers=None, seed=0, overrides=(), use_memory=False, config=None):
+    """
+    Evaluates `policy` over `careers` careers split across `workers` processes.
+    `config` defaults to update_config.merged_config(); config.json is never written.
+    """
+    if config is None:
+        from update_config import merged_config
+        config = merged_config()
+    workers = workers or os.cpu_count() or 1
+    chunks = [len(part) for part in np.array_split(np.arange(careers), workers) if len(part)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(n, s, policy, use_memory) for n, s in zip(chunks, seeds)]
+
+    _init_worker(config, overrides)
+    started = time.perf_counter()
+    if len(tasks) == 1:
+        parts = [_simulate_chunk(tasks[0])]
+    else:
+        with multiprocessing.Pool(len(tasks), initializer=_init_worker, initargs=(config, overrides)) as pool:
+            parts = pool.map(_simulate_chunk, tasks)
+    elapsed = time.perf_counter() - started
+
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return summarize(merged, elapsed, policy, len(tasks))
+
+
+def summarize(result, elapsed, policy, workers):
+    import core.state as state
+
+    stats = result["stats"]
+    caps = np.array([state.STAT_CAPS.get(s, 1200) for s in rules.STATS])
+    total = stats.sum(1)
+    score = np.minimum(stats, caps).sum(1)
+    n = len(stats)
+    return {
+        "policy": policy,
+        "careers": n,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "careers_per_second": round(n / elapsed, 1) if elapsed else None,
+        "score": {"mean": round(float(score.mean()), 1), "std": round(float(score.std()), 1)},
+        "total_stats": {
+            "mean": round(float(total.mean()), 1),
+            "p10": float(np.percentile(total, 10)),
+            "p50": float(np.percentile(total, 50)),
+            "p90": float(np.percentile(total, 90)),
+        },
+        "mean_stats": {s: round(float(v), 1) for s, v in zip(rules.STATS, stats.mean(0))},
+        "skill_pts": round(float(result["skill_pts"].mean()), 1),
+        "actions_per_career": {a: round(float(v), 2) for a, v in zip(ACTIONS, result["actions"].mean(0))},
+        "failures_per_career": round(float(result["failures"].mean()), 2),
+    }
+
+
+def report(summary):
+    print(f"{summary['careers']} careers ({summary['policy']} policy, {summary['workers']} workers) in {summary['seconds']:.2f}s: {summary['careers_per_second']} careers/s")
+    print(f"   score (stats up to caps) {summary['score']['mean']} ± {summary['score']['std']}")
+    t = summary["total_stats"]
+    print(f"   total stats mean {t['mean']}, p10 {t['p10']:.0f}, p50 {t['p50']:.0f}, p90 {t['p90']:.0f}")
+    print(f"   mean stats {summary['mean_stats']}, skill pts {summary['skill_pts']}")
+    print(f"   actions per career {summary['actions_per_career']}, failures {summary['failures_per_career']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the training policy over simulated careers.")
+    parser.add_argument("--careers", type=int, default=CAREERS)
+    parser.add_argument("--policy", choices=("vector", "logic"), default="vector")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="MODULE.NAME=VALUE")
+    parser.add_argument("--memory", action="store_true", help="use data/decision_memory.json for the memory bias")
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a summary")
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = [parse_override(text) for text in args.overrides]
+        summary = run(args.careers, args.policy, args.workers, args.seed, overrides, args.memory)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return 2
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        report(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
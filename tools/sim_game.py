@@ -0,0 +1,614 @@
+"""
+Simulated career for headless runs of the bot (driven by tools/simulator.py).
+
+CareerSim models one career: the calendar, energy, mood, stats, skill points,
+a condition that sends the trainee to the infirmary, random events, and a
+support deck whose cards turn up at random trainings and build friendship.
+It draws the screens career_lobby reads (lobby, training, event) on the
+1920x1080 reference layout from the real button and icon assets, and reacts to
+clicks. SimInput stands in for pyautogui: it locates templates on the simulated
+screen and hands clicks to the sim.
+
+Races are not simulated: the goal is always "Achieved" and there are no race
+days, so the bot only trains, rests, goes out and answers events.
+"""
+import random
+import types
+from collections import namedtuple
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import utils.constants as constants
+from core.recognizer import load_template
+from utils.screenshot import recent_regions
+
+SCREEN_SIZE = constants.REFERENCE_SIZE
+OUTSIDE = (24, 24, 28)
+BACKGROUND = (236, 234, 240)
+TEXT_COLOR = (50, 50, 60)
+ENERGY_COLOR = (70, 190, 230)
+MISSING_ENERGY = (117, 117, 117)  # what check_energy_level counts as empty
+
+STATS = ("spd", "sta", "pwr", "guts", "wit")
+MOODS = constants.MOOD_LIST[:5]
+YEARS = ("Junior Year", "Classic Year", "Senior Year")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+TURNS_PER_YEAR = 2 * len(MONTHS)
+PRE_DEBUT_TURNS = 12  # Junior Year Jan-Jun
+SUMMER_MONTHS = ("Jul", "Aug")
+
+# -------------------------------------------------------------
+# Career model
+# -------------------------------------------------------------
+# training -> stat gains at NORMAL mood with nobody else there
+TRAINING_GAINS = {
+    "spd": {"spd": 10, "pwr": 4},
+    "sta": {"sta": 9, "guts": 4},
+    "pwr": {"pwr": 8, "sta": 4},
+    "guts": {"guts": 8, "spd": 3, "pwr": 3},
+    "wit": {"wit": 9, "spd": 2},
+}
+ENERGY_COST = {"spd": 21, "sta": 19, "pwr": 20, "guts": 22, "wit": -5}
+SKILL_PTS_GAIN = {"spd": 3, "sta": 3, "pwr": 3, "guts": 3, "wit": 5}
+MOOD_MULTIPLIER = (0.8, 0.9, 1.0, 1.1, 1.2)
+START_STAT = 100
+STAT_CAP = 1200
+SUPPORT_BONUS = 0.2   # extra gain per support at the training
+RAINBOW_BONUS = 0.3   # and per yellow/max support of the training's own type
+BOND_GAIN = 7
+MAX_SUPPORTS_PER_TRAINING = 5
+ABSENT_CHANCE = 0.2   # a support skips the turn
+HINT_CHANCE = 0.15
+REST_ENERGY = 50
+SUMMER_REST_ENERGY = 40
+RECREATION_ENERGY = 10
+INFIRMARY_ENERGY = 20
+# failure chance starts below this energy and grows by the rate per missing point
+FAILURE_FREE_ENERGY = {"spd": 60, "sta": 60, "pwr": 60, "guts": 60, "wit": 30}
+FAILURE_PER_ENERGY = {"spd": 1.5, "sta": 1.5, "pwr": 1.5, "guts": 1.5, "wit": 1.2}
+FAILED_TRAINING = {"energy": -10, "mood": -1}
+HINT_SKILL_PTS = 10
+EVENT_CHANCE = 0.25
+CONDITION_CHANCE = 0.04
+MOOD_DROP_CHANCE = 0.05
+
+# bond -> friendship bar colour read by check_support_card (highest threshold first)
+FRIENDSHIP_COLORS = (
+    (80, (255, 235, 120)),
+    (60, (255, 173, 30)),
+    (40, (162, 230, 30)),
+    (20, (42, 192, 255)),
+    (0, (110, 108, 120)),
+)
+DEFAULT_DECK = ("spd", "spd", "sta", "pwr", "wit", "friend")
+
+# name -> effects of the first and second choice
+EVENTS = {
+    "Extra Training": ({"spd": 10, "energy": -5}, {"energy": 5}),
+    "Study Session": ({"wit": 10}, {"skill_pts": 15}),
+    "Shopping Trip": ({"mood": 1, "energy": 5}, {"skill_pts": 10}),
+    "Morning Run": ({"sta": 8, "guts": 4}, {"energy": 10}),
+    "Dance Lesson": ({"pwr": 6, "guts": 6}, {"mood": 1}),
+}
+
+Support = namedtuple("Support", ["kind", "index", "hint"])
+
+
+def _calendar():
+    """(year, date) of every turn."""
+    dates = []
+    for year in YEARS:
+        for month in MONTHS:
+            for half in ("Early", "Late"):
+                dates.append((year, f"{half} {month}"))
+    return dates
+
+
+CALENDAR = _calendar()
+CAREER_TURNS = len(CALENDAR)
+
+
+def year_text(turn):
+    """The year as check_current_year reads it on `turn`."""
+    year, date = CALENDAR[turn]
+    if turn < PRE_DEBUT_TURNS:
+        return f"{year} Pre-Debut"
+    return f"{year} {date}"
+
+
+def is_summer(turn):
+    year, date = CALENDAR[turn]
+    return year != YEARS[0] and date.split(" ")[1] in SUMMER_MONTHS
+
+
+def _race_turns(races):
+    """Turn indexes that have a race in data/races.json."""
+    index = {date: i for i, date in enumerate(CALENDAR)}
+    turns = set()
+    for year, by_name in races.items():
+        for race in by_name.values():
+            turn = index.get((year, race.get("date")))
+            if turn is not None:
+                turns.add(turn)
+    return sorted(turns)
+
+
+class CareerSim:
+    """
+    One simulated career. frame() is the screen (an RGB PIL image) and click()/press()
+    are the mouse. on_finish is called once, when the career ends or the bot stalls.
+    """
+
+    def __init__(self, seed=0, max_turns=CAREER_TURNS, deck=DEFAULT_DECK, max_idle_frames=400):
+        self.rng = random.Random(seed)
+        self.race_turns = _race_turns(constants.RACES)
+        self.max_turns = min(max_turns, CAREER_TURNS)
+        self.max_idle_frames = max_idle_frames
+        self.on_finish = None
+
+        self.turn = 0
+        self.energy = 100
+        self.mood = 2
+        self.stats = {stat: START_STAT for stat in STATS}
+        self.skill_pts = 120
+        self.condition = False
+        self.bonds = [0] * len(deck)
+        self.deck = list(deck)
+        self.placement = {}
+        self.event = None
+
+        self.screen = "lobby"
+        self.selected = None
+        self.cursor = (0, 0)
+        self.actions = {"train": 0, "rest": 0, "recreation": 0, "infirmary": 0, "event": 0, "failed": 0}
+        self.finished = False
+        self.stalled = False
+
+        self._buttons = {}
+        self._texts = []
+        self._image = None
+        self._bgr = None
+        self._idle_frames = 0
+        self._place_supports()
+
+    # ---------------------------------------------------------
+    # Calendar
+    # ---------------------------------------------------------
+    def year_text(self):
+        return year_text(self.turn)
+
+    def is_summer(self):
+        return is_summer(self.turn)
+
+    def turns_left(self):
+        """Turns to the next race date, or to the end of the year when there is none."""
+        year_end = (self.turn // TURNS_PER_YEAR + 1) * TURNS_PER_YEAR
+        upcoming = next((t for t in self.race_turns if t > self.turn), year_end)
+        return min(upcoming, year_end) - self.turn
+
+    # ---------------------------------------------------------
+    # Career rules
+    # ---------------------------------------------------------
+    def failure_rate(self, training):
+        rate = max(0, FAILURE_FREE_ENERGY[training] - self.energy) * FAILURE_PER_ENERGY[training]
+        return min(99, int(rate))
+
+    def _friendship(self, index):
+        bond = self.bonds[index]
+        return next(color for threshold, color in FRIENDSHIP_COLORS if bond >= threshold)
+
+    def _is_rainbow(self, index, training):
+        return self.deck[index] == training and self.bonds[index] >= 60
+
+    def _place_supports(self):
+        self.placement = {training: [] for training in STATS}
+        for index in range(len(self.deck)):
+            if self.rng.random() < ABSENT_CHANCE:
+                continue
+            training = self.rng.choice(STATS)
+            if len(self.placement[training]) < MAX_SUPPORTS_PER_TRAINING:
+                self.placement[training].append(Support(self.deck[index], index, self.rng.random() < HINT_CHANCE))
+
+    def _gain(self, effects, multiplier=1.0):
+        for key, value in effects.items():
+            if key in self.stats:
+                self.stats[key] = min(STAT_CAP, self.stats[key] + round(value * multiplier))
+            elif key == "energy":
+                self.energy = max(0, min(100, self.energy + value))
+            elif key == "mood":
+                self.mood = max(0, min(len(MOODS) - 1, self.mood + value))
+            elif key == "skill_pts":
+                self.skill_pts += value
+
+    def train(self, training):
+        supports = self.placement[training]
+        if self.rng.random() * 100 < self.failure_rate(training):
+            self.actions["failed"] += 1
+            self._gain(FAILED_TRAINING)
+        else:
+            rainbows = sum(self._is_rainbow(s.index, training) for s in supports)
+            multiplier = MOOD_MULTIPLIER[self.mood] * (1 + SUPPORT_BONUS * len(supports) + RAINBOW_BONUS * rainbows)
+            self._gain(TRAINING_GAINS[training], multiplier)
+            self._gain({"energy": -ENERGY_COST[training], "skill_pts": SKILL_PTS_GAIN[training]})
+            for support in supports:
+                self.bonds[support.index] = min(100, self.bonds[support.index] + BOND_GAIN)
+                if support.hint:
+                    self.skill_pts += HINT_SKILL_PTS
+        self.actions["train"] += 1
+        self._end_turn()
+
+    def rest(self):
+        if self.is_summer():
+            self._gain({"energy": SUMMER_REST_ENERGY, "mood": 1})
+        else:
+            self._gain({"energy": REST_ENERGY})
+        self.actions["rest"] += 1
+        self._end_turn()
+
+    def recreation(self):
+        self._gain({"energy": RECREATION_ENERGY, "mood": 1})
+        self.actions["recreation"] += 1
+        self._end_turn()
+
+    def infirmary(self):
+        self._gain({"energy": INFIRMARY_ENERGY})
+        self.condition = False
+        self.actions["infirmary"] += 1
+        self._end_turn()
+
+    def choose(self, choice):
+        self._gain(EVENTS[self.event][choice])
+        self.actions["event"] += 1
+        self.event = None
+        self.screen = "lobby"
+        self._changed()
+
+    def _end_turn(self):
+        self.turn += 1
+        self._idle_frames = 0
+        self.selected = None
+        if self.turn >= self.max_turns:
+            self.finish()
+            return
+        if self.rng.random() < CONDITION_CHANCE:
+            self.condition = True
+        if self.rng.random() < MOOD_DROP_CHANCE:
+            self._gain({"mood": -1})
+        self._place_supports()
+        if self.rng.random() < EVENT_CHANCE:
+            self.event = self.rng.choice(sorted(EVENTS))
+            self.screen = "event"
+        else:
+            self.screen = "lobby"
+        self._changed()
+
+    def finish(self, stalled=False):
+        if self.finished:
+            return
+        self.finished = True
+        self.stalled = stalled
+        if self.on_finish:
+            self.on_finish()
+
+    def summary(self):
+        return {
+            "turn": self.turn,
+            "year": self.year_text() if self.turn < CAREER_TURNS else "Finale Season",
+            "energy": self.energy,
+            "mood": MOODS[self.mood],
+            "stats": dict(self.stats),
+            "skill_pts": self.skill_pts,
+            "actions": dict(self.actions),
+            "stalled": self.stalled,
+        }
+
+    # ---------------------------------------------------------
+    # Input
+    # ---------------------------------------------------------
+    def _button_at(self, pos):
+        x, y = pos
+        for name, (left, top, width, height) in self._buttons.items():
+            if left <= x < left + width and top <= y < top + height:
+                return name
+        return None
+
+    def press(self, pos):
+        """Mouse held down: on the training screen this shows that training's supports."""
+        self.cursor = pos
+        self.frame()  # button positions are those of the current screen
+        button = self._button_at(pos)
+        if button and button.startswith("train_") and self.selected != button[6:]:
+            self.selected = button[6:]
+            self._changed()
+
+    def click(self, pos):
+        self.cursor = pos
+        if self.finished:
+            return
+        self.frame()
+        button = self._button_at(pos)
+        if button is None:
+            return
+        if button == "training":
+            self.screen = "training"
+            self._changed()
+        elif button == "back":
+            self.screen = "lobby"
+            self.selected = None
+            self._changed()
+        elif button.startswith("train_"):
+            training = button[6:]
+            if self.selected == training:
+                self.train(training)
+            else:
+                self.selected = training
+                self._changed()
+        elif button in ("rest", "rest_summer"):
+            self.rest()
+        elif button == "recreation":
+            self.recreation()
+        elif button == "infirmary" and self.condition:
+            self.infirmary()
+        elif button.startswith("choice_"):
+            self.choose(int(button[7:]))
+
+    # ---------------------------------------------------------
+    # Screen
+    # ---------------------------------------------------------
+    def _changed(self):
+        self._image = None
+        self._bgr = None
+
+    def frame(self):
+        """The current screen as an RGB PIL image (redrawn only after it changed)."""
+        self._idle_frames += 1
+        if self._idle_frames > self.max_idle_frames and not self.finished:
+            self.finish(stalled=True)
+        if self._image is None:
+            self._image = self._render()
+        return self._image
+
+    def frame_bgr(self):
+        image = self.frame()
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    def texts_in(self, region):
+        """(box, text) of the drawn text whose centre lies inside `region` (left, top, width, height)."""
+        left, top, width, height = region
+        found = []
+        for box, text in self._texts:
+            cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            if left <= cx < left + width and top <= cy < top + height:
+                found.append((box, text))
+        return sorted(found, key=lambda item: (item[0][1], item[0][0]))
+
+    def _render(self):
+        image = Image.new("RGB", SCREEN_SIZE, OUTSIDE)
+        draw = ImageDraw.Draw(image)
+        gx, gy, gw, gh = constants.GAME_SCREEN_REGION
+        draw.rectangle((gx, gy, gx + gw - 1, gy + gh - 1), fill=BACKGROUND)
+        self._buttons = {}
+        self._texts = []
+
+        self._draw_hud(image, draw)
+        if self.screen == "lobby":
+            self._draw_lobby(image)
+        elif self.screen == "training":
+            self._draw_training(image, draw)
+        elif self.screen == "event":
+            self._draw_event(image, draw)
+        return image
+
+    def _paste(self, image, path, pos, name=None, brightness=1.0):
+        asset = _asset(path, brightness)
+        image.paste(asset, pos)
+        if name:
+            self._buttons[name] = (pos[0], pos[1], asset.width, asset.height)
+
+    def _text(self, draw, region, text):
+        left, top, width, height = region
+        font = _font(max(8, int(height * 0.75)))
+        while font.size > 8 and draw.textlength(text, font=font) > width - 4:
+            font = _font(font.size - 1)
+        x0, y0, x1, y1 = draw.textbbox((0, 0), text, font=font)
+        x = left + 2
+        y = top + (height - (y1 - y0)) // 2 - y0
+        draw.text((x, y), text, fill=TEXT_COLOR, font=font)
+        self._texts.append(((x + x0, y + y0, x + x1, y + y1), text))
+
+    def _draw_hud(self, image, draw):
+        self._text(draw, constants.YEAR_REGION, self.year_text())
+        self._text(draw, constants.TURN_REGION, str(self.turns_left()))
+        self._text(draw, constants.CRITERIA_REGION, "Goal Achieved")
+        self._text(draw, constants.MOOD_REGION, MOODS[self.mood])
+
+        # energy bar: a border pixel, then 236 px (100 energy) of colour and grey, then the end part
+        left, top, right, bottom = constants.ENERGY_BBOX
+        middle = (top + bottom) // 2
+        full = constants.scaled(236)
+        filled = round(full * self.energy / 100)
+        draw.rectangle((left, middle - 7, left + full, middle + 7), fill=MISSING_ENERGY)
+        draw.rectangle((left, middle - 7, left, middle + 7), fill=TEXT_COLOR)
+        if filled:
+            draw.rectangle((left + 1, middle - 7, left + filled, middle + 7), fill=ENERGY_COLOR)
+        end = _asset("assets/ui/energy_bar_right_end_part.png")
+        image.paste(end, (left + full + 1, middle - end.height // 2))
+
+        for stat in STATS:
+            self._text(draw, getattr(constants, f"{stat.upper()}_STAT_REGION"), str(self.stats[stat]))
+        self._text(draw, constants.SKILL_PTS_REGION, str(self.skill_pts))
+
+    def _draw_lobby(self, image):
+        self._paste(image, "assets/ui/tazuna_hint.png", (180, 230))
+        self._paste(image, "assets/buttons/training_btn.png", (420, 900), "training")
+        if self.is_summer():
+            self._paste(image, "assets/buttons/rest_summer_btn.png", (200, 880), "rest_summer")
+        else:
+            self._paste(image, "assets/buttons/rest_btn.png", (200, 900), "rest")
+            self._paste(image, "assets/buttons/recreation_btn.png", (300, 990), "recreation")
+        # greyed out unless the trainee has a condition; is_btn_active tells them apart
+        self._paste(image, "assets/buttons/infirmary_btn.png", (700, 870), "infirmary", 1.0 if self.condition else 0.45)
+
+    def _draw_training(self, image, draw):
+        self._paste(image, "assets/buttons/back_btn.png", (160, 1000), "back")
+        for i, training in enumerate(STATS):
+            self._paste(image, f"assets/icons/train_{training}.png", (280 + i * 120, 960), f"train_{training}")
+        if self.selected is None:
+            return
+
+        # supports stacked down the right side, friendship bar 66 px below each icon's centre
+        bx, by = constants.SUPPORT_CARD_ICON_BBOX[:2]
+        for i, support in enumerate(self.placement[self.selected]):
+            x, y = bx + 15, by + 15 + i * 100
+            icon = _asset(f"assets/icons/support_card_type_{support.kind}.png")
+            image.paste(icon, (x, y))
+            cx, cy = x + icon.width // 2, y + icon.height // 2
+            draw.rectangle((cx - 12, cy + 62, cx + 30, cy + 70), fill=self._friendship(support.index))
+            if support.hint:
+                image.paste(_asset("assets/icons/support_hint.png"), (x + 45, y - 5))
+        self._text(draw, constants.FAILURE_REGION, f"Failure {self.failure_rate(self.selected)}%")
+
+    def _draw_event(self, image, draw):
+        self._text(draw, constants.EVENT_NAME_REGION, self.event)
+        x, y = 200, 560
+        for choice in range(len(EVENTS[self.event])):
+            top = y + choice * 112
+            draw.rectangle((x - 10, top - 10, x + 560, top + 60), fill=(250, 250, 252), outline=(200, 200, 210))
+            self._buttons[f"choice_{choice}"] = (x - 10, top - 10, 570, 70)
+        self._paste(image, "assets/icons/event_choice_1.png", (x, y))
+
+
+@lru_cache(maxsize=None)
+def _asset(path, brightness=1.0):
+    # the BGR pixels load_template matches against, so matches on the sim score 1.0
+    pixels = load_template(path, 1.0)
+    if brightness != 1.0:
+        pixels = np.clip(pixels * brightness, 0, 255).astype(np.uint8)
+    return Image.fromarray(cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB))
+
+
+@lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+# -------------------------------------------------------------
+# pyautogui stand-in
+# -------------------------------------------------------------
+Box = namedtuple("Box", ["left", "top", "width", "height"])
+Point = namedtuple("Point", ["x", "y"])
+Size = namedtuple("Size", ["width", "height"])
+
+
+def _xy(x, y):
+    if isinstance(x, (tuple, list)):
+        return int(x[0]), int(x[1])
+    return int(x), int(y)
+
+
+class SimInput:
+    """
+    The parts of pyautogui the bot calls, backed by a CareerSim. Durations and
+    minSearchTime are ignored: the sim screen changes only when it is clicked.
+    """
+
+    def __init__(self, sim):
+        self.sim = sim
+
+    def locateOnScreen(self, image, confidence=0.999, region=None, **kwargs):
+        screen = self.sim.frame_bgr()
+        left, top = 0, 0
+        if region:
+            left, top, width, height = (int(v) for v in region)
+            screen = screen[top:top + height, left:left + width]
+        template = load_template(image, 1.0) if isinstance(image, str) else np.asarray(image)
+        if template is None or template.shape[0] > screen.shape[0] or template.shape[1] > screen.shape[1]:
+            return None
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if score < confidence:
+            return None
+        return Box(left + x, top + y, template.shape[1], template.shape[0])
+
+    def locateCenterOnScreen(self, image, **kwargs):
+        box = self.locateOnScreen(image, **kwargs)
+        if box is None:
+            return None
+        return Point(box.left + box.width // 2, box.top + box.height // 2)
+
+    def moveTo(self, x=None, y=None, duration=0.0, **kwargs):
+        if x is not None:
+            self.sim.cursor = _xy(x, y)
+
+    def moveRel(self, x=0, y=0, duration=0.0, **kwargs):
+        cx, cy = self.sim.cursor
+        self.sim.cursor = (cx + int(x), cy + int(y))
+
+    def mouseDown(self, x=None, y=None, **kwargs):
+        self.moveTo(x, y)
+        self.sim.press(self.sim.cursor)
+
+    def mouseUp(self, x=None, y=None, **kwargs):
+        self.moveTo(x, y)
+
+    def click(self, x=None, y=None, clicks=1, interval=0.0, **kwargs):
+        self.moveTo(x, y)
+        for _ in range(clicks):
+            self.sim.click(self.sim.cursor)
+
+    def press(self, keys, **kwargs):
+        pass
+
+    def size(self):
+        return Size(*SCREEN_SIZE)
+
+    def useImageNotFoundException(self, value=True):
+        pass
+
+    def as_module(self):
+        """A module object to put in sys.modules["pyautogui"] before the bot is imported."""
+        module = types.ModuleType("pyautogui")
+        for name in ("locateOnScreen", "locateCenterOnScreen", "moveTo", "moveRel", "mouseDown",
+                     "mouseUp", "click", "press", "size", "useImageNotFoundException"):
+            setattr(module, name, getattr(self, name))
+        module.resolution = self.size
+        module.Box, module.Point, module.Size = Box, Point, Size
+        module.FAILSAFE = False
+        module.PAUSE = 0
+        return module
+
+
+class OracleReader:
+    """
+    Answers readtext() from the text the sim drew, for machines without the OCR
+    model. The crop is located through the last region utils.screenshot grabbed.
+    """
+
+    def __init__(self, sim):
+        self.sim = sim
+
+    def readtext(self, img_np, allowlist=None, **kwargs):
+        regions = recent_regions()
+        if not regions:
+            return []
+        left, top, width, height = regions[-1]
+        fx = img_np.shape[1] / width
+        fy = img_np.shape[0] / height
+        results = []
+        for (x0, y0, x1, y1), text in self.sim.texts_in(regions[-1]):
+            if allowlist:
+                text = "".join(c for c in text if c in allowlist)
+            if not text:
+                continue
+            points = [[(x0 - left) * fx, (y0 - top) * fy], [(x1 - left) * fx, (y0 - top) * fy],
+                      [(x1 - left) * fx, (y1 - top) * fy], [(x0 - left) * fx, (y1 - top) * fy]]
+            results.append((points, text, 1.0))
+        return results
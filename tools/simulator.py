@@ -0,0 +1,168 @@
+"""
+Headless end-to-end run of the bot against the simulated career in tools/sim_game.py,
+to measure how many turns per second the decision and recognition stack sustains.
+
+Run from the repository root:
+    python -m tools.simulator [--turns 72] [--seed 0] [--ocr oracle|easyocr] [--profile sim.prof] [--trace sim_trace.json] [--json]
+
+pyautogui is replaced by the simulator's input before the bot is imported and
+every capture is served from the simulated screen, so no display is needed.
+--ocr oracle (the default) answers OCR from the text the simulator drew, for
+machines without the EasyOCR model; --ocr easyocr reads the rendered frames.
+Training logs, the learner and decision memory are written to a temporary
+directory, never to data/, and config.json is only read (the template when
+there is none).
+"""
+import argparse
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+from tools.sim_game import CareerSim, SimInput, OracleReader
+from utils import log, metrics, trace
+from utils.screenshot import set_frame_source
+
+TURNS = 72
+TOP = 25
+
+
+def _use_data_dir(path):
+    """Point every data/ writer the bot uses at `path`."""
+    from core import recorder, learner, decision_memory
+
+    recorder.LOG_DIR = learner.LOG_DIR = os.path.join(path, "training_logs")
+    learner.BRAIN_PATH = os.path.join(path, "brain.json")
+    learner.SUMMARY_PATH = os.path.join(path, "summary.json")
+    decision_memory.MEMORY_PATH = os.path.join(path, "decision_memory.json")
+    recorder.configure_storage("jsonl")
+    log.set_log_dir(os.path.join(path, "logs"))
+
+
+def _histogram(histogram, label, values):
+    report = {}
+    for value in values:
+        count, total = histogram.value(**{label: value})
+        if count:
+            report[value] = {"count": count, "mean_ms": round(total / count * 1000, 3)}
+    return report
+
+
+def run(turns=TURNS, seed=0, ocr="oracle", profile_path=None, trace_path=None, verbose=False):
+    """Plays one simulated career (or `turns` of it) and returns a report dict."""
+    sim = CareerSim(seed=seed, max_turns=turns)
+    sys.modules["pyautogui"] = SimInput(sim).as_module()
+    set_frame_source(sim.frame)
+
+    from update_config import merged_config
+
+    import core.state as state
+    from core.execute import career_lobby
+    from core.decision_memory import flush_memory
+    from core.learner import flush_learner
+    from core.ocr import set_reader
+    from core.persistence import writer
+
+    state.reload_config(merged_config())
+    # no waiting on animations, and only what the simulator models
+    state.SLEEP_TIME_MULTIPLIER = 0
+    state.PRIORITIZE_G1_RACE = False
+    state.IS_AUTO_BUY_SKILL = False
+    if ocr == "oracle":
+        set_reader(OracleReader(sim))
+    if trace_path:
+        trace.configure(True, export_path=trace_path)
+    if not verbose:
+        log.console.setLevel(logging.WARNING)
+
+    profiler = cProfile.Profile() if profile_path else None
+    with tempfile.TemporaryDirectory(prefix="uma-sim-") as data_dir:
+        _use_data_dir(data_dir)
+        writer.start()
+        state.stop_event.clear()
+        state.is_bot_running = True
+        sim.on_finish = state.stop_event.set
+
+        started = time.perf_counter()
+        try:
+            # career_lobby prints a banner every turn
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+                if profiler:
+                    profiler.enable()
+                career_lobby()
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            state.is_bot_running = False
+            flush_memory()
+            flush_learner()
+            writer.stop()
+            log.set_log_dir(os.path.join(os.getcwd(), "logs"))
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+    if trace_path:
+        trace.export_chrome_trace()
+
+    return {
+        "ocr": ocr,
+        "seed": seed,
+        "turns": sim.turn,
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(sim.turn / elapsed, 3) if elapsed else None,
+        "stalled": sim.stalled,
+        "career": sim.summary(),
+        "clicks": metrics.CLICKS.value(),
+        "captures": {source: metrics.CAPTURES.value(source=source) for source in ("screen", "region")},
+        "ocr_calls": {kind: metrics.OCR_CALLS.value(kind=kind) for kind in ("text", "number", "boxes")},
+        "ocr_cache_hits": {kind: metrics.OCR_CACHE_HITS.value(kind=kind) for kind in ("text", "number", "boxes")},
+        "ocr_latency": _histogram(metrics.OCR_SECONDS, "kind", ("text", "number", "boxes")),
+        "match_latency": _histogram(metrics.MATCH_SECONDS, "fn", ("match_template", "multi_match_templates")),
+    }
+
+
+def report(result):
+    status = "⚠️ stalled" if result["stalled"] else "✅"
+    print(f"{status} {result['turns']} turns in {result['seconds']:.2f}s: {result['turns_per_second']} turns/s (ocr: {result['ocr']})")
+    career = result["career"]
+    print(f"   {career['year']}, energy {career['energy']}, mood {career['mood']}, stats {career['stats']}")
+    print(f"   actions {career['actions']}")
+    print(f"   clicks {result['clicks']}, captures {result['captures']}")
+    for kind, calls in result["ocr_calls"].items():
+        if calls:
+            latency = result["ocr_latency"].get(kind, {})
+            print(f"   ocr {kind}: {calls} calls, {result['ocr_cache_hits'][kind]} cached, {latency.get('mean_ms', 0)} ms per miss")
+    for fn, latency in result["match_latency"].items():
+        print(f"   {fn}: {latency['count']} calls, {latency['mean_ms']} ms each")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the bot against a simulated career.")
+    parser.add_argument("--turns", type=int, default=TURNS, help="stop after this many turns (a career is 72)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ocr", choices=("oracle", "easyocr"), default="oracle")
+    parser.add_argument("--profile", metavar="PATH", help="write cProfile stats and list the slowest functions")
+    parser.add_argument("--top", type=int, default=TOP, help="functions listed with --profile")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of the run")
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a summary")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own output")
+    args = parser.parse_args(argv)
+
+    result = run(args.turns, args.seed, args.ocr, args.profile, args.trace, args.verbose)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        report(result)
+    if args.profile:
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(args.top)
+    return 1 if result["stalled"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
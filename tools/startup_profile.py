@@ -0,0 +1,90 @@
+"""
+Import-time profile of startup: everything main.py imports before the config
+server can answer. Runs `import main` in a fresh interpreter with -X importtime.
+
+Run from the repository root:
+    python main.py --profile-startup [--top 25]
+    python -m tools.startup_profile [--budget 2.0] [--target main] [--json]
+
+Exits with code 1 when the import takes longer than the budget, so it can be
+used as a regression check.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET = 2.0  # seconds for `import main`
+TOP = 25
+
+ModuleTime = namedtuple("ModuleTime", ["name", "self_s", "cumulative_s", "depth"])
+
+
+def parse_importtime(stderr):
+    """ModuleTime for every `import time:` line, in import order."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append(ModuleTime(name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return modules
+
+
+def profile(target="main"):
+    """(seconds to import `target`, [ModuleTime, ...]) measured in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(f"import {target} failed: {lines[-1] if lines else result.returncode}")
+    modules = parse_importtime(result.stderr)
+    total = next((m.cumulative_s for m in reversed(modules) if m.name == target), 0.0)
+    return total, modules
+
+
+def report(total, modules, top=TOP, budget=STARTUP_BUDGET):
+    print(f"{'self':>8} {'cumulative':>11}  module")
+    for m in sorted(modules, key=lambda m: m.cumulative_s, reverse=True)[:top]:
+        print(f"{m.self_s * 1000:7.1f}ms {m.cumulative_s * 1000:9.1f}ms  {'  ' * m.depth}{m.name}")
+    status = "✅" if total <= budget else "❌"
+    print(f"{status} Startup imports took {total:.2f}s (budget {budget:.2f}s).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile import time at startup.")
+    parser.add_argument("--target", default="main", help="module to import (default: main)")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="seconds; exit code 1 when exceeded")
+    parser.add_argument("--top", type=int, default=TOP, help="number of slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a table")
+    args = parser.parse_args(argv)
+
+    try:
+        total, modules = profile(args.target)
+    except RuntimeError as e:
+        print(f"⚠️ {e}")
+        return 2
+
+    if args.json:
+        slowest = sorted(modules, key=lambda m: m.cumulative_s, reverse=True)[:args.top]
+        print(json.dumps({
+            "target": args.target,
+            "seconds": round(total, 4),
+            "budget": args.budget,
+            "modules": [m._asdict() for m in slowest],
+        }, indent=2))
+    else:
+        report(total, modules, args.top, args.budget)
+    return 0 if total <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Typed, columnar view of the training logs.
+
+    python -m tools.training_columns export [--days 14] [--out data/exports/training_log.npz]
+
+Records are streamed from the daily logs in fixed-size chunks, so memory use
+depends on the chunk size, not on how many days are loaded.
+"""
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from core.recorder import DAILY_STEM, LOG_DIR, list_log_files, iter_records
+
+STATS = ["spd", "sta", "pwr", "guts", "wit"]
+DECISIONS = ["spd", "sta", "pwr", "guts", "wit", "rest"]
+PHASES = ["early", "mid", "late", "unknown"]
+DECISION_CODES = {d: i for i, d in enumerate(DECISIONS)}
+PHASE_CODES = {p: i for i, p in enumerate(PHASES)}
+
+DTYPES = {
+    "timestamp": "datetime64[us]",
+    "energy": np.float32,
+    **{stat: np.int16 for stat in STATS},
+    "phase": np.int8,      # index into PHASES, -1 if unknown
+    "decision": np.int8,   # index into DECISIONS, -1 if unknown
+    "reward": np.float32,
+}
+
+DEFAULT_EXPORT = os.path.join("data", "exports", "training_log.npz")
+
+
+def empty_columns():
+    return {name: np.empty(0, dtype=dtype) for name, dtype in DTYPES.items()}
+
+
+def records_to_columns(records):
+    stats = [r.get("current_stats") or {} for r in records]
+    columns = {
+        "timestamp": np.array([r.get("timestamp") or "NaT" for r in records], dtype=DTYPES["timestamp"]),
+        "energy": np.array([r.get("energy", np.nan) for r in records], dtype=np.float32),
+        "phase": np.array([PHASE_CODES.get(r.get("phase"), -1) for r in records], dtype=np.int8),
+        "decision": np.array([DECISION_CODES.get(r.get("decision"), -1) for r in records], dtype=np.int8),
+        "reward": np.array([r.get("reward", 0) for r in records], dtype=np.float32),
+    }
+    for stat in STATS:
+        columns[stat] = np.array([s.get(stat, -1) for s in stats], dtype=np.int16)
+    return {name: columns[name] for name in DTYPES}
+
+
+def concat_columns(parts):
+    parts = list(parts)
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([p[name] for p in parts]) for name in DTYPES}
+
+
+def log_date(path):
+    """Day a log file covers: its YYYY-MM-DD name, or its modification date (legacy logs)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if DAILY_STEM.match(stem):
+        return date.fromisoformat(stem)
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+
+def log_files(days=None, today=None):
+    """Logs oldest first; only those from the last `days` calendar days (today included) if given."""
+    files = list_log_files(LOG_DIR)
+    if not days:
+        return files
+    cutoff = (today or date.today()) - timedelta(days=days - 1)
+    return [path for path in files if log_date(path) >= cutoff]
+
+
+def iter_chunks(paths=None, chunk_size=5000):
+    """Yields column dicts of at most chunk_size rows across all given log files."""
+    batch = []
+    for path in paths if paths is not None else log_files():
+        for record in iter_records(path):
+            batch.append(record)
+            if len(batch) >= chunk_size:
+                yield records_to_columns(batch)
+                batch = []
+    if batch:
+        yield records_to_columns(batch)
+
+
+def export_npz(paths=None, output_path=DEFAULT_EXPORT, chunk_size=5000):
+    columns = concat_columns(iter_chunks(paths, chunk_size))
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    np.savez_compressed(
+        output_path,
+        decision_labels=np.array(DECISIONS),
+        phase_labels=np.array(PHASES),
+        **columns,
+    )
+    print(f"✅ Exported {len(columns['reward'])} rows to {output_path}")
+    return output_path
+
+
+def load_npz(path=DEFAULT_EXPORT):
+    with np.load(path) as data:
+        return {name: data[name] for name in DTYPES}
+
+
+class TailReader:
+    """
+    Reads only what was appended to a log since the last call. JSON-lines files
+    are followed by byte offset; legacy .json arrays are re-read but only
+    records past the last seen count are returned.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.count = 0
+        self._partial = ""
+
+    def read_new(self):
+        if not os.path.exists(self.path):
+            return []
+        if not self.path.endswith(".jsonl"):
+            records = list(iter_records(self.path))
+            new = records[self.count:]
+            self.count = len(records)
+            return new
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+        lines = (self._partial + chunk).split("\n")
+        # the last piece is an unfinished line until its newline arrives
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        self.count += len(records)
+        return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar training log tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write typed columns for the selected days to an .npz file")
+    export.add_argument("--days", type=int, help="only logs from the last N days, today included")
+    export.add_argument("--out", default=DEFAULT_EXPORT)
+    export.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_npz(log_files(args.days), args.out, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
-import json
+# pandas and matplotlib are imported where they are used, so --export-npz and
+# the other non-plotting paths start without them.
+import argparse
 import os
-import matplotlib.pyplot as plt
-from datetime import datetime
 import time
-import pandas as pd
 import numpy as np
 
-# ✅ Updated path
+from core.recorder import latest_log_file, load_records
+from tools.training_columns import (
+    STATS, TailReader, concat_columns, empty_columns, export_npz,
+    iter_chunks, log_files, records_to_columns,
+)
+
+# ✅ Updated path (run from the repo root: python -m tools.visualize_training)
 LOG_DIR = os.path.join("data", "training_logs")
 
 # -------------------------------------------------------------
@@ -17,20 +22,17 @@ def load_latest_records():
         print("⚠️ Log folder not found:", LOG_DIR)
         return []
 
-    files = [f for f in os.listdir(LOG_DIR) if f.endswith(".json")]
-    if not files:
+    # Get the latest log file (.jsonl or legacy .json) by modification time
+    latest_path = latest_log_file(LOG_DIR)
+    if not latest_path:
         print("⚠️ No training log files found in", LOG_DIR)
         return []
 
-    # Get the latest log file by modification time
-    latest_file = max(files, key=lambda f: os.path.getmtime(os.path.join(LOG_DIR, f)))
-    latest_path = os.path.join(LOG_DIR, latest_file)
-
+    latest_file = os.path.basename(latest_path)
     print(f"📖 Loading latest log file: {latest_file}")
 
     try:
-        with open(latest_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_records(latest_path)
     except Exception as e:
         print(f"❌ Failed to read log file {latest_file}: {e}")
         return []
@@ -43,6 +45,8 @@ def export_to_csv(records):
     if not records:
         print("⚠️ No records to export.")
         return
+    import pandas as pd
+
     df = pd.DataFrame(records)
     os.makedirs("data/exports", exist_ok=True)
     output_path = os.path.join("data", "exports", "training_log_export.csv")
@@ -57,6 +61,9 @@ def visualize_stat_rewards(records):
     if not records:
         print("⚠️ No data for reward visualization.")
         return
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
     df = pd.DataFrame(records)
     if "decision" not in df or "reward" not in df:
         return
@@ -66,35 +73,53 @@ def visualize_stat_rewards(records):
     plt.show()
 
 
+# -------------------------------------------------------------
+# Multi-day loading (chunked, typed columns)
+# -------------------------------------------------------------
+def load_columns(days=None, chunk_size=5000):
+    """Typed columns for the logs of the last `days` days (all of them if None)."""
+    paths = log_files(days)
+    print(f"📖 Loading {len(paths)} log file(s) in chunks of {chunk_size}")
+    return concat_columns(iter_chunks(paths, chunk_size))
+
+
+def average_stats(columns):
+    stats = np.stack([columns[s] for s in STATS]).astype(np.float32)
+    stats[stats < 0] = np.nan
+    with np.errstate(invalid="ignore"):
+        return np.nan_to_num(np.nanmean(stats, axis=0))
+
+
+def smooth(rewards, window=5):
+    if len(rewards) >= window:
+        return np.convolve(rewards, np.ones(window) / window, mode="valid")
+    return rewards
+
+
 # -------------------------------------------------------------
 # Main visualization (energy, stats, reward trends)
 # -------------------------------------------------------------
-def visualize(records):
-    if not records:
+def visualize(records=None, columns=None):
+    if columns is None:
+        columns = records_to_columns(records or [])
+    if not len(columns["reward"]):
         print("⚠️ No records found.")
         return
 
-    timestamps = [datetime.fromisoformat(r["timestamp"]) for r in records]
-    energies = [r.get("energy", 0) for r in records]
-    rewards = [r.get("reward", 0) for r in records]
-    avg_stats = [
-        sum(r.get("current_stats", {}).values()) / len(r.get("current_stats", {}) or [1])
-        for r in records
-    ]
+    timestamps = columns["timestamp"]
+    rewards = columns["reward"]
+    rewards_smoothed = smooth(rewards)
 
-    if len(rewards) >= 5:
-        rewards_smoothed = np.convolve(rewards, np.ones(5) / 5, mode="valid")
-    else:
-        rewards_smoothed = rewards
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(10, 7))
 
     plt.subplot(3, 1, 1)
-    plt.plot(timestamps, energies, label="Energy", color="skyblue")
+    plt.plot(timestamps, np.nan_to_num(columns["energy"]), label="Energy", color="skyblue")
     plt.legend(); plt.ylabel("Energy")
 
     plt.subplot(3, 1, 2)
-    plt.plot(timestamps, avg_stats, label="Average Stats", color="orange")
+    plt.plot(timestamps, average_stats(columns), label="Average Stats", color="orange")
     plt.legend(); plt.ylabel("Stats")
 
     plt.subplot(3, 1, 3)
@@ -110,63 +135,53 @@ def visualize(records):
 # Live visualization mode (auto-refresh)
 # -------------------------------------------------------------
 def live_visualization(refresh_interval=30):
-    """Auto-refresh visualization whenever a log file updates."""
+    """Auto-refresh visualization; only rows appended since the last refresh are parsed."""
     print("📊 Live visualization started. Press Ctrl + C to stop.")
+    import matplotlib.pyplot as plt
+
     plt.ion()
 
-    last_file = None
-    last_size = 0
+    fig, (ax_energy, ax_stats, ax_reward) = plt.subplots(3, 1, figsize=(10, 7))
+    energy_line, = ax_energy.plot([], [], color="skyblue")
+    stats_line, = ax_stats.plot([], [], color="orange")
+    reward_line, = ax_reward.plot([], [], color="green", alpha=0.4)
+    smoothed_line, = ax_reward.plot([], [], color="darkgreen")
+    ax_energy.set_ylabel("Energy")
+    ax_stats.set_ylabel("Avg Stats")
+    ax_reward.set_ylabel("Reward"); ax_reward.set_xlabel("Time")
+
+    reader = None
+    columns = empty_columns()
 
     while True:
         try:
-            # Detect latest file
-            files = [f for f in os.listdir(LOG_DIR) if f.endswith(".json")]
-            if not files:
+            latest_path = latest_log_file(LOG_DIR)
+            if not latest_path:
                 print("⚠️ No log file found yet.")
                 time.sleep(refresh_interval)
                 continue
 
-            latest_file = max(files, key=lambda f: os.path.getmtime(os.path.join(LOG_DIR, f)))
-            latest_path = os.path.join(LOG_DIR, latest_file)
-            new_size = os.path.getsize(latest_path)
-
-            # Only reload if file changed or switched
-            if latest_file != last_file or new_size != last_size:
-                last_file, last_size = latest_file, new_size
-
-                plt.clf()
-                records = load_latest_records()
-                if not records:
-                    time.sleep(refresh_interval)
-                    continue
-
-                timestamps = [datetime.fromisoformat(r["timestamp"]) for r in records]
-                energies = [r.get("energy", 0) for r in records]
-                rewards = [r.get("reward", 0) for r in records]
-                avg_stats = [
-                    sum(r.get("current_stats", {}).values()) / len(r.get("current_stats", {}) or [1])
-                    for r in records
-                ]
-
-                if len(rewards) >= 5:
-                    rewards_smoothed = np.convolve(rewards, np.ones(5) / 5, mode="valid")
-                else:
-                    rewards_smoothed = rewards
-
-                plt.subplot(3, 1, 1)
-                plt.plot(timestamps, energies, color="skyblue")
-                plt.ylabel("Energy")
-
-                plt.subplot(3, 1, 2)
-                plt.plot(timestamps, avg_stats, color="orange")
-                plt.ylabel("Avg Stats")
-
-                plt.subplot(3, 1, 3)
-                plt.plot(timestamps, rewards, color="green", alpha=0.4)
-                plt.plot(timestamps[-len(rewards_smoothed):], rewards_smoothed, color="darkgreen")
-                plt.ylabel("Reward"); plt.xlabel("Time")
-
-                plt.tight_layout()
+            # New day (or a different file) -> start over on that file
+            if reader is None or reader.path != latest_path:
+                print(f"📖 Following log file: {os.path.basename(latest_path)}")
+                reader = TailReader(latest_path)
+                columns = empty_columns()
+
+            new_records = reader.read_new()
+            if new_records:
+                columns = concat_columns([columns, records_to_columns(new_records)])
+                timestamps = columns["timestamp"]
+                rewards_smoothed = smooth(columns["reward"])
+
+                energy_line.set_data(timestamps, np.nan_to_num(columns["energy"]))
+                stats_line.set_data(timestamps, average_stats(columns))
+                reward_line.set_data(timestamps, columns["reward"])
+                smoothed_line.set_data(timestamps[-len(rewards_smoothed):], rewards_smoothed)
+                for ax in (ax_energy, ax_stats, ax_reward):
+                    ax.relim()
+                    ax.autoscale_view()
+
+                fig.tight_layout()
                 plt.pause(0.5)
 
             time.sleep(refresh_interval)
@@ -183,8 +198,23 @@ def live_visualization(refresh_interval=30):
 # Entry point
 # -------------------------------------------------------------
 if __name__ == "__main__":
-    records = load_latest_records()
-    export_to_csv(records)
-    visualize_stat_rewards(records)
-    visualize(records)
-    live_visualization(refresh_interval=30)
+    parser = argparse.ArgumentParser(description="Plot training logs.")
+    parser.add_argument("--days", type=int, help="plot the last N daily logs instead of only the latest one")
+    parser.add_argument("--export-npz", action="store_true", help="also write typed columns to data/exports/training_log.npz")
+    parser.add_argument("--no-live", action="store_true")
+    args = parser.parse_args()
+
+    if args.days:
+        columns = load_columns(args.days)
+        if args.export_npz:
+            export_npz(log_files(args.days))
+        visualize(columns=columns)
+    else:
+        records = load_latest_records()
+        export_to_csv(records)
+        if args.export_npz:
+            export_npz([latest_log_file(LOG_DIR)] if records else [])
+        visualize_stat_rewards(records)
+        visualize(records)
+    if not args.no_live:
+        live_visualization(refresh_interval=30)
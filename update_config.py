@@ -32,6 +32,15 @@ def deep_merge(template: dict, user_config: dict) -> dict:
 
   return updated_config
 
+def merged_config():
+  """The template merged with config.json when there is one, without writing anything (for tools)."""
+  with open(TEMPLATE_FILE, "r", encoding="utf-8") as f:
+    template = json.load(f)
+  if not os.path.exists(CONFIG_FILE):
+    return template
+  with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+    return deep_merge(template, json.load(f))
+
 def update_config():
   if not os.path.exists(TEMPLATE_FILE):
     raise FileNotFoundError(f"Missing template file: {TEMPLATE_FILE}")
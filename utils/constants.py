@@ -1,4 +1,6 @@
-import json
+# Every region below is in pixels of this reference screen; utils/layout scales
+# and moves them for the actual game window.
+REFERENCE_SIZE = (1920, 1080)
 
 MOOD_REGION=(705, 125, 835 - 705, 150 - 125)
 TURN_REGION=(260, 65, 370 - 260, 140 - 65)
@@ -13,6 +15,7 @@ SCREEN_MIDDLE_REGION=(125, 300, 1000-125, 800-300)
 SCREEN_TOP_REGION=(125, 0, 1000-125, 300)
 RACE_INFO_TEXT_REGION=(285, 335, 810-285, 370-335)
 RACE_LIST_BOX_REGION=(260, 580, 850-265, 870-580)
+SKILL_LIST_REGION=(260, 430, 850-260, 900-430)
 
 FULL_STATS_STATUS_REGION=(265, 575, 845-265, 940-575)
 FULL_STATS_APTITUDE_REGION=(395, 340, 820-395, 440-340)
@@ -35,69 +38,23 @@ RACE_BUTTON_IN_RACE_BBOX_LANDSCAPE=(800, 950, 1150, 1050)
 
 GAME_SCREEN_REGION = (150, 0, 800, 1080)
 
-OFFSET_APPLIED = False
-def adjust_constants_x_coords(offset=405):
-  """Shift all region tuples' x-coordinates by `offset`."""
-
-  global OFFSET_APPLIED
-  if OFFSET_APPLIED:
-    return
-
-  g = globals()
-  for name, value in list(g.items()):
-    if (
-      name.endswith("_REGION")   # only touch REGION constants
-      and isinstance(value, tuple)
-      and len(value) >= 2
-    ):
-      # Adjust only the x-coordinates (0 and 2)
-      new_value = (
-        value[0] + offset,
-        value[1],
-        value[2],
-        value[3],
-      )
-      # Drop None if length was originally 3
-      g[name] = tuple(x for x in new_value if x is not None)
-
-    if (
-      name.endswith("_MOUSE_POS")   # only touch REGION constants
-      and isinstance(value, tuple)
-      and len(value) >= 2
-    ):
-      # Adjust only the x-coordinates (0 and 2)
-      new_value = (
-        value[0] + offset,
-        value[1],
-      )
-      # Drop None if length was originally 3
-      g[name] = tuple(x for x in new_value if x is not None)
-
-    if (
-      name.endswith("_BBOX")   # only touch REGION constants
-      and isinstance(value, tuple)
-      and len(value) >= 2
-    ):
-      # Adjust only the x-coordinates (0 and 2)
-      new_value = (
-        value[0] + offset,
-        value[1],
-        value[2] + offset,
-        value[3],
-      )
-      # Drop None if length was originally 3
-      g[name] = tuple(x for x in new_value if x is not None)
-  OFFSET_APPLIED = True
-
-# Load all races once to be used when selecting them
-RACES = ""
-with open("data/races.json", "r", encoding="utf-8") as file:
-  RACES = json.load(file)
-
-# Build a lookup dict for fast (year, date) searches
-RACE_LOOKUP = {}
-for year, races in RACES.items():
-  for name, data in races.items():
-    key = f"{year} {data['date']}"
-    race_entry = {"name": name, **data}
-    RACE_LOOKUP.setdefault(key, []).append(race_entry)
+# Game window of this instance as (left, top, width, height); None searches the whole screen.
+# Set together with every region above by utils.layout.use_layout.
+WINDOW_REGION = None
+# Game pixels per reference pixel, also set by use_layout.
+SCALE = 1.0
+
+def scaled(pixels):
+  """A reference-screen pixel distance in the current layout."""
+  return round(pixels * SCALE)
+
+def __getattr__(name):
+  # RACES and RACE_LOOKUP come from the compiled game data pack (utils/game_data)
+  # on first access instead of parsing data/races.json at import.
+  if name not in ("RACES", "RACE_LOOKUP"):
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  from utils.game_data import get_game_data  # Avoid loading it at import
+  data = get_game_data()
+  value = data.races_by_year() if name == "RACES" else data.race_lookup()
+  globals()[name] = value
+  return value
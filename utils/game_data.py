@@ -0,0 +1,348 @@
+# compiled game data: data/races.json and data/skills.json as one memory-mapped pack
+"""
+The JSON files are compiled into data/game_data.pack: NumPy structured arrays
+for races and skills, a shared string table, and precomputed indexes by
+"<year> <date>" slot, terrain, distance type and normalised name.
+
+Loading maps the file read-only and wraps views around it without copying,
+so every bot process on the machine shares the same pages. The pack records
+the size and mtime of the files it was built from and is rebuilt on load when
+they change.
+
+    python -m utils.game_data build    # (re)compile the pack
+    python -m utils.game_data info     # counts and load time
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+RACES_PATH = os.path.join("data", "races.json")
+SKILLS_PATH = os.path.join("data", "skills.json")
+PACK_PATH = os.path.join("data", "game_data.pack")
+
+MAGIC = b"UMAPACK1"
+VERSION = 1
+ALIGN = 64
+SPARK_SLOTS = 2
+
+# every string field is an id into the string table (-1 = none)
+RACE_DTYPE = np.dtype([
+  ("year", "<i4"),
+  ("date", "<i4"),
+  ("slot", "<i4"),  # "<year> <date>", the RACE_LOOKUP key
+  ("name", "<i4"),
+  ("norm_name", "<i4"),
+  ("racetrack", "<i4"),
+  ("terrain", "<i4"),
+  ("distance_type", "<i4"),
+  ("meters", "<u2"),
+  ("fans_required", "<i4"),
+  ("fans_gained", "<i4"),
+  ("sparks", "<i4", (SPARK_SLOTS,)),
+])
+SKILL_DTYPE = np.dtype([
+  ("name", "<i4"),
+  ("norm_name", "<i4"),
+  ("description", "<i4"),
+])
+DTYPES = {"race": RACE_DTYPE, "skill": SKILL_DTYPE}
+
+# grouped indexes: name -> RACE_DTYPE field the races are grouped by
+RACE_GROUPS = {"slot": "slot", "terrain": "terrain", "distance": "distance_type"}
+
+def normalize(text):
+  return re.sub(r"[^a-z0-9 ]", "", text.lower()).strip()
+
+# -------------------------------------------------------------
+# Build
+# -------------------------------------------------------------
+class _Strings:
+  def __init__(self):
+    self.ids = {}
+    self.values = []
+
+  def __call__(self, text):
+    if text is None:
+      return -1
+    if text not in self.ids:
+      self.ids[text] = len(self.values)
+      self.values.append(text)
+    return self.ids[text]
+
+  def arrays(self):
+    encoded = [value.encode("utf-8") for value in self.values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="u1")
+
+def _group_index(keys, strings):
+  """Rows grouped by key, keys sorted by their text: (key ids, start offsets, row ids)."""
+  groups = {}
+  for row, key in enumerate(keys):
+    groups.setdefault(key, []).append(row)
+  ordered = sorted(groups, key=lambda k: strings.values[k])
+  start = np.zeros(len(ordered) + 1, dtype="<i4")
+  start[1:] = np.cumsum([len(groups[k]) for k in ordered])
+  rows = np.array([row for k in ordered for row in groups[k]], dtype="<i4")
+  return np.array(ordered, dtype="<i4"), start, rows
+
+def _name_index(norm_ids, strings):
+  """Row ids sorted by normalised name, for binary search."""
+  return np.array(sorted(range(len(norm_ids)), key=lambda row: (strings.values[norm_ids[row]], row)), dtype="<i4")
+
+def _sources(paths):
+  sources = {}
+  for path in paths:
+    st = os.stat(path)
+    sources[path] = [st.st_size, st.st_mtime_ns]
+  return sources
+
+def compile_pack(races_path=RACES_PATH, skills_path=SKILLS_PATH):
+  """The pack as bytes."""
+  with open(races_path, "r", encoding="utf-8") as f:
+    races_json = json.load(f)
+  with open(skills_path, "r", encoding="utf-8") as f:
+    skills_json = json.load(f)
+
+  strings = _Strings()
+  races = np.zeros(sum(len(r) for r in races_json.values()), dtype=RACE_DTYPE)
+  row = 0
+  for year, year_races in races_json.items():
+    for name, data in year_races.items():
+      sparks = [strings(s) for s in data.get("sparks", [])][:SPARK_SLOTS]
+      races[row] = (
+        strings(year), strings(data["date"]), strings(f"{year} {data['date']}"),
+        strings(name), strings(normalize(name)), strings(data.get("racetrack")),
+        strings(data.get("terrain")), strings(data["distance"]["type"]), data["distance"]["meters"],
+        data["fans"]["required"], data["fans"]["gained"], sparks + [-1] * (SPARK_SLOTS - len(sparks)),
+      )
+      row += 1
+
+  skills = np.zeros(len(skills_json), dtype=SKILL_DTYPE)
+  for row, skill in enumerate(skills_json):
+    skills[row] = (strings(skill["name"]), strings(normalize(skill["name"])), strings(skill.get("description")))
+
+  arrays = {"races": races, "skills": skills}
+  for group, field in RACE_GROUPS.items():
+    keys, start, rows = _group_index(races[field].tolist(), strings)
+    arrays[f"races_by_{group}_keys"] = keys
+    arrays[f"races_by_{group}_start"] = start
+    arrays[f"races_by_{group}_rows"] = rows
+  arrays["races_by_name"] = _name_index(races["norm_name"].tolist(), strings)
+  arrays["skills_by_name"] = _name_index(skills["norm_name"].tolist(), strings)
+  arrays["string_offsets"], arrays["string_data"] = strings.arrays()
+
+  # header: where each array starts, relative to the first aligned byte after it
+  layout, offset = {}, 0
+  for name, array in arrays.items():
+    dtype = next((key for key, dt in DTYPES.items() if dt == array.dtype), array.dtype.str)
+    layout[name] = {"dtype": dtype, "count": len(array), "offset": offset}
+    offset += -(-array.nbytes // ALIGN) * ALIGN
+  header = json.dumps({
+    "version": VERSION,
+    "sources": _sources([races_path, skills_path]),
+    "arrays": layout,
+  }).encode("utf-8")
+
+  data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+  out = bytearray(data_start + offset)
+  out[:len(MAGIC)] = MAGIC
+  out[len(MAGIC):len(MAGIC) + 4] = struct.pack("<I", len(header))
+  out[len(MAGIC) + 4:len(MAGIC) + 4 + len(header)] = header
+  for name, array in arrays.items():
+    start = data_start + layout[name]["offset"]
+    out[start:start + array.nbytes] = array.tobytes()
+  return bytes(out)
+
+def build(path=PACK_PATH, races_path=RACES_PATH, skills_path=SKILLS_PATH):
+  """Compile and write the pack atomically (processes that already mapped the old one keep it)."""
+  data = compile_pack(races_path, skills_path)
+  tmp = f"{path}.{os.getpid()}.tmp"
+  with open(tmp, "wb") as f:
+    f.write(data)
+  os.replace(tmp, path)
+  return len(data)
+
+# -------------------------------------------------------------
+# Load
+# -------------------------------------------------------------
+def _read_header(buffer):
+  if bytes(buffer[:len(MAGIC)]) != MAGIC:
+    raise ValueError("not a game data pack")
+  (length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+  start = len(MAGIC) + 4
+  header = json.loads(bytes(buffer[start:start + length]))
+  if header.get("version") != VERSION:
+    raise ValueError(f"pack version {header.get('version')}, expected {VERSION}")
+  return header, -(-(start + length) // ALIGN) * ALIGN
+
+def _is_fresh(header):
+  try:
+    return header["sources"] == _sources(header["sources"])
+  except OSError:
+    return False
+
+class GameData:
+  """Read-only views over a compiled pack (an mmap or bytes)."""
+
+  def __init__(self, buffer):
+    self._buffer = buffer
+    self.header, data_start = _read_header(buffer)
+    self.arrays = {}
+    for name, spec in self.header["arrays"].items():
+      dtype = DTYPES.get(spec["dtype"]) or np.dtype(spec["dtype"])
+      self.arrays[name] = np.frombuffer(buffer, dtype=dtype, count=spec["count"], offset=data_start + spec["offset"])
+    self.races = self.arrays["races"]
+    self.skills = self.arrays["skills"]
+    self._string_offsets = self.arrays["string_offsets"]
+    self._string_data = self.arrays["string_data"]
+    self._strings = {}
+    self._race_dicts = {}
+
+  @classmethod
+  def open(cls, path=PACK_PATH):
+    with open(path, "rb") as f:
+      return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+  def string(self, string_id):
+    if string_id < 0:
+      return None
+    value = self._strings.get(string_id)
+    if value is None:
+      start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+      value = self._strings[string_id] = self._string_data[start:end].tobytes().decode("utf-8")
+    return value
+
+  # ---------------------------------------------------------
+  # Races
+  # ---------------------------------------------------------
+  def race(self, row):
+    """Race `row` in the shape of constants.RACE_LOOKUP entries."""
+    race = self._race_dicts.get(row)
+    if race is None:
+      r = self.races[row]
+      race = self._race_dicts[row] = {
+        "name": self.string(r["name"]),
+        "date": self.string(r["date"]),
+        "racetrack": self.string(r["racetrack"]),
+        "terrain": self.string(r["terrain"]),
+        "distance": {"type": self.string(r["distance_type"]), "meters": int(r["meters"])},
+        "sparks": [self.string(s) for s in r["sparks"] if s >= 0],
+        "fans": {"required": int(r["fans_required"]), "gained": int(r["fans_gained"])},
+      }
+    return race
+
+  def race_year(self, row):
+    return self.string(self.races[row]["year"])
+
+  def _group(self, group, key):
+    keys = self.arrays[f"races_by_{group}_keys"]
+    i = bisect_left(range(len(keys)), key, key=lambda k: self.string(keys[k]))
+    if i == len(keys) or self.string(keys[i]) != key:
+      return []
+    start = self.arrays[f"races_by_{group}_start"]
+    return [self.race(row) for row in self.arrays[f"races_by_{group}_rows"][start[i]:start[i + 1]]]
+
+  def races_on(self, year, date=None):
+    """Races on a slot: races_on("Classic Year", "Early Apr") or races_on("Classic Year Early Apr")."""
+    return self._group("slot", f"{year} {date}" if date else year)
+
+  def races_by_terrain(self, terrain):
+    return self._group("terrain", terrain)
+
+  def races_by_distance(self, distance_type):
+    return self._group("distance", distance_type)
+
+  def _named(self, index, table, name):
+    rows = self.arrays[index]
+    target = normalize(name)
+    norm = lambda i: self.string(table[rows[i]]["norm_name"])
+    lo = bisect_left(range(len(rows)), target, key=norm)
+    hi = bisect_right(range(len(rows)), target, lo=lo, key=norm)
+    return rows[lo:hi].tolist()
+
+  def races_named(self, name):
+    """Races whose normalised name equals normalize(name)."""
+    return [self.race(row) for row in self._named("races_by_name", self.races, name)]
+
+  def races_by_year(self):
+    """{year: {name: race without its name}}, the layout of data/races.json."""
+    result = {}
+    for row in range(len(self.races)):
+      race = dict(self.race(row))
+      result.setdefault(self.race_year(row), {})[race.pop("name")] = race
+    return result
+
+  def race_lookup(self):
+    """{"<year> <date>": [race, ...]} in source order, the layout of constants.RACE_LOOKUP."""
+    lookup = {}
+    for row in range(len(self.races)):
+      lookup.setdefault(self.string(self.races[row]["slot"]), []).append(self.race(row))
+    return lookup
+
+  # ---------------------------------------------------------
+  # Skills
+  # ---------------------------------------------------------
+  def skill(self, row):
+    s = self.skills[row]
+    return {"name": self.string(s["name"]), "description": self.string(s["description"])}
+
+  def skill_names(self):
+    return [self.string(name) for name in self.skills["name"]]
+
+  def skills_named(self, name):
+    """Skills whose normalised name equals normalize(name) (◎ / ○ / × variants share one)."""
+    return [self.skill(row) for row in self._named("skills_by_name", self.skills, name)]
+
+def load(path=PACK_PATH):
+  """
+  Map the pack, rebuilding it first if it is missing or older than the JSON
+  it came from. Falls back to an in-memory pack when it can't be written.
+  """
+  try:
+    data = GameData.open(path)
+    if _is_fresh(data.header):
+      return data
+  except (OSError, ValueError):
+    pass
+  try:
+    build(path)
+    return GameData.open(path)
+  except OSError:
+    from utils.log import warning
+    warning(f"Could not write {path}, using game data from memory.")
+    return GameData(compile_pack())
+
+_game_data = None
+
+def get_game_data():
+  global _game_data
+  if _game_data is None:
+    _game_data = load()
+  return _game_data
+
+def main(argv=None):
+  argv = sys.argv[1:] if argv is None else argv
+  command = argv[0] if argv else "info"
+  if command == "build":
+    size = build()
+    print(f"✅ Wrote {PACK_PATH} ({size} bytes).")
+  elif command == "info":
+    started = time.perf_counter()
+    data = load()
+    elapsed = time.perf_counter() - started
+    print(f"{len(data.races)} races, {len(data.skills)} skills, {len(data.header['arrays'])} arrays; loaded in {elapsed * 1e6:.0f} µs.")
+  else:
+    print("usage: python -m utils.game_data [build|info]")
+    return 2
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,127 @@
+# screen layouts (where regions, bboxes and mouse positions are for one game window)
+import utils.constants as constants
+
+# The values in utils/constants were measured on a 1920x1080 screen.
+REFERENCE_WIDTH, REFERENCE_HEIGHT = constants.REFERENCE_SIZE
+
+# Translation of the reference coordinates for each window kind, in reference
+# pixels, relative to the top-left of the 1920x1080 area the game is shown in.
+WINDOW_ORIGINS = {
+  "steam": (0, 0),
+  "bluestacks": (405, 0),  # emulator in fullscreen, game area centred
+}
+
+def _is_layout_name(name):
+  return name.endswith(("_REGION", "_BBOX", "_MOUSE_POS"))
+
+class Layout:
+  """
+  Screen coordinates for one game instance.
+
+    *_REGION     (left, top, width, height)
+    *_BBOX       (left, top, right, bottom)
+    *_MOUSE_POS  (x, y)
+
+  Built from the reference values in utils/constants and never modified in
+  place; translated() and scaled() return new layouts. apply() copies the
+  values onto the constants module, which is what the rest of the bot reads.
+  """
+
+  def __init__(self, values, offset=(0, 0), scale=1.0, window_region=None):
+    self.values = dict(values)
+    self.offset = offset
+    self.scale = scale
+    # (left, top, width, height) of the game window; None means search the whole screen
+    self.window_region = window_region
+
+  @classmethod
+  def reference(cls):
+    return cls(_REFERENCE)
+
+  def transformed(self, scale=1.0, dx=0, dy=0):
+    """Every point p becomes p * scale + (dx, dy); sizes are multiplied by scale."""
+    def point(x, y):
+      return round(x * scale + dx), round(y * scale + dy)
+
+    values = {}
+    for name, value in self.values.items():
+      if name.endswith("_BBOX"):
+        values[name] = (*point(value[0], value[1]), *point(value[2], value[3]))
+      elif name.endswith("_REGION"):
+        values[name] = (*point(value[0], value[1]), round(value[2] * scale), round(value[3] * scale))
+      else:
+        values[name] = point(value[0], value[1])
+    offset = (round(self.offset[0] * scale + dx), round(self.offset[1] * scale + dy))
+    return Layout(values, offset, self.scale * scale, self.window_region)
+
+  def translated(self, dx, dy=0):
+    return self.transformed(1.0, dx, dy)
+
+  def scaled(self, scale):
+    return self.transformed(scale)
+
+  def with_window(self, window_region):
+    return Layout(self.values, self.offset, self.scale, window_region)
+
+  def __getattr__(self, name):
+    try:
+      return self.__dict__["values"][name]
+    except KeyError:
+      raise AttributeError(name) from None
+
+  def contains(self, box):
+    """True if an (x, y, w, h) box lies inside this instance's window (always True without one)."""
+    if self.window_region is None:
+      return True
+    left, top, width, height = self.window_region
+    x, y = box[0], box[1]
+    return left <= x < left + width and top <= y < top + height
+
+  def apply(self, module=constants):
+    for name, value in self.values.items():
+      setattr(module, name, value)
+    module.WINDOW_REGION = self.window_region
+    module.SCALE = self.scale
+    module.LAYOUT = self
+
+  @classmethod
+  def for_window(cls, kind, left=0, top=0, width=None, height=None):
+    """
+    Layout for a game window of `kind` at (left, top). The window stands in
+    for the reference 1920x1080 screen; its height sets the scale.
+    """
+    scale = height / REFERENCE_HEIGHT if height else 1.0
+    origin_x, origin_y = WINDOW_ORIGINS[kind]
+    layout = cls.reference().translated(origin_x, origin_y).transformed(scale, left, top)
+    if width and height:
+      layout = layout.with_window((left, top, width, height))
+    return layout
+
+  @classmethod
+  def for_screen(cls, kind, width, height):
+    """Single instance filling a screen of any size; a 16:9 area is centred horizontally."""
+    scale = height / REFERENCE_HEIGHT
+    left = round((width - REFERENCE_WIDTH * scale) / 2)
+    origin_x, origin_y = WINDOW_ORIGINS[kind]
+    return cls.reference().translated(origin_x, origin_y).transformed(scale, left, 0)
+
+# Captured at import, before anything can have changed the module.
+_REFERENCE = {
+  name: value for name, value in vars(constants).items()
+  if _is_layout_name(name) and isinstance(value, tuple)
+}
+
+def use_layout(layout):
+  """Make `layout` the active one for this process."""
+  layout.apply(constants)
+  return layout
+
+def active_layout():
+  return getattr(constants, "LAYOUT", None) or Layout.reference()
+
+def in_window(boxes):
+  """Drop full-screen matches that belong to another instance's window."""
+  if constants.WINDOW_REGION is None:
+    return boxes
+  layout = active_layout()
+  return [box for box in boxes if layout.contains(box)]
@@ -1,26 +1,197 @@
 # logging tools
+#
+# The bot thread only puts records on a queue. Formatting, the repeat filter
+# and console/file output all run on the listener thread, so a slow disk or
+# terminal never stalls a turn.
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="[%(levelname)s] %(message)s"
-)
-
-info = logging.info
-warning = logging.warning
-error = logging.error
-debug = logging.debug
+PLAIN_FORMAT = "[%(levelname)s] %(message)s"
+REPEAT_INTERVAL = 10  # seconds; identical messages inside this window are counted, not written
 
 log_dir = os.path.join(os.getcwd(), "logs")
 os.makedirs(log_dir, exist_ok=True)
 
-handler = RotatingFileHandler(
-    os.path.join(log_dir, "log.txt"),
-    maxBytes=1_000_000,
-    backupCount=10,
-    encoding="utf-8"
-)
+_instance = None
+_json = False
+_loggers = {}
+
+def _logger(depth=2):
+    # one logger per calling module, so levels can be set per module ("core.ocr", "core")
+    name = sys._getframe(depth).f_globals.get("__name__", "root")
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = logging.getLogger(name)
+    return logger
+
+def debug(msg, *args, **kwargs):
+    _logger().debug(msg, *args, stacklevel=2, **kwargs)
+
+def info(msg, *args, **kwargs):
+    _logger().info(msg, *args, stacklevel=2, **kwargs)
+
+def warning(msg, *args, **kwargs):
+    _logger().warning(msg, *args, stacklevel=2, **kwargs)
+
+def error(msg, *args, **kwargs):
+    _logger().error(msg, *args, stacklevel=2, **kwargs)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message (+ instance, exception)."""
+
+    def __init__(self, instance=None):
+        super().__init__()
+        self.instance = instance
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if self.instance:
+            entry["instance"] = self.instance
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class RepeatFilter:
+    """
+    Drops a message identical to one written less than `interval` seconds ago.
+    The next time it gets through it says how many copies were dropped.
+    """
+
+    def __init__(self, interval=REPEAT_INTERVAL):
+        self.interval = interval
+        self._seen = {}  # (logger, level, message) -> [last written at, dropped since]
+
+    def allow(self, record):
+        if self.interval <= 0:
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        seen = self._seen.get(key)
+        if seen and record.created - seen[0] < self.interval:
+            seen[1] += 1
+            return False
+        if seen and seen[1]:
+            record.msg = f"{message} (repeated {seen[1]} more times)"
+            record.args = None
+        self._seen[key] = [record.created, 0]
+        if len(self._seen) > 1000:
+            cutoff = record.created - self.interval
+            self._seen = {k: v for k, v in self._seen.items() if v[0] >= cutoff or v[1]}
+        return True
+
+_SCALARS = (str, int, float, bool, type(None))
+
+def _snapshot(args):
+    if isinstance(args, dict):
+        return copy.copy(args)
+    return tuple(a if isinstance(a, _SCALARS) else copy.copy(a) for a in args)
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Unlike the stock handler, leave msg % args for the listener thread.
+        # Mutable args (results dicts, lists) are shallow-copied first, since the
+        # bot may change them before the listener formats the message.
+        # Tracebacks are rendered here because the frames may be gone by then.
+        if not record.args and not record.exc_info:
+            return record
+        record = copy.copy(record)
+        if record.args:
+            record.args = _snapshot(record.args)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class _Listener(QueueListener):
+    def __init__(self, log_queue, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.repeats = RepeatFilter()
+
+    def handle(self, record):
+        if self.repeats.allow(record):
+            super().handle(record)
+
+def _file_handler(directory):
+    return RotatingFileHandler(
+        os.path.join(directory, "log.jsonl" if _json else "log.txt"),
+        maxBytes=1_000_000,
+        backupCount=10,
+        encoding="utf-8"
+    )
+
+def _plain_formatter():
+    prefix = f"[{_instance}]" if _instance else ""
+    return logging.Formatter(prefix + PLAIN_FORMAT)
+
+def _set_formatters():
+    console.setFormatter(_plain_formatter())
+    handler.setFormatter(JsonFormatter(_instance) if _json else _plain_formatter())
+
+console = logging.StreamHandler()
+handler = _file_handler(log_dir)
+_set_formatters()
+
+# unbounded, so put() never blocks the caller
+_queue = queue.SimpleQueue()
+_listener = _Listener(_queue, console, handler)
+
+root = logging.getLogger()
+root.setLevel(logging.DEBUG)
+for h in list(root.handlers):
+    root.removeHandler(h)
+root.addHandler(_QueueHandler(_queue))
+_listener.start()
+
+@atexit.register
+def _flush():
+    if _listener._thread is not None:
+        _listener.stop()
+
+def _replace_file_handler(directory):
+    """Swap the file handler with the listener stopped, so no record is written to a closed file."""
+    global handler, log_dir
+    _listener.stop()
+    handler.close()
+    os.makedirs(directory, exist_ok=True)
+    log_dir = directory
+    handler = _file_handler(directory)
+    _set_formatters()
+    _listener.handlers = (console, handler)
+    _listener.start()
+
+def set_log_dir(path, instance=None):
+    """Move the file log to `path`/log.txt and tag every line with `instance` (one per bot worker)."""
+    global _instance
+    if instance:
+        _instance = instance
+    _replace_file_handler(path)
 
-logging.getLogger().addHandler(handler)
+def configure(level="DEBUG", console_level="DEBUG", json_format=False, module_levels=(), repeat_interval=REPEAT_INTERVAL):
+    """
+    level / console_level   root level and the level shown in the terminal
+    json_format             write logs/log.jsonl (one JSON object per line) instead of log.txt
+    module_levels           [{"module": "core.ocr", "level": "INFO"}, ...]; a package name covers its modules
+    repeat_interval         seconds during which identical messages are collapsed (0 = off)
+    """
+    global _json
+    root.setLevel(level.upper())
+    console.setLevel(console_level.upper())
+    for entry in module_levels:
+        logging.getLogger(entry["module"]).setLevel(entry["level"].upper())
+    _listener.repeats.interval = repeat_interval
+    if bool(json_format) != _json:
+        _json = bool(json_format)
+        _replace_file_handler(log_dir)
@@ -0,0 +1,195 @@
+# runtime metrics (Prometheus text format, served at /metrics)
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _label_key(labelnames, labels):
+  if set(labels) != set(labelnames):
+    raise ValueError(f"expected labels {labelnames}, got {tuple(labels)}")
+  return tuple(str(labels[name]) for name in labelnames)
+
+def _format_labels(labelnames, key, extra=None):
+  pairs = list(zip(labelnames, key))
+  if extra:
+    pairs.append(extra)
+  if not pairs:
+    return ""
+  body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+  return "{" + body + "}"
+
+def _escape(value):
+  return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value):
+  if value == float("inf"):
+    return "+Inf"
+  return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+  kind = None
+
+  def __init__(self, name, help, labelnames=()):
+    self.name = name
+    self.help = help
+    self.labelnames = tuple(labelnames)
+    self._values = {}
+    self._lock = threading.Lock()
+
+  def collect(self):
+    lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+    with self._lock:
+      items = sorted(self._values.items())
+    for key, value in items:
+      lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+    return lines
+
+class Counter(_Metric):
+  kind = "counter"
+
+  def inc(self, amount=1, **labels):
+    key = _label_key(self.labelnames, labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+  def value(self, **labels):
+    return self._values.get(_label_key(self.labelnames, labels), 0)
+
+class Gauge(_Metric):
+  kind = "gauge"
+
+  def set(self, value, **labels):
+    key = _label_key(self.labelnames, labels)
+    with self._lock:
+      self._values[key] = value
+
+  def value(self, **labels):
+    return self._values.get(_label_key(self.labelnames, labels))
+
+class Histogram(_Metric):
+  kind = "histogram"
+
+  def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    super().__init__(name, help, labelnames)
+    self.buckets = tuple(sorted(buckets))
+
+  def observe(self, value, **labels):
+    key = _label_key(self.labelnames, labels)
+    i = bisect_left(self.buckets, value)
+    with self._lock:
+      state = self._values.get(key)
+      if state is None:
+        # per-bucket (non-cumulative) counts, then +Inf, sum, count
+        state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+      state[0][i] += 1
+      state[1] += value
+      state[2] += 1
+
+  def value(self, **labels):
+    """(count, sum) of the observations with these labels."""
+    state = self._values.get(_label_key(self.labelnames, labels))
+    return (state[2], state[1]) if state else (0, 0.0)
+
+  def time(self, **labels):
+    """Decorator observing the wrapped function's wall time."""
+    def decorator(fn):
+      @wraps(fn)
+      def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+          return fn(*args, **kwargs)
+        finally:
+          self.observe(time.perf_counter() - start, **labels)
+      return wrapper
+    return decorator
+
+  def collect(self):
+    lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+    with self._lock:
+      items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+    for key, (counts, total, count) in items:
+      cumulative = 0
+      for bound, n in zip(self.buckets + (float("inf"),), counts):
+        cumulative += n
+        labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+        lines.append(f"{self.name}_bucket{labels} {cumulative}")
+      labels = _format_labels(self.labelnames, key)
+      lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+      lines.append(f"{self.name}_count{labels} {count}")
+    return lines
+
+class Registry:
+  def __init__(self):
+    self._metrics = {}
+    self._lock = threading.Lock()
+
+  def register(self, metric):
+    with self._lock:
+      if metric.name in self._metrics:
+        raise ValueError(f"metric {metric.name} already registered")
+      self._metrics[metric.name] = metric
+    return metric
+
+  def render(self):
+    with self._lock:
+      metrics = list(self._metrics.values())
+    lines = []
+    for metric in metrics:
+      lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name, help, labelnames=()):
+  return REGISTRY.register(Counter(name, help, labelnames))
+
+def gauge(name, help, labelnames=()):
+  return REGISTRY.register(Gauge(name, help, labelnames))
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+  return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+def render():
+  return REGISTRY.render()
+
+# -------------------------------------------------------------
+# Bot metrics
+# -------------------------------------------------------------
+START_TIME = gauge("uma_start_time_seconds", "Unix time the bot process started.")
+START_TIME.set(time.time())
+
+TURN_SECONDS = histogram("uma_turn_duration_seconds", "Wall time between consecutive turn decisions.", buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 300))
+OCR_SECONDS = histogram("uma_ocr_seconds", "OCR call latency (cache misses only).", ["kind"])
+MATCH_SECONDS = histogram("uma_template_match_seconds", "Template matching latency.", ["fn"])
+WAIT_SECONDS = histogram("uma_wait_seconds", "Time spent in deliberate sleeps.", buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+
+TURNS = counter("uma_turns_total", "Turns with a training, rest or race decision.")
+CAPTURES = counter("uma_captures_total", "Screen captures.", ["source"])
+OCR_CALLS = counter("uma_ocr_calls_total", "OCR requests, including cache hits.", ["kind"])
+OCR_CACHE_HITS = counter("uma_ocr_cache_hits_total", "OCR requests answered from the result cache.", ["kind"])
+CLICKS = counter("uma_clicks_total", "Mouse clicks sent to the game.")
+RESTS = counter("uma_rests_total", "Rest actions.")
+RACES = counter("uma_races_total", "Races entered.")
+TRAININGS = counter("uma_trainings_total", "Trainings performed per type.", ["type"])
+
+ENERGY = gauge("uma_energy", "Last energy reading.")
+MAX_ENERGY = gauge("uma_max_energy", "Last maximum energy reading.")
+STATS = gauge("uma_stat", "Last stat readings.", ["stat"])
+
+_last_turn_at = None
+
+def turn_done():
+  """Counts a turn and observes the time since the previous one."""
+  global _last_turn_at
+  now = time.monotonic()
+  if _last_turn_at is not None:
+    TURN_SECONDS.observe(now - _last_turn_at)
+  _last_turn_at = now
+  TURNS.inc()
+
+def reset_turn_timer():
+  """Call when the bot (re)starts so idle time isn't counted as a turn."""
+  global _last_turn_at
+  _last_turn_at = None
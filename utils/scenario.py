@@ -1,7 +1,10 @@
 import pyautogui
-from utils.tools import get_secs
+import utils.constants as constants
+from utils.tools import get_secs, input_lock
+from core.recognizer import needle
 
 def ura():
-  race_btn = pyautogui.locateCenterOnScreen("assets/ura/ura_race_btn.png", confidence=0.8, minSearchTime=get_secs(5))
+  race_btn = pyautogui.locateCenterOnScreen(needle("assets/ura/ura_race_btn.png"), confidence=0.8, minSearchTime=get_secs(5), region=constants.WINDOW_REGION)
   if race_btn:
-    pyautogui.click(race_btn)
\ No newline at end of file
+    with input_lock():
+      pyautogui.click(race_btn)
\ No newline at end of file
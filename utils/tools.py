@@ -1,23 +1,47 @@
 # tools
 import pyautogui
 import time
+from contextlib import contextmanager
 import core.state as state
 from .log import error
+from .trace import traced
+from .metrics import WAIT_SECONDS
 
+@traced(cat="wait")
 def sleep(seconds=1):
-  time.sleep(seconds * state.SLEEP_TIME_MULTIPLIER)
+  seconds = seconds * state.SLEEP_TIME_MULTIPLIER
+  WAIT_SECONDS.observe(seconds)
+  time.sleep(seconds)
 
 def get_secs(seconds=1):
   return seconds * state.SLEEP_TIME_MULTIPLIER
 
+# Shared by bot processes on one desktop (core/supervisor) so a move and its click
+# are never interleaved with another instance's input.
+_input_lock = None
+
+def set_input_lock(lock):
+  global _input_lock
+  _input_lock = lock
+
+@contextmanager
+def input_lock():
+  if _input_lock is None:
+    yield
+    return
+  with _input_lock:
+    yield
+
+@traced(cat="input")
 def drag_scroll(mousePos, to):
   '''to: negative to scroll down, positive to scroll up'''
   if not state.stop_event:
     return
   if not to or not mousePos:
     error("drag_scroll correct variables not supplied.")
-  pyautogui.moveTo(mousePos, duration=0.1)
-  pyautogui.mouseDown()
-  pyautogui.moveRel(0, to, duration=0.25)
-  pyautogui.mouseUp()
-  pyautogui.click()
+  with input_lock():
+    pyautogui.moveTo(mousePos, duration=0.1)
+    pyautogui.mouseDown()
+    pyautogui.moveRel(0, to, duration=0.25)
+    pyautogui.mouseUp()
+    pyautogui.click()
@@ -0,0 +1,118 @@
+# span tracing
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from utils.log import info, warning
+
+ENABLED = False
+EXPORT_PATH = os.path.join("logs", "trace.json")
+
+_buffer = deque(maxlen=100_000)
+_pid = os.getpid()
+
+def configure(enabled=False, buffer_size=100_000, export_path=None):
+  """Turn tracing on/off. Resizing the ring buffer drops recorded spans."""
+  global ENABLED, EXPORT_PATH, _buffer
+  if buffer_size != _buffer.maxlen:
+    _buffer = deque(maxlen=buffer_size)
+  if export_path:
+    EXPORT_PATH = export_path
+  ENABLED = enabled
+
+def record(name, cat, start_ns, dur_ns, args=None):
+  _buffer.append((name, cat, start_ns, dur_ns, threading.get_ident(), args))
+
+class _NullSpan:
+  __slots__ = ()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+  __slots__ = ("name", "cat", "args", "start")
+
+  def __init__(self, name, cat, args):
+    self.name = name
+    self.cat = cat
+    self.args = args
+
+  def __enter__(self):
+    self.start = time.perf_counter_ns()
+    return self
+
+  def __exit__(self, *exc):
+    record(self.name, self.cat, self.start, time.perf_counter_ns() - self.start, self.args)
+    return False
+
+def span(name, cat="bot", **args):
+  """Context manager timing a block. Returns a shared no-op object when tracing is off."""
+  if not ENABLED:
+    return _NULL_SPAN
+  return _Span(name, cat, args or None)
+
+def traced(name=None, cat="bot"):
+  """Decorator version of span(), defaults to the function's qualified name."""
+  def decorator(fn):
+    label = name or fn.__qualname__
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+      if not ENABLED:
+        return fn(*args, **kwargs)
+      start = time.perf_counter_ns()
+      try:
+        return fn(*args, **kwargs)
+      finally:
+        record(label, cat, start, time.perf_counter_ns() - start)
+    return wrapper
+  return decorator
+
+def snapshot():
+  return list(_buffer)
+
+def clear():
+  _buffer.clear()
+
+def to_chrome_trace(spans=None):
+  """Convert spans to the Chrome trace event format (chrome://tracing, Perfetto)."""
+  if spans is None:
+    spans = snapshot()
+  events = []
+  for name, cat, start_ns, dur_ns, tid, args in spans:
+    event = {
+      "name": name,
+      "cat": cat,
+      "ph": "X",
+      "ts": start_ns / 1000,
+      "dur": dur_ns / 1000,
+      "pid": _pid,
+      "tid": tid,
+    }
+    if args:
+      event["args"] = args
+    events.append(event)
+  return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def export_chrome_trace(path=None):
+  path = path or EXPORT_PATH
+  spans = snapshot()
+  if not spans:
+    return None
+  try:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+      json.dump(to_chrome_trace(spans), f, default=str)
+    info(f"🧵 Exported {len(spans)} trace spans to {path}")
+    return path
+  except Exception as e:
+    warning(f"Failed to export trace: {e}")
+    return None